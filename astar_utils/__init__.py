@@ -7,7 +7,8 @@ from .nested_mapping import (
     is_bangkey,
     is_nested_mapping,
 )
-from .unique_list import UniqueList
+from .sqlite_mapping import SQLiteNestedMapping
+from .unique_list import UniqueList, SortedUniqueList
 from .badges import Badge, BadgeReport
 from .loggers import get_logger, get_astar_logger
 from .spectral_types import SpectralType
@@ -4,15 +4,23 @@
 Currently only used in IRDB, but has possible applications elsewhere.
 """
 
+import os
+import re
+import json
+import shutil
+import hashlib
 from pathlib import Path
 from typing import TextIO, Any
 from numbers import Number
+from io import StringIO
 from string import Template
+from contextlib import ExitStack, contextmanager
 from collections.abc import Mapping
 
 import yaml
 
 from .nested_mapping import NestedMapping
+from .sqlite_mapping import SQLiteNestedMapping
 from .loggers import get_logger
 
 logger = get_logger(__name__)
@@ -188,6 +196,41 @@ class BadgeReport(NestedMapping):
     test script. `BadgeReport` handles all ``logging.LogRecord`` objects in
     the final `.logs` list.
 
+    For long test sessions, use ``BadgeReport(incremental=True)``. In this
+    mode, each badge is written to an on-disk journal (an SQLite database,
+    see `SQLiteNestedMapping`) as soon as it is set, and each log record is
+    written to the log file as soon as it is added to `.logs`, instead of
+    keeping everything in memory until the end. If the test session crashes,
+    the journal survives and the report can be generated from it later with
+    ``BadgeReport(..., incremental=True, resume=True)``. At teardown, the
+    yaml and markdown files are written in a single pass over the journal,
+    which only loads one top-level section (e.g. package) at a time. Badges
+    can still be read back via the report, but ``.dic`` stays empty. The
+    journal and log file are opened right away and closed at the end of the
+    ``with`` block. When not using ``with``, call ``.close()`` when done.
+
+    When running tests in parallel with ``pytest-xdist``, each worker process
+    gets its own report fixture. To prevent the workers from overwriting each
+    other's files, the report is automatically sharded: the name of the
+    worker (taken from the ``PYTEST_XDIST_WORKER`` environment variable) is
+    inserted into all file names, e.g. "badges.gw0.yaml". Once all workers
+    are done, the shards can be combined into the regular output files with
+    `merge_shards`, e.g. from a ``pytest_sessionfinish`` hook in the
+    ``conftest.py``, which only runs in the controller process if the
+    ``workerinput`` attribute is absent from the config:
+
+    >>> def pytest_sessionfinish(session):
+    >>>     if not hasattr(session.config, "workerinput"):
+    >>>         BadgeReport.merge_shards()
+
+    For very large reports, use ``BadgeReport(reuse_sections=True)``. The
+    markdown report is then written together with a sidecar file (e.g.
+    "badges.md.hashes.json"), which contains a content hash for each
+    top-level section. When the report is generated again, only sections
+    whose badges have changed since are rendered anew, while all other
+    sections are copied from the existing report file. If the report file
+    was modified or removed in the meantime, it is rendered from scratch.
+
     Parameters
     ----------
     filename : str, optional
@@ -200,17 +243,41 @@ class BadgeReport(NestedMapping):
         Whether to output logs. The default is True.
     base_path: Path, optional
         Directory to use for reports. Defaults to ./_REPORTS.
+    incremental : bool, optional
+        Whether to write badges and logs to disk as they arrive, see above.
+        The default is False.
+    journal_filename : str, optional
+        Name for the journal file used in incremental mode. The default is
+        "badges_journal.db".
+    resume : bool, optional
+        In incremental mode, whether to keep the contents of an existing
+        journal and log file, e.g. from a crashed previous session, instead of
+        starting from scratch. The default is False.
+    shard : str, optional
+        Name of the shard to write, which is inserted into all file names.
+        If None (the default), the name of the current ``pytest-xdist``
+        worker is used, if any. Use an empty string to disable sharding.
+    reuse_sections : bool, optional
+        Whether to only re-render changed sections of an existing report,
+        see above. The default is False.
 
     Attributes
     ----------
+    shard : str
+        Name of the shard, empty if the report is not sharded.
     yamlpath : Path
         Full path for yaml file.
     report_path : Path
         Full path for report file.
     log_path : Path
         Full path for log file.
+    journal_path : Path
+        Full path for journal file (only used in incremental mode).
+    hashes_path : Path
+        Full path for section hashes file (only used with `reuse_sections`).
     logs : list of logging.LogRecord
-        List of logging.LogRecord objects to be saved to `logs_filename`.
+        List of logging.LogRecord objects to be saved to `logs_filename`. In
+        incremental mode, this is a write-only list-like object.
     """
 
     def __init__(
@@ -220,6 +287,11 @@ class BadgeReport(NestedMapping):
         logs_filename: str = "badge_report_log.txt",
         save_logs: bool = True,
         base_path=None,
+        incremental: bool = False,
+        journal_filename: str = "badges_journal.db",
+        resume: bool = False,
+        shard: str | None = None,
+        reuse_sections: bool = False,
     ) -> None:
         logger.debug("REPORT INIT")
         if base_path is not None:
@@ -228,18 +300,132 @@ class BadgeReport(NestedMapping):
             base_path = Path("./_REPORTS")
             logger.debug("base_path not set, using %s", base_path.absolute())
 
+        if shard is None:
+            shard = os.environ.get("PYTEST_XDIST_WORKER", "")
+        self.shard = shard
+        logs_filename = logs_filename or "badge_report_log.txt"
+        if shard:
+            logger.debug("Writing shard %s", shard)
+            filename = _shard_name(filename, shard)
+            report_filename = _shard_name(report_filename, shard)
+            logs_filename = _shard_name(logs_filename, shard)
+            journal_filename = _shard_name(journal_filename, shard)
+
         self.filename = filename
         self.yamlpath = base_path / self.filename
         self.report_name = report_filename
         self.report_path = base_path / self.report_name
+        self.reuse_sections = reuse_sections
+        self.hashes_path = base_path / f"{self.report_name}.hashes.json"
 
         self.save_logs = save_logs
         self.logs: list[Any] = []
-        logs_name = logs_filename or "badge_report_log.txt"
-        self.log_path = base_path / logs_name
+        self.log_path = base_path / logs_filename
 
+        self.journal_path = base_path / journal_filename
+        self._journal: SQLiteNestedMapping | None = None
+        self._closed = False
         super().__init__()
 
+        if incremental:
+            base_path.mkdir(parents=True, exist_ok=True)
+            if not resume:
+                self.journal_path.unlink(missing_ok=True)
+            self._journal = SQLiteNestedMapping(self.journal_path)
+            self.logs = _LogJournal(self.log_path if save_logs else None,
+                                    resume)
+
+    def __deepcopy__(self, memo):
+        """Return copy.deepcopy(self), see ``.copy()``.
+
+        The copy uses the same file names and settings, but always keeps its
+        contents in memory, i.e. it never writes to the journal of an
+        incremental report. Logs already written by an incremental report are
+        not copied.
+        """
+        new = super().__deepcopy__(memo)
+        for attr in ("filename", "yamlpath", "report_name", "report_path",
+                     "reuse_sections", "hashes_path", "save_logs", "log_path",
+                     "journal_path", "shard"):
+            setattr(new, attr, getattr(self, attr))
+        new._journal = None
+        new._closed = False
+        if self._journal is not None:
+            new.dic = self._journal.dic  # Freshly loaded, so already a copy
+            new.logs = []
+        else:
+            new.logs = list(self.logs)
+        return new
+
+    @classmethod
+    def merge_shards(
+        cls,
+        filename: str = "badges.yaml",
+        report_filename: str = "badges.md",
+        logs_filename: str = "badge_report_log.txt",
+        save_logs: bool = True,
+        base_path=None,
+        remove_shards: bool = False,
+    ):
+        """Combine sharded reports into a single report.
+
+        All shards of the yaml file `filename` found in `base_path` are read
+        and merged in the natural order of their shard names (i.e. "gw2"
+        before "gw10"), using the same semantics as ``NestedMapping.update``.
+        Each shard is only traversed once. The merged report is then written
+        to the regular (unsharded) yaml and markdown files, and the sharded
+        log files are concatenated into the regular log file.
+
+        Parameters are the same as for creating a `BadgeReport`, except for:
+
+        Parameters
+        ----------
+        remove_shards : bool, optional
+            Whether to delete the shard files after merging. The default is
+            False.
+
+        Returns
+        -------
+        report : BadgeReport
+            The merged (unsharded) report.
+        """
+        report = cls(filename, report_filename, logs_filename, save_logs,
+                     base_path, shard="")
+        shards = sorted(_find_shards(report.yamlpath), key=_natural_sort_key)
+        logger.debug("Merging %d shards", len(shards))
+
+        shard_files = []
+        for shard in shards:
+            shard_path = report.yamlpath.with_name(
+                _shard_name(report.filename, shard))
+            with shard_path.open(encoding="utf-8") as file:
+                report.update(yaml.safe_load(file) or {})
+            shard_files.append(shard_path)
+            shard_report_name = _shard_name(report.report_name, shard)
+            shard_files.append(report.report_path.with_name(shard_report_name))
+            shard_files.append(report.hashes_path.with_name(
+                f"{shard_report_name}.hashes.json"))
+
+        report.write_yaml()
+        report.generate_report()
+
+        log_shards = [
+            report.log_path.with_name(_shard_name(report.log_path.name, shard))
+            for shard in shards
+        ]
+        if save_logs:
+            with report.log_path.open("w", encoding="utf-8") as file:
+                for log_shard in log_shards:
+                    if log_shard.exists():
+                        with log_shard.open(encoding="utf-8") as log_file:
+                            shutil.copyfileobj(log_file, file)
+        shard_files.extend(log_shards)
+
+        if remove_shards:
+            for shard_file in shard_files:
+                shard_file.unlink(missing_ok=True)
+        return report
+
     def __enter__(self):
         """Context manager __enter__."""
         logger.debug("REPORT ENTER")
@@ -248,23 +434,123 @@ class BadgeReport(NestedMapping):
     def __exit__(self, exc_type, exc_value, exc_traceback):
         """Context manager __exit__."""
         logger.debug("REPORT EXIT")
-        self.write_yaml()
-        self.generate_report()
+        if self._journal is None:
+            self.write_yaml()
+            self.generate_report()
+        else:
+            self._write_from_journal(yaml_file=True, report_file=True)
         if self.save_logs:
             self.write_logs()
+        self.close()
         logger.debug("REPORT DONE")
 
+    def close(self) -> None:
+        """Close journal and log file of an incremental report.
+
+        Done automatically at the end of the ``with`` block. Calling this
+        directly closes the files without writing the yaml and markdown
+        files, which can be generated later with ``resume=True``.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if isinstance(self.logs, _LogJournal):
+            self.logs.close()
+        if self._journal is not None:
+            self._journal.close()
+
+    def __del__(self):
+        """Close any files left open when garbage collected."""
+        if getattr(self, "_journal", None) is not None:
+            self.close()
+
+    @property
+    def incremental(self) -> bool:
+        """Whether badges are written to an on-disk journal."""
+        return self._journal is not None
+
+    def update(self, new_dict) -> None:
+        if self._journal is not None:
+            self._journal.update(new_dict)
+            return
+        super().update(new_dict)
+
+    def __getitem__(self, key: str):
+        """x.__getitem__(y) <==> x[y]."""
+        if self._journal is not None:
+            return self._journal[key]
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        """Set self[key] to value."""
+        if self._journal is not None:
+            self._journal[key] = value
+            return
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Delete self[key]."""
+        if self._journal is not None:
+            del self._journal[key]
+            return
+        super().__delitem__(key)
+
+    def __contains__(self, key) -> bool:
+        """Return key in self."""
+        if self._journal is not None:
+            return key in self._journal
+        return super().__contains__(key)
+
+    def __iter__(self):
+        """Implement iter(self)."""
+        if self._journal is not None:
+            return iter(self._journal)
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        if self._journal is not None:
+            return len(self._journal)
+        return super().__len__()
+
     def write_logs(self) -> None:
         """Dump logs to file (`logs_filename`)."""
+        if isinstance(self.logs, _LogJournal):
+            self.logs.close()  # Already written, only finish the file
+            return
         with self.log_path.open("w", encoding="utf-8") as file:
             for log in self.logs:
-                file.write(f"{log.levelname}::{log.message}\n")
+                file.write(_format_log(log))
 
     def write_yaml(self) -> None:
         """Dump dict to yaml file (`filename`)."""
-        dumpstr = yaml.dump(self.dic, sort_keys=False)
+        if self._journal is not None:
+            self._write_from_journal(yaml_file=True)
+            return
+        dumpstr = yaml.dump(self.dic, Dumper=_SafeReportDumper,
+                            sort_keys=False)
         self.yamlpath.write_text(dumpstr, encoding="utf-8")
 
+    def _write_from_journal(
+        self,
+        yaml_file: bool = False,
+        report_file: bool = False,
+    ) -> None:
+        """Write yaml and/or markdown file section by section from journal."""
+        with ExitStack() as stack:
+            yaml_stream = write_section = None
+            if yaml_file:
+                yaml_stream = stack.enter_context(
+                    self.yamlpath.open("w", encoding="utf-8"))
+            if report_file:
+                write_section = stack.enter_context(self._report_sections())
+            for key, value in self._journal.top_level_items():
+                if yaml_stream is not None:
+                    yaml.dump({key: value}, yaml_stream,
+                              Dumper=_SafeReportDumper, sort_keys=False)
+                if write_section is not None:
+                    write_section(key, value)
+
     def _make_preamble(self) -> str:
         preamble = (
             "# IRDB Packages Report\n\n"
@@ -273,15 +559,177 @@ class BadgeReport(NestedMapping):
         )
         return preamble
 
-    def generate_report(self) -> None:
-        """Write markdown badge report to `report_filename`."""
+    def _open_report(self) -> TextIO:
+        """Open report file for writing and write preamble."""
         if not self.report_path.suffix == ".md":
             logger.warning(
                 "Expected '.md' suffix for report file name, but found %s. "
                 "Report file might not be readable.", self.report_path.suffix)
-        with self.report_path.open("w", encoding="utf-8") as file:
-            file.write(self._make_preamble())
-            make_entries(file, self.dic)
+        file = self.report_path.open("w", encoding="utf-8")
+        file.write(self._make_preamble())
+        return file
+
+    def _load_sections(self) -> dict[str, tuple[str, str]]:
+        """Return hash and text of each section in the existing report.
+
+        If there is no valid hashes file matching the existing report, an
+        empty dict is returned, meaning that all sections need rendering.
+        """
+        try:
+            hashes = json.loads(self.hashes_path.read_text(encoding="utf-8"))
+            text = self.report_path.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return {}
+
+        preamble = self._make_preamble()
+        if (not isinstance(hashes, Mapping)
+                or hashes.get("report") != _hash_text(text)
+                or not text.startswith(preamble)):
+            logger.debug("Report file changed, rendering all sections")
+            return {}
+
+        sections = {}
+        start = len(preamble)
+        for key, digest, length in hashes.get("sections", []):
+            sections[key] = (digest, text[start:start + length])
+            start += length
+        return sections
+
+    @contextmanager
+    def _report_sections(self):
+        """Open report file, yield function to write one top-level section."""
+        if not self.reuse_sections:
+            with self._open_report() as file:
+                yield lambda key, value: make_entries(file, {key: value})
+            return
+
+        old_sections = self._load_sections()
+        new_sections = []
+        rendered = 0
+        report_hash = _new_hash()
+        report_hash.update(self._make_preamble().encode("utf-8"))
+
+        def write_section(key, value) -> None:
+            nonlocal rendered
+            digest = _hash_section(key, value)
+            old_digest, text = old_sections.get(key, (None, ""))
+            if digest != old_digest:
+                stream = StringIO()
+                make_entries(stream, {key: value})
+                text = stream.getvalue()
+                rendered += 1
+            file.write(text)
+            report_hash.update(text.encode("utf-8"))
+            new_sections.append((key, digest, len(text)))
+
+        with self._open_report() as file:
+            yield write_section
+        logger.debug("Rendered %d of %d report sections",
+                     rendered, len(new_sections))
+
+        hashes = {
+            "report": report_hash.hexdigest(),
+            "sections": new_sections,
+        }
+        self.hashes_path.write_text(json.dumps(hashes), encoding="utf-8")
+
+    def generate_report(self) -> None:
+        """Write markdown badge report to `report_filename`."""
+        if self._journal is not None:
+            self._write_from_journal(report_file=True)
+            return
+        with self._report_sections() as write_section:
+            for key, value in self.dic.items():
+                write_section(key, value)
+
+
+class _SafeReportDumper(yaml.SafeDumper):
+    """Safe yaml dumper, writing subclasses of basic types as basic types.
+
+    Like ``yaml.safe_dump``, this only writes plain yaml that can be read
+    again with ``yaml.safe_load``, but also supports e.g. ``numpy.float64``
+    values, which are valid badge values.
+    """
+
+
+_SafeReportDumper.add_multi_representer(
+    str, lambda dumper, data: dumper.represent_str(str(data)))
+_SafeReportDumper.add_multi_representer(
+    int, lambda dumper, data: dumper.represent_int(int(data)))
+_SafeReportDumper.add_multi_representer(
+    float, lambda dumper, data: dumper.represent_float(float(data)))
+
+
+def _shard_name(filename: str, shard: str) -> str:
+    """Insert shard name before file suffix, e.g. "badges.gw0.yaml"."""
+    path = Path(filename)
+    return f"{path.stem}.{shard}{path.suffix}"
+
+
+def _find_shards(path: Path):
+    """Yield names of all shards of `path` present in its directory."""
+    prefix = f"{path.stem}."
+    for shard_path in path.parent.glob(f"{path.stem}.*{path.suffix}"):
+        shard = shard_path.name[len(prefix):]
+        if path.suffix:
+            shard = shard[:-len(path.suffix)]
+        if shard:
+            yield shard
+
+
+def _natural_sort_key(shard: str) -> list:
+    return [int(part) if part.isdigit() else part
+            for part in re.split(r"(\d+)", shard)]
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=16)
+
+
+def _hash_text(text: str) -> str:
+    text_hash = _new_hash()
+    text_hash.update(text.encode("utf-8"))
+    return text_hash.hexdigest()
+
+
+def _hash_section(key: str, value) -> str:
+    """Return content hash of top-level report section."""
+    return _hash_text(json.dumps([key, value], default=str))
+
+
+def _format_log(log) -> str:
+    return f"{log.levelname}::{log.message}\n"
+
+
+class _LogJournal:
+    """Write-only list replacement, writing log records to file right away."""
+
+    def __init__(self, path: Path | None, resume: bool = False):
+        self._file = None
+        if path is not None:
+            self._file = path.open("a" if resume else "w", encoding="utf-8")
+        self._count = 0
+
+    def append(self, log) -> None:
+        """Write log record to file."""
+        if self._file is not None:
+            self._file.write(_format_log(log))
+            self._file.flush()
+        self._count += 1
+
+    def extend(self, logs) -> None:
+        """Write all log records to file."""
+        for log in logs:
+            self.append(log)
+
+    def __len__(self) -> int:
+        """Return number of log records written so far."""
+        return self._count
+
+    def close(self) -> None:
+        """Close the log file."""
+        if self._file is not None:
+            self._file.close()
 
 
 def _get_nested_header(key: str, level: int) -> str:
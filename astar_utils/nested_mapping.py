@@ -1,21 +1,41 @@
 # -*- coding: utf-8 -*-
 """Contains NestedMapping class."""
 
-from typing import TextIO, Any
+from copy import deepcopy
+from typing import TextIO, Any, ClassVar
 from io import StringIO
+from itertools import islice, count
+from contextlib import contextmanager
+from dataclasses import dataclass
 from collections import abc, ChainMap
 
 from more_itertools import ilen
 
 from .loggers import get_logger
+from .spectral_types import SpectralType
 
 logger = get_logger(__name__)
 
+# Global counter, so no two states of any two instances share a version
+_versions = count()
+
 
 class NestedMapping(abc.MutableMapping):
     # TODO: improve docstring
     """Dictionary-like structure that supports nested !-bang string keys."""
 
+    # Limits for IPython and notebook output, see ``write_string``
+    repr_limits: ClassVar[dict[str, int | None]] = {
+        "max_depth": None,
+        "max_items_per_node": 100,
+        "max_chars": 100_000,
+    }
+
+    # Mapping that shares its nested dicts with this one, see ``__getitem__``
+    _owner: "NestedMapping | None" = None
+    # Whether all contents are held in ``.dic``, see ``SQLiteNestedMapping``
+    _in_memory: ClassVar[bool] = True
+
     def __init__(
         self,
         new_dict: abc.Iterable | None = None,
@@ -23,13 +43,41 @@ class NestedMapping(abc.MutableMapping):
     ):
         self.dic: abc.MutableMapping[str, Any] = {}
         self._title = title
+        self._version = next(_versions)
         if isinstance(new_dict, abc.MutableMapping):
             self.update(new_dict)
         elif isinstance(new_dict, abc.Iterable):
             for entry in new_dict:
                 self.update(entry)
 
+    def _bump_version(self) -> None:
+        """Mark any cached information derived from the contents as stale.
+
+        Sub-mappings returned by ``__getitem__`` share their nested dicts with
+        this mapping, so changes made via their methods also mark this mapping
+        (and vice versa, see ``_content_version``). Direct changes to ``.dic``
+        or to any (sub-)dicts shared with this mapping are not tracked.
+        """
+        mapping = self
+        while mapping is not None:
+            mapping._version = next(_versions)
+            mapping = mapping._owner
+
+    def _content_version(self) -> tuple:
+        """Return hashable state of the contents changed via any methods.
+
+        Includes the versions of all mappings sharing their nested dicts with
+        this one, see ``_bump_version``.
+        """
+        versions = []
+        mapping = self
+        while mapping is not None:
+            versions.append(mapping._version)
+            mapping = mapping._owner
+        return tuple(versions)
+
     def update(self, new_dict: abc.MutableMapping[str, Any]) -> None:
+        self._bump_version()
         if isinstance(new_dict, NestedMapping):
             new_dict = new_dict.dic  # Avoid updating with another one
 
@@ -62,6 +110,18 @@ class NestedMapping(abc.MutableMapping):
 
     def __getitem__(self, key: str):
         """x.__getitem__(y) <==> x[y]."""
+        return self._wrap_entry(key, self._get_entry(key))
+
+    def __contains__(self, key) -> bool:
+        """Return key in self."""
+        try:
+            self._get_entry(key)
+        except KeyError:
+            return False
+        return True
+
+    def _get_entry(self, key: str):
+        """Return raw value (i.e. a dict for sub-mappings) stored at `key`."""
         if not is_bangkey(key):
             return self.dic[key]
 
@@ -82,13 +142,31 @@ class NestedMapping(abc.MutableMapping):
                 except (KeyError, ValueError):
                     # Raise from original error rather than type casting fails.
                     raise KeyError(key) from err
+        return entry
+
+    def _top_level_keys(self) -> abc.Iterable:
+        """Return top-level keys, without flattening nested sub-mappings."""
+        return self.dic.keys()
+
+    def _has_top_level_key(self, key) -> bool:
+        """Return True if `key` is a top-level key (without int fallback)."""
+        return key in self.dic
+
+    def _wrap_entry(self, key: str, entry):
+        """Return raw `entry` found at `key` as returned by ``__getitem__``.
 
-        if is_nested_mapping(entry):
-            return self.__class__(entry)
+        Nested sub-mappings are wrapped in a new instance, which shares the
+        nested dicts of `entry` and reports any changes back to this mapping.
+        """
+        if is_bangkey(key) and is_nested_mapping(entry):
+            view = self.__class__(entry)
+            view._owner = self
+            return view
         return entry
 
     def __setitem__(self, key: str, value) -> None:
         """Set self[key] to value."""
+        self._bump_version()
         if not is_bangkey(key):
             self.dic[key] = value
             return
@@ -104,6 +182,7 @@ class NestedMapping(abc.MutableMapping):
 
     def __delitem__(self, key: str) -> None:
         """Delete self[key]."""
+        self._bump_version()
         if not is_bangkey(key):
             del self.dic[key]
             return
@@ -159,6 +238,30 @@ class NestedMapping(abc.MutableMapping):
         """Implement iter(self)."""
         yield from (item[0] for item in self._staggered_items(None, self.dic))
 
+    def copy(self):
+        """Return a copy with its own nested structure.
+
+        All (nested) ``dict`` and ``list`` objects are copied, while immutable
+        leaf values (e.g. ``str``, ``int``, ``float``, ``tuple`` or
+        `SpectralType`) are shared with the original. Any other values are
+        copied via ``copy.deepcopy``. This is equivalent to, but much faster
+        than, ``copy.deepcopy(self)``.
+        """
+        return self.__deepcopy__({})
+
+    def __deepcopy__(self, memo):
+        """Return copy.deepcopy(self), see ``.copy()``.
+
+        Only the contents and title are copied, subclasses with any further
+        state must override this.
+        """
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        new.dic = _copy_structure(self.dic, memo)
+        new._title = self._title
+        new._version = next(_versions)
+        return new
+
     def __len__(self) -> int:
         """Return len(self)."""
         return ilen(iter(self))
@@ -175,22 +278,29 @@ class NestedMapping(abc.MutableMapping):
         pre: str,
         stream: TextIO,
         nested: bool = False,
+        depth: int = 0,
+        limits: "_RenderLimits | None" = None,
+        more: bool = False,
     ) -> list[tuple[str, Any]]:
         # TODO: could this (and _write_subdict) use _staggered_items instead??
+        limits = limits or _NO_LIMITS
         n_items = len(items)
         simple: list[tuple[str, Any]] = []
 
         for i_sub, (key, val) in enumerate(items):
             is_super = isinstance(val, abc.Mapping)
             if not nested or is_super:
-                final = i_sub == n_items - 1 and not simple
+                final = i_sub == n_items - 1 and not simple and not more
                 newpre = self._write_subkey(key, pre, final, stream)
             else:
                 simple.append((key, val))
                 continue
 
             if nested and is_super:
-                self._write_subdict(val, stream, newpre)
+                if limits.descend(depth + 1):
+                    self._write_subdict(val, stream, newpre, depth + 1, limits)
+                else:
+                    stream.write(" {...}")
             else:
                 stream.write(f" {val}")
 
@@ -199,53 +309,154 @@ class NestedMapping(abc.MutableMapping):
     def _write_subitems_html(
         self,
         items: abc.Collection[tuple[str, Any]],
-        stream: TextIO,
+        stream: "_LimitedHtmlStream",
         top_level: bool = False,
+        depth: int = 0,
+        limits: "_RenderLimits | None" = None,
+        n_more: int = 0,
     ) -> None:
+        limits = limits or _NO_LIMITS
         if top_level:
             for key, val in items:
-                stream.write("<details style=\"margin-left: 20px\">\n")
+                stream.open("<details style=\"margin-left: 20px\">\n",
+                            "details")
                 stream.write(
                     f"<summary><strong>\u2757{key!s}</strong></summary>\n")
                 if isinstance(val, abc.Mapping):
-                    self._write_subdict_html(val, stream)
+                    self._write_value_html(val, stream, depth, limits)
                 else:
                     stream.write(f"{val!s}\n")
-                stream.write("</details>\n")
+                stream.close("details")
+            if n_more:
+                stream.write("<details style=\"margin-left: 20px\">\n"
+                             f"<summary>... ({n_more} more)</summary>\n"
+                             "</details>\n")
         else:
-            stream.write("<ul>\n")
+            stream.open("<ul>\n", "ul")
             for key, val in items:
-                stream.write(f"<li><strong>{key!s}:</strong>")
+                stream.open(f"<li><strong>{key!s}:</strong>", "li")
                 if isinstance(val, abc.Mapping):
                     stream.write("\n")
-                    self._write_subdict_html(val, stream)
+                    self._write_value_html(val, stream, depth, limits)
                 else:
                     stream.write(f" {val!s}")
-                stream.write("</li>\n")
-            stream.write("</ul>\n")
+                stream.close("li")
+            if n_more:
+                stream.write(f"<li>... ({n_more} more)</li>\n")
+            stream.close("ul")
+
+    def _write_value_html(
+        self,
+        value: abc.Mapping,
+        stream: "_LimitedHtmlStream",
+        depth: int,
+        limits: "_RenderLimits",
+    ) -> None:
+        if limits.descend(depth + 1):
+            self._write_subdict_html(value, stream, depth=depth + 1,
+                                     limits=limits)
+        else:
+            # Collapsed node, children are not rendered at all
+            stream.write(
+                f"<details><summary>... ({len(value)} items)</summary>"
+                "</details>\n")
 
     def _write_subdict(
         self,
         subdict: abc.Mapping,
         stream: TextIO,
         pad: str = "",
+        depth: int = 0,
+        limits: "_RenderLimits | None" = None,
     ) -> None:
+        limits = limits or _NO_LIMITS
         pre = pad.replace("├─", "│ ").replace("└─", "  ")
-        simple = self._write_subitems(subdict.items(), pre, stream, True)
-        self._write_subitems(simple, pre, stream)
+        items, n_more = limits.clip(subdict)
+        simple = self._write_subitems(items, pre, stream, True, depth, limits,
+                                      n_more > 0)
+        self._write_subitems(simple, pre, stream, more=n_more > 0)
+        if n_more:
+            stream.write(f"{pre}└─... ({n_more} more)")
 
     def _write_subdict_html(
         self,
         subdict: abc.Mapping,
-        stream: TextIO,
+        stream: "_LimitedHtmlStream",
         top_level: bool = False,
+        depth: int = 0,
+        limits: "_RenderLimits | None" = None,
     ) -> None:
-        self._write_subitems_html(subdict.items(), stream, top_level)
+        limits = limits or _NO_LIMITS
+        items, n_more = limits.clip(subdict)
+        self._write_subitems_html(items, stream, top_level, depth, limits,
+                                  n_more)
 
-    def write_string(self, stream: TextIO) -> None:
-        """Write formatted string representation to I/O stream."""
-        stream.write(f"{self.title} contents:")
-        self._write_subdict(self.dic, stream, "\n")
+    def write_string(
+        self,
+        stream: TextIO,
+        *,
+        max_depth: int | None = None,
+        max_items_per_node: int | None = None,
+        max_chars: int | None = None,
+    ) -> None:
+        """Write formatted string representation to I/O stream.
+
+        By default, the entire structure is written. Any of the optional
+        limits stops the traversal early, omitted parts are marked by "...".
+
+        Parameters
+        ----------
+        stream : TextIO
+            I/O stream to write to.
+        max_depth : int or None, optional
+            Number of nested levels to write, deeper sub-mappings are shown
+            as ``{...}``. The default is None (no limit).
+        max_items_per_node : int or None, optional
+            Maximum number of items to write per (sub-)mapping, followed by
+            the number of omitted items. The default is None (no limit).
+        max_chars : int or None, optional
+            Maximum number of characters to write. The default is None (no
+            limit).
+        """
+        limits = _RenderLimits(max_depth, max_items_per_node)
+        limited = _LimitedStream(stream, max_chars)
+        try:
+            limited.write(f"{self.title} contents:")
+            self._write_subdict(self.dic, limited, "\n", limits=limits)
+        except _OutputLimitReached:
+            stream.write("...")
+
+    def write_html(
+        self,
+        stream: TextIO,
+        *,
+        max_depth: int | None = None,
+        max_items_per_node: int | None = None,
+        max_chars: int | None = None,
+    ) -> None:
+        """Write HTML representation to I/O stream.
+
+        Takes the same optional limits as `write_string`. Sub-mappings beyond
+        `max_depth` are written as collapsed ``<details>`` nodes without any
+        of their contents. Unlike `write_string`, `max_chars` never cuts a
+        single tag in half, and all elements still open when `max_chars` is
+        reached are closed properly.
+        """
+        limits = _RenderLimits(max_depth, max_items_per_node)
+        limited = _LimitedHtmlStream(stream, max_chars)
+        try:
+            limited.open("<details>\n", "details")
+            limited.write(
+                f"<summary><strong>{self.title}</strong></summary>\n")
+            # HACK: startswith("[") to avoid printing "!" on instances created
+            #       from a chain map query
+            self._write_subdict_html(
+                self.dic, limited, (not self._title.startswith("[")
+                                    if self._title else False),
+                limits=limits)
+            limited.close("details")
+        except _OutputLimitReached:
+            limited.close_all()
 
     def __repr__(self) -> str:
         """Return repr(self)."""
@@ -268,46 +479,267 @@ class NestedMapping(abc.MutableMapping):
         if cycle:
             printer.text("NestedMapping(...)")
         else:
-            printer.text(str(self))
+            with StringIO() as str_stream:
+                self.write_string(str_stream, **self.repr_limits)
+                printer.text(str_stream.getvalue())
 
     def _repr_html_(self) -> str:
         """For notebooks."""
         with StringIO() as str_stream:
-            str_stream.write("<details>\n")
-            str_stream.write(
-                f"<summary><strong>{self.title}</strong></summary>\n")
-            # HACK: startswith("[") to avoid printing "!" on instances created
-            #       from a chain map query
-            self._write_subdict_html(
-                self.dic, str_stream, (not self._title.startswith("[")
-                                       if self._title else False))
-            str_stream.write("</details>\n")
+            self.write_html(str_stream, **self.repr_limits)
             output = str_stream.getvalue()
         return output
 
 
+class _OutputLimitReached(Exception):
+    """Raised internally to stop rendering once `max_chars` is reached."""
+
+
+class _LimitedStream:
+    """Wrapper for text stream that stops after `max_chars` characters."""
+
+    def __init__(self, stream: TextIO, max_chars: int | None,
+                 cut: bool = True):
+        self.stream = stream
+        self.remaining = max_chars
+        self.cut = cut
+
+    def write(self, text: str) -> int:
+        if self.remaining is None:
+            return self.stream.write(text)
+        if len(text) > self.remaining:
+            if self.cut:
+                self.stream.write(text[:self.remaining])
+            self.remaining = 0
+            raise _OutputLimitReached
+        self.remaining -= len(text)
+        return self.stream.write(text)
+
+
+class _LimitedHtmlStream(_LimitedStream):
+    """Limited stream for HTML, keeping track of all open elements."""
+
+    def __init__(self, stream: TextIO, max_chars: int | None):
+        super().__init__(stream, max_chars, cut=False)
+        self.open_tags: list[str] = []
+
+    def open(self, text: str, tag: str) -> None:
+        """Write `text` starting with opening `tag`."""
+        self.write(text)
+        self.open_tags.append(tag)
+
+    def close(self, tag: str) -> None:
+        """Write closing `tag` for the last opened element."""
+        self.write(f"</{tag}>\n")
+        self.open_tags.pop()
+
+    def close_all(self) -> None:
+        """Mark output as truncated and close all open elements."""
+        if self.open_tags and self.open_tags[-1] == "ul":
+            self.stream.write("<li><em>...</em></li>\n")
+        else:
+            self.stream.write("<em>...</em>\n")
+        for tag in reversed(self.open_tags):
+            self.stream.write(f"</{tag}>\n")
+        self.open_tags.clear()
+
+
+@dataclass(frozen=True, slots=True)
+class _RenderLimits:
+    max_depth: int | None = None
+    max_items_per_node: int | None = None
+
+    def descend(self, depth: int) -> bool:
+        """Return True if sub-mappings at `depth` should be rendered."""
+        return self.max_depth is None or depth < self.max_depth
+
+    def clip(self, mapping: abc.Mapping) -> tuple[abc.Collection, int]:
+        """Return (limited) items of `mapping` and number of omitted items."""
+        if self.max_items_per_node is None:
+            return mapping.items(), 0
+        items = list(islice(mapping.items(), self.max_items_per_node))
+        return items, len(mapping) - len(items)
+
+
+_NO_LIMITS = _RenderLimits()
+
+
 class RecursiveMapping:
-    """Mixin class just to factor out resolving string key functionality."""
+    """Mixin class just to factor out resolving string key functionality.
+
+    Bang-string references are resolved iteratively, following the chain of
+    referenced keys until a value is found that is not a bang-string itself,
+    or which cannot be resolved further (i.e. a missing key).
+
+    A reference cycle raises ``RecursionError`` immediately, with the chain of
+    keys that make up the cycle in the error message.
+
+    Resolved values are not cached by default, because the nested dicts of a
+    mapping are shared with ``.dic`` and with the dicts it was created from,
+    so changes to its contents cannot be tracked in general. Inside a ``with
+    mapping.caching():`` block, resolved values (except sub-mappings) are
+    cached for every key along the chain, see `caching`.
+    """
+
+    # Depth of nested caching() blocks
+    _caching: int = 0
+    # Attributes holding cached information, dropped after caching() blocks
+    _cache_attrs: ClassVar[tuple[str, ...]] = ("_resolve_cache",
+                                               "_resolve_token")
+
+    @contextmanager
+    def caching(self):
+        """Context manager to cache information derived from the contents.
+
+        Inside the block, resolved bang-string references are cached, which
+        makes repeated lookups O(1). Changes made via the methods of this
+        mapping (or of its individual maps, and of any sub-mappings returned
+        by ``__getitem__``) are still taken into account. However, changes
+        made directly to ``.dic`` or to any plain ``dict`` (e.g. one returned
+        for a simple key, or one the mapping was created from) are not, so
+        avoid them inside the block. All caches are dropped at the end of the
+        block.
+
+        To resolve all references once, e.g. before handing the contents to
+        parallel workers, use `resolve_all` instead.
+        """
+        self._caching += 1
+        try:
+            yield self
+        finally:
+            self._caching -= 1
+            if not self._caching:
+                for name in self._cache_attrs:
+                    self.__dict__.pop(name, None)
 
     def __getitem__(self, key: str):
         """x.__getitem__(y) <==> x[y]."""
-        value = super().__getitem__(key.removesuffix("!"))
+        if is_resolving_key(key):
+            key, value = self._resolve_target(key.removesuffix("!"))
+        else:
+            value = self._lookup(key)
+        if isinstance(value, abc.Mapping):
+            return self._submapping(key, value)
+        return value
+
+    def __contains__(self, key) -> bool:
+        """Return key in self."""
+        if not is_resolving_key(key):
+            return super().__contains__(key)
+        try:
+            self._resolve_target(key.removesuffix("!"))
+        except KeyError:
+            return False
+        return True
+
+    def _lookup(self, key: str):
+        """Get raw value for (non-resolving) key, i.e. dict for sub-maps."""
+        return self._get_entry(key)
+
+    def _collect(self, key: str, value: abc.Mapping) -> abc.Mapping:
+        """Return full sub-mapping at `key`, given its raw `value`."""
+        return value
 
-        if is_bangkey(value) and is_resolving_key(key):
+    def _submapping(self, key: str, value: abc.Mapping) -> abc.Mapping:
+        """Return sub-mapping at `key` as handed out by ``__getitem__``."""
+        return self._wrap_entry(key, value)
+
+    def _cache_token(self):
+        """Return hashable state of contents, or None to disable caching."""
+        if not self._caching:
+            return None
+        return self._content_version()
+
+    def _get_resolve_cache(self) -> dict[str, Any] | None:
+        token = self._cache_token()
+        if token is None:
+            return None
+        if getattr(self, "_resolve_token", None) != token:
+            self._resolve_cache: dict[str, Any] = {}
+            self._resolve_token = token
+        return self._resolve_cache
+
+    def _resolve_target(
+        self,
+        key: str,
+        cache: dict[str, tuple[str, Any]] | None = None,
+        lookup: abc.Callable[[str], Any] | None = None,
+    ) -> tuple[str, Any]:
+        """Return final key in chain of references and its resolved value.
+
+        If the value is a sub-mapping, the raw value is returned, which has
+        to be passed to ``_submapping`` before handing it out.
+        """
+        if cache is None:
+            cache = self._get_resolve_cache()
+        if cache is not None and key in cache:
+            return cache[key]
+        lookup = lookup or self._lookup
+
+        value = lookup(key)
+        chain = [key]
+        seen = {key}
+        target = None
+        while is_bangkey(value):
+            if cache is not None and value in cache:
+                target = cache[value]
+                break
+            if value in seen:
+                cycle = " -> ".join(chain[chain.index(value):] + [value])
+                raise RecursionError(
+                    f"Cyclic bang-string reference: {cycle}")
             try:
-                value = self[f"{value}!"]
+                new_value = lookup(value)
             except KeyError:
-                pass  # return value unresolved
-
-        return value
+                break  # return value unresolved
+            chain.append(value)
+            seen.add(value)
+            value = new_value
+
+        if target is None:
+            target = (chain[-1], value)
+        if cache is not None and not isinstance(target[1], abc.Mapping):
+            cache.update(dict.fromkeys(chain, target))
+        return target
+
+    def resolve_all(self) -> NestedMapping:
+        """Return plain `NestedMapping` with all references resolved.
+
+        Every bang-string value is replaced by the value it (ultimately)
+        refers to, including entire sub-mappings, whose contents are in turn
+        resolved as well. Each reference is only resolved once, with any
+        references it depends on resolved (and remembered) first. Values
+        referring to missing keys are kept unresolved, like in ``__getitem__``.
+
+        This is useful to pay the cost of resolving all references once,
+        before many repeated lookups, e.g. in parallel workers.
+        """
+        cache = self._get_resolve_cache()
+        if cache is None:
+            cache = {}
+
+        resolved = NestedMapping(title=getattr(self, "_title", None))
+        for key in self:
+            resolved[key] = self._materialize(key, cache)
+        return resolved
+
+    def _materialize(self, key: str, cache: dict[str, tuple[str, Any]]):
+        target, value = self._resolve_target(key, cache)
+        if not isinstance(value, abc.Mapping):
+            return value
+        return {
+            subkey: self._materialize(
+                NestedMapping._join_subkey(target, subkey), cache)
+            for subkey in _top_level_keys(self._collect(target, value))
+        }
 
 
 class RecursiveNestedMapping(RecursiveMapping, NestedMapping):
     """Like NestedMapping but internally resolves any bang-string values.
 
     In the event of an infinite loop of recursive bang-string keys pointing
-    back to each other, this should savely and quickly throw a
-    ``RecursionError``.
+    back to each other, this immediately throws a ``RecursionError`` listing
+    the keys involved.
     """
 
     @classmethod
@@ -335,23 +767,423 @@ class NestedChainMap(RecursiveMapping, ChainMap):
     can also be used as one of the individual mappings.
 
     In the event of an infinite loop of recursive bang-string keys pointing
-    back to each other, this should savely and quickly throw a
-    ``RecursionError``.
+    back to each other, this immediately throws a ``RecursionError`` listing
+    the keys involved.
+
+    Inside a ``with chain.caching():`` block, resolved bang-string references
+    are only cached if all individual mappings are instances of
+    `NestedMapping`, because changes to ordinary ``dict`` objects cannot be
+    tracked at all.
+
+    Lookups only walk down the individual mappings that actually hold the
+    top-level key (e.g. "foo" for "!foo.bar"), which is checked first for
+    all `NestedMapping` instances in ``.maps``. Inside a ``with
+    chain.caching():`` block, an index of the top-level keys of all maps is
+    used instead, which is rebuilt automatically when any of the maps is
+    changed via its methods (or when ``.maps`` itself is changed), so it
+    stays valid across ``.new_child()`` and ``.parents``. Ordinary ``dict``
+    mappings are always probed.
     """
 
-    def __getitem__(self, key):
-        """x.__getitem__(y) <==> x[y]."""
-        value = super().__getitem__(key)
+    _cache_attrs = RecursiveMapping._cache_attrs + (
+        "_key_index", "_unindexed", "_index_token",
+        "_map_lens", "_overlaps", "_len", "_len_token",
+        "_merge_cache", "_flat", "_flat_token",
+        "_provenance_cache", "_provenance_token")
+
+    def _cache_token(self):
+        """Return hashable state of all maps, or None to disable caching."""
+        if not self._caching:
+            return None
+        tokens = tuple(mapping._content_version()
+                       if isinstance(mapping, NestedMapping) else None
+                       for mapping in self.maps)
+        if None in tokens:
+            return None
+        return tokens
+
+    def _get_key_index(self) -> tuple[dict[Any, tuple[int, ...]],
+                                      tuple[int, ...]]:
+        """Return mapping of top-level keys to indices of maps holding them.
+
+        Also returns the indices of any maps that are not indexed, which are
+        already included in the tuples of the index. Only inside `caching`
+        blocks, the index is kept until any of the maps changes.
+        """
+        token = None
+        if self._caching:
+            token = tuple((id(mapping), getattr(mapping, "_version", None))
+                          for mapping in self.maps)
+            if getattr(self, "_index_token", None) == token:
+                return self._key_index, self._unindexed
+
+        unindexed = tuple(i for i, mapping in enumerate(self.maps)
+                          if not isinstance(mapping, NestedMapping))
+        layers: dict[Any, list[int]] = {}
+        for i, mapping in enumerate(self.maps):
+            if isinstance(mapping, NestedMapping):
+                for key in mapping._top_level_keys():
+                    layers.setdefault(key, []).append(i)
+        key_index = {key: tuple(sorted(indices + list(unindexed)))
+                     for key, indices in layers.items()}
+        if token is not None:
+            self._key_index = key_index
+            self._unindexed = unindexed
+            self._index_token = token
+        return key_index, unindexed
+
+    def _content_tokens(self) -> tuple[tuple[int, tuple | None], ...]:
+        """Return identity and state of the nested contents of all maps.
+
+        The state is None for any maps whose changes cannot be tracked, i.e.
+        ordinary ``dict`` maps, or all maps outside of `caching` blocks.
+        """
+        return tuple((id(mapping), mapping._content_version()
+                      if self._caching and isinstance(mapping, NestedMapping)
+                      else None)
+                     for mapping in self.maps)
+
+    def _candidate_maps(self, key) -> abc.Iterator[tuple[int, abc.Mapping]]:
+        """Yield index and mapping for all maps that might contain key.
+
+        These are all maps holding the top-level key of `key` (or its int
+        equivalent for bang-keys, like in ``NestedMapping.__getitem__``), in
+        the order of ``.maps``, plus any ordinary ``dict`` maps.
+        """
+        top_keys = [_top_level_key(key)]
+        if is_bangkey(key):
+            try:
+                top_keys.append(int(top_keys[0]))
+            except ValueError:
+                pass
+
+        if not self._caching:
+            for i, mapping in enumerate(self.maps):
+                if not isinstance(mapping, NestedMapping):
+                    yield i, mapping
+                    continue
+                for top_key in top_keys:
+                    if _has_top_level_key(mapping, top_key):
+                        yield i, mapping
+                        break
+            return
 
-        if not isinstance(value, abc.Mapping):
-            return value
+        index, unindexed = self._get_key_index()
+        indices = set(unindexed)
+        for top_key in top_keys:
+            try:
+                indices.update(index.get(top_key, ()))
+            except TypeError:  # unhashable key
+                pass
+        for i in sorted(indices):
+            yield i, self.maps[i]
+
+    def _lookup(self, key):
+        """Get raw value for (non-resolving) key from first map holding it."""
+        for _, mapping in self._candidate_maps(key):
+            try:
+                return _raw_getitem(mapping, key)
+            except KeyError:
+                pass
+        return self.__missing__(key)
+
+    def _collect(self, key, value: abc.Mapping) -> abc.Mapping:
+        """Return sub-mapping at `key` collected from all maps holding it.
 
-        submaps = tuple(RecursiveNestedMapping.from_maps(self.maps, key))
+        The sub-mappings share their nested dicts with the individual maps and
+        report any changes made through them back to those maps.
+        """
+        submaps = []
+        for i, mapping in self._candidate_maps(key):
+            try:
+                entry = _raw_getitem(mapping, key)
+            except KeyError:
+                continue
+            # Don't use .get here to avoid chaining empty mappings
+            submap = RecursiveNestedMapping(entry, title=f"[{i}] mapping")
+            if isinstance(mapping, NestedMapping):
+                submap._owner = mapping
+            submaps.append(submap)
         if len(submaps) == 1:
             # Don't need the chain if it's just one...
             return submaps[0]
         return NestedChainMap(*submaps)
 
+    _submapping = _collect
+
+    def __contains__(self, key) -> bool:
+        """Return key in self."""
+        return any(key in mapping for _, mapping in self._candidate_maps(key))
+
+    def resolve_many(self, keys: abc.Iterable) -> dict[Any, Any]:
+        """Return dict of the values of all `keys`, i.e. ``self[key]``.
+
+        Intended for retrieving many (resolved) values at once. Within one
+        call, walking down a common path prefix (e.g. "!foo.bar" for both
+        "!foo.bar.a" and "!foo.bar.b") is only done once per map, and each
+        shared intermediate reference is only resolved once.
+
+        Raises
+        ------
+        KeyError
+            If any of `keys` is not found.
+        """
+        cache = self._get_resolve_cache()
+        if cache is None:
+            cache = {}
+        lookup = self._make_batch_lookup()
+
+        result = {}
+        for key in keys:
+            if is_resolving_key(key):
+                value = self._resolve_target(
+                    key.removesuffix("!"), cache, lookup)[1]
+            else:
+                value = lookup(key)
+            if isinstance(value, abc.Mapping):
+                value = self[key]  # collect sub-mappings from all maps
+            result[key] = value
+        return result
+
+    def _make_batch_lookup(self) -> abc.Callable[[Any], Any]:
+        """Return lookup function remembering partial paths in each map."""
+        entries: dict[tuple[int, tuple], Any] = {}
+        missing = object()
+
+        def walk(i_map: int, chunks: tuple):
+            if (i_map, chunks) in entries:
+                return entries[i_map, chunks]
+            if not chunks:
+                return self.maps[i_map].dic
+            entry = walk(i_map, chunks[:-1])
+            if not isinstance(entry, abc.Mapping):
+                result = missing
+            elif chunks[-1] in entry:
+                result = entry[chunks[-1]]
+            else:
+                # Same fallback for int keys as in NestedMapping.__getitem__
+                try:
+                    result = entry[int(chunks[-1])]
+                except (KeyError, ValueError):
+                    result = missing
+            entries[i_map, chunks] = result
+            return result
+
+        def lookup(key):
+            for i_map, mapping in self._candidate_maps(key):
+                if (not is_bangkey(key)
+                        or not isinstance(mapping, NestedMapping)
+                        or not mapping._in_memory):
+                    # Single lookup, without walking down the entire path
+                    try:
+                        return _raw_getitem(mapping, key)
+                    except KeyError:
+                        continue
+                value = walk(i_map, tuple(NestedMapping._split_subkey(key)))
+                if value is missing:
+                    continue
+                return value
+            raise KeyError(key)
+
+        return lookup
+
+    def which_layer(self, key) -> int:
+        """Return index of the map in ``.maps`` that supplies `key`.
+
+        For a resolving key (ending with "!"), this is the map supplying the
+        value the key is ultimately resolved to. For sub-mappings collected
+        from several maps, this is the first of those maps.
+
+        Inside a ``caching()`` block, results are cached until any of the
+        maps changes. Only the maps that contain the top-level part of the
+        key are checked.
+
+        Raises
+        ------
+        KeyError
+            If `key` is not found in any map.
+        """
+        cache = self._get_provenance_cache()
+        if key in cache:
+            return cache[key]
+
+        lookup_key = key
+        if is_resolving_key(key):
+            lookup_key = self._resolve_target(key.removesuffix("!"))[0]
+        for i, mapping in self._candidate_maps(lookup_key):
+            if _raw_contains(mapping, lookup_key):
+                cache[key] = i
+                return i
+        raise KeyError(key)
+
+    def provenance(self, keys: abc.Iterable) -> dict[Any, int | None]:
+        """Return `which_layer` for each of `keys`, or None if not found."""
+        result = {}
+        for key in keys:
+            try:
+                result[key] = self.which_layer(key)
+            except KeyError:
+                result[key] = None
+        return result
+
+    def _get_provenance_cache(self) -> dict[Any, int]:
+        tokens = self._content_tokens()
+        if not _all_tracked(tokens):
+            return {}  # Not caching or can't track changes
+        if getattr(self, "_provenance_token", None) != tokens:
+            self._provenance_cache: dict[Any, int] = {}
+            self._provenance_token = tokens
+        return self._provenance_cache
+
+    def __iter__(self) -> abc.Iterator:
+        """Implement iter(self).
+
+        Keys are yielded lazily in the same order as for the base class. Only
+        keys below top-level keys found in more than one map are remembered
+        to skip duplicates, unless ordinary ``dict`` mappings are present.
+        """
+        index, unindexed = self._get_key_index()
+        seen = set()
+        for mapping in reversed(self.maps):
+            for top_key, keys in _iter_grouped_keys(mapping):
+                if not unindexed and len(index.get(top_key, ())) == 1:
+                    yield from keys
+                    continue
+                for key in keys:
+                    if key not in seen:
+                        seen.add(key)
+                        yield key
+
+    def __len__(self) -> int:
+        """Return len(self).
+
+        Computed from the lengths of the individual maps, minus the number of
+        keys found in more than one map. Inside a ``caching()`` block, both
+        are cached and only updated for maps that changed, including changes
+        made via sub-mappings returned by ``__getitem__``. Outside of such a
+        block (or for ordinary ``dict`` mappings), everything is counted
+        again on each call.
+        """
+        index, unindexed = self._get_key_index()
+        if unindexed:
+            return sum(1 for _ in self)
+        tokens = self._content_tokens()
+        if (_all_tracked(tokens)
+                and getattr(self, "_len_token", None) == tokens):
+            return self._len
+
+        old_lens = getattr(self, "_map_lens", {})
+        lens = [old_lens[token] if _all_tracked((token,)) and token in old_lens
+                else len(mapping)
+                for mapping, token in zip(self.maps, tokens)]
+        old_overlaps = getattr(self, "_overlaps", {})
+        overlaps = {}
+        for top_key, indices in index.items():
+            if len(indices) < 2:
+                continue
+            token = tuple(tokens[i] for i in indices)
+            if (_all_tracked(token) and top_key in old_overlaps
+                    and old_overlaps[top_key][0] == token):
+                overlaps[top_key] = old_overlaps[top_key]
+                continue
+            keys = [key for i in indices for key in _leaf_keys(
+                self.maps[i], top_key, _raw_getitem(self.maps[i], top_key))]
+            overlaps[top_key] = (token, len(keys) - len(set(keys)))
+
+        length = sum(lens) - sum(n_overlap for _, n_overlap
+                                 in overlaps.values())
+        if self._caching:
+            self._map_lens = dict(zip(tokens, lens))
+            self._overlaps = overlaps
+            self._len = length
+            self._len_token = tokens
+        return length
+
+    def flatten(self) -> NestedMapping:
+        """Return effective merged contents of all maps as `NestedMapping`.
+
+        Values are taken from the first map containing them, with any
+        sub-mappings collected from all maps, just like via ``__getitem__``.
+        Bang-string references are kept as they are (use ``.resolve_all()``
+        to resolve them).
+
+        Unlike ``__getitem__`` and iteration, this cannot represent a key
+        that holds a leaf value in one map and a sub-mapping in another.
+        In that case, the first map containing the key decides: if it holds
+        a leaf, the sub-mappings of later maps are left out (so e.g.
+        ``"!x.q"`` can be found in the chain but not in the result), if it
+        holds a sub-mapping, leaf values of later maps are left out. Such
+        keys are still counted by ``len()`` as for the base class.
+
+        Inside a ``caching()`` block, the result is cached and returned again
+        as long as none of the maps changes. If a map does change, only the
+        top-level sub-mappings that this map contributes to are merged again.
+        As the returned instance is then shared between calls, and its leaf
+        values (e.g. lists) are shared with the maps, it should not be
+        modified, use ``.copy()`` on it if needed. Outside of such a block,
+        everything is merged again on each call. Changes to ordinary ``dict``
+        mappings cannot be tracked, so their contributions are always merged
+        again.
+        """
+        index, unindexed = self._get_key_index()
+        tokens = self._content_tokens()
+        if (_all_tracked(tokens)
+                and getattr(self, "_flat_token", None) == tokens):
+            return self._flat
+
+        old_cache = getattr(self, "_merge_cache", {})
+        new_cache: dict[Any, tuple[tuple, Any]] = {}
+        merged = {}
+        for key in _top_level_keys(self):
+            holders = [i for i in index.get(key, unindexed)
+                       if _has_top_level_key(self.maps[i], key)]
+            token = tuple(tokens[i] for i in holders)
+            if not _all_tracked(token):
+                token = None  # contains untracked map
+            elif key in old_cache and old_cache[key][0] == token:
+                new_cache[key] = old_cache[key]
+                merged[key] = old_cache[key][1]
+                continue
+
+            values = [_raw_getitem(self.maps[i], key) for i in holders]
+            if isinstance(values[0], abc.Mapping):
+                value = {}
+                for subvalue in reversed(values):
+                    if isinstance(subvalue, abc.Mapping):
+                        _merge_copy(value, subvalue)
+            else:
+                value = values[0]
+
+            if token is not None:
+                new_cache[key] = (token, value)
+            merged[key] = value
+
+        flat = NestedMapping()
+        flat.dic = merged
+        if self._caching:
+            self._merge_cache = new_cache
+            self._flat = flat
+            self._flat_token = tokens
+        return flat
+
+    def copy(self):
+        """New NestedChainMap with a copy of maps[0] and refs to maps[1:].
+
+        In contrast to the base class, the first mapping is copied including
+        its nested structure, see ``NestedMapping.copy()``.
+        """
+        return self.__class__(_copy_structure(self.maps[0], {}),
+                              *self.maps[1:])
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        """Return copy.deepcopy(self), copying all maps."""
+        new = self.__class__(*(_copy_structure(mapping, memo)
+                               for mapping in self.maps))
+        memo[id(self)] = new
+        return new
+
     def __str__(self):
         """Return str(self)."""
         return "\n\n".join(str(mapping) for mapping in self.maps)
@@ -370,6 +1202,114 @@ class NestedChainMap(RecursiveMapping, ChainMap):
         return "\n\n".join(reprs)
 
 
+def _all_tracked(tokens: abc.Iterable[tuple[int, tuple | None]]) -> bool:
+    """Return True if changes to all maps in `tokens` can be tracked."""
+    return all(version is not None for _, version in tokens)
+
+
+def _top_level_key(key):
+    """Return top-level key (chunk) of `key`, e.g. "foo" for "!foo.bar!"."""
+    if isinstance(key, str):
+        key = key.removesuffix("!")
+        if is_bangkey(key):
+            return key.removeprefix("!").split(".", maxsplit=1)[0]
+    return key
+
+
+def _top_level_keys(mapping: abc.Mapping) -> abc.Iterable:
+    """Return keys of `mapping` without flattening nested sub-mappings."""
+    if isinstance(mapping, NestedMapping):
+        return mapping._top_level_keys()
+    if isinstance(mapping, ChainMap):
+        return dict.fromkeys(key for submap in reversed(mapping.maps)
+                             for key in _top_level_keys(submap))
+    return mapping.keys()
+
+
+def _leaf_keys(mapping: abc.Mapping, key, value) -> abc.Iterator:
+    """Yield keys of all leaves in `mapping` below top-level `key`."""
+    if isinstance(mapping, NestedMapping) and isinstance(value, abc.Mapping):
+        yield from (item[0] for item in mapping._staggered_items(key, value))
+    else:
+        yield key
+
+
+def _has_top_level_key(mapping: abc.Mapping, key) -> bool:
+    """Return True if `key` is a top-level key of `mapping`."""
+    try:
+        if isinstance(mapping, NestedMapping):
+            return mapping._has_top_level_key(key)
+        return key in mapping
+    except TypeError:  # unhashable key
+        return False
+
+
+def _iter_grouped_keys(
+    mapping: abc.Mapping,
+) -> abc.Iterator[tuple[Any, abc.Iterator]]:
+    """Yield top-level keys with all keys below them, in iteration order."""
+    if not isinstance(mapping, NestedMapping) or not mapping._in_memory:
+        for key in mapping:
+            yield _top_level_key(key), iter((key,))
+        return
+
+    # Same order as NestedMapping.__iter__, simple keys come last
+    simple = []
+    for key, value in mapping.dic.items():
+        if isinstance(value, abc.Mapping):
+            yield key, _leaf_keys(mapping, key, value)
+        else:
+            simple.append(key)
+    for key in simple:
+        yield key, iter((key,))
+
+
+def _raw_contains(mapping: abc.Mapping, key) -> bool:
+    """Return key in mapping, without creating any sub-mapping instances."""
+    if not is_bangkey(key):
+        return _has_top_level_key(mapping, key)
+    if not isinstance(mapping, NestedMapping) or not mapping._in_memory:
+        return key in mapping
+
+    entry = mapping.dic
+    for chunk in NestedMapping._split_subkey(key):
+        if not isinstance(entry, abc.Mapping):
+            return False
+        if chunk in entry:
+            entry = entry[chunk]
+            continue
+        # Same fallback for int keys as in NestedMapping.__getitem__
+        try:
+            entry = entry[int(chunk)]
+        except (KeyError, ValueError):
+            return False
+    return True
+
+
+def _raw_getitem(mapping: abc.Mapping, key):
+    """Return mapping[key], without creating any sub-mapping instances."""
+    if isinstance(mapping, NestedMapping):
+        return mapping._get_entry(key)
+    return mapping[key]
+
+
+def _merge_copy(old_dict: dict, new_dict: abc.Mapping) -> None:
+    """Like ``recursive_update``, but copy sub-dicts and don't warn."""
+    for key, value in new_dict.items():
+        if (isinstance(value, abc.Mapping)
+                and isinstance(old_dict.get(key), dict)):
+            _merge_copy(old_dict[key], value)
+        else:
+            old_dict[key] = _copy_dicts(value)
+
+
+def _copy_dicts(value):
+    """Copy nested mappings as dicts, but share all other values."""
+    if isinstance(value, abc.Mapping):
+        return {key: _copy_dicts(subval) for key, subval in value.items()}
+    return value
+
+
 def is_bangkey(key) -> bool:
     """Return ``True`` if the key is a ``str`` and starts with a "!"."""
     return isinstance(key, str) and key.startswith("!")
@@ -387,6 +1327,33 @@ def is_nested_mapping(mapping) -> bool:
     return any(isinstance(value, abc.Mapping) for value in mapping.values())
 
 
+# Leaf values that are never modified in place and can thus be shared by copies
+_SHARED_LEAF_TYPES = (str, int, float, complex, bytes, tuple, frozenset,
+                      type(None), SpectralType)
+
+
+def _copy_structure(value, memo: dict):
+    """Copy nested dicts and lists, but share immutable leaf values.
+
+    Like ``copy.deepcopy``, `memo` is used to copy any object referenced more
+    than once only once, which also preserves reference cycles.
+    """
+    if isinstance(value, _SHARED_LEAF_TYPES):
+        return value
+    if id(value) in memo:
+        return memo[id(value)]
+    if type(value) is dict:  # pylint: disable=unidiomatic-typecheck
+        new = memo[id(value)] = {}
+        for key, subval in value.items():
+            new[key] = _copy_structure(subval, memo)
+        return new
+    if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+        new = memo[id(value)] = []
+        new.extend(_copy_structure(subval, memo) for subval in value)
+        return new
+    return deepcopy(value, memo)
+
+
 def recursive_update(old_dict: abc.MutableMapping,
                      new_dict: abc.Mapping) -> abc.MutableMapping:
     if new_dict is not None:
@@ -0,0 +1,684 @@
+# -*- coding: utf-8 -*-
+"""Contains SpectralTypeArray class, requires ``astar-utils[numpy]``."""
+
+from collections.abc import Iterator
+
+import numpy as np
+
+from .spectral_types import (SpectralType, _LUM_CLS_BITS, _NO_LUM_CLS,
+                             _NO_SUBCLS, _SUBCLS_BITS)
+
+
+class SpectralTypeArray:
+    """Array of spectral types, stored column-wise in NumPy arrays.
+
+    Instead of one `SpectralType` instance per element, this stores the index
+    of the spectral class, the numerical subclass (NaN if not given) and the
+    index of the luminosity class (-1 if not given) in a structured NumPy
+    array with the fields in ``SpectralType.array_fields``, which takes 10
+    bytes per element. Strings are parsed with ``SpectralType.parse_array``,
+    i.e. each distinct string only once.
+
+    Comparisons (``<``, ``<=``, ``>``, ``>=``, ``==`` and ``!=``) work
+    element-wise, like for NumPy arrays, and follow the same rules as for
+    `SpectralType`: ordering only considers the spectral (sub)class, with a
+    missing subclass treated as 5, while equality also considers the
+    luminosity class if it's given on both sides. The other operand can be
+    another `SpectralTypeArray` (or anything it can be created from) of the
+    same length, or a single `SpectralType` or string, which may also be on
+    the left side of the comparison.
+
+    Indexing with a single integer returns a `SpectralType` instance, while
+    slicing or indexing with an integer or boolean array returns another
+    `SpectralTypeArray`. Masked input elements (e.g. missing entries in a
+    catalog column) are kept as masked, all derived values are then masked
+    arrays. Converting to a NumPy array (e.g. when adding an instance as an
+    Astropy Table column) returns the underlying structured array.
+
+    Parameters
+    ----------
+    spectypes : array_like
+        Spectral type strings (or `SpectralType` instances), or a structured
+        array as returned from ``SpectralType.parse_array``, which is used
+        without copying.
+    mask : array_like of bool, optional
+        Additional mask, True for elements to be masked.
+
+    Examples
+    --------
+    >>> spts = SpectralTypeArray(["G2V", "A0", "M4III", "A"])
+    >>> spts.numerical_spectral_class
+    array([42., 20., 64., 25.])
+    >>> spts < "F0"
+    array([False,  True, False,  True])
+    >>> spts[spts.argsort()]
+    SpectralTypeArray(['A0', 'A', 'G2V', 'M4III'])
+    """
+
+    def __init__(self, spectypes=(), mask=None):
+        if isinstance(spectypes, SpectralTypeArray):
+            data, data_mask = spectypes._data, spectypes._mask
+        else:
+            if not (isinstance(spectypes, np.ndarray)
+                    and spectypes.dtype.names is not None):
+                spectypes = SpectralType.parse_array(spectypes)
+            data = np.ma.getdata(spectypes)
+            data_mask = np.ma.getmask(spectypes)
+
+        if mask is not None:
+            data_mask = np.ma.mask_or(data_mask, np.asarray(mask, dtype=bool),
+                                      shrink=False)
+        if data_mask is not np.ma.nomask and data_mask.dtype.names:
+            # Structured masks from np.ma, one flag for each field
+            data_mask = np.logical_or.reduce(
+                [data_mask[name] for name in data_mask.dtype.names])
+
+        self._data = data
+        self._mask = data_mask
+
+    @classmethod
+    def from_numerical(cls, spectral_class, luminosity_class=None):
+        """Create from numerical spectral (and luminosity) classes.
+
+        This is the vectorised inverse of `numerical_spectral_class` and
+        `numerical_luminosity_class`. Spectral classes are rounded to the
+        nearest subclass with one decimal place. NaN or masked values result
+        in masked elements.
+
+        Parameters
+        ----------
+        spectral_class : array_like of float
+            Numerical spectral classes, e.g. 42.0 for G2.
+        luminosity_class : array_like of float, optional
+            Numerical luminosity classes (1-5), rounded to integers. If not
+            given (or NaN for an element), the luminosity class is empty.
+
+        Examples
+        --------
+        >>> SpectralTypeArray.from_numerical([42., 25.5], [5, 3])
+        SpectralTypeArray(['G2V', 'A5.5III'])
+        """
+        spectral_class = np.ma.filled(
+            np.ma.asarray(spectral_class, dtype=float), np.nan)
+        mask = np.isnan(spectral_class)
+        n_tenths = len(SpectralType.spectral_classes) * 100
+        tenths = np.clip(np.rint(np.where(mask, 0., spectral_class) * 10),
+                         0, n_tenths - 1).astype(int)
+
+        data = np.empty(spectral_class.shape,
+                        dtype=list(SpectralType.array_fields))
+        data["spectral_class"] = tenths // 100
+        data["spectral_subclass"] = tenths % 100 / 10
+        if luminosity_class is None:
+            data["luminosity_class"] = -1
+        else:
+            lum_cls = np.ma.filled(
+                np.ma.asarray(luminosity_class, dtype=float), np.nan)
+            lum_cls = np.clip(np.rint(lum_cls), 1,
+                              len(SpectralType.luminosity_classes))
+            data["luminosity_class"] = np.where(
+                np.isnan(lum_cls), -1, np.nan_to_num(lum_cls) - 1)
+        return cls(data, mask=mask if mask.any() else None)
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Create from packed integer codes, see ``SpectralType.from_code``.
+
+        Masked input codes result in masked elements.
+        """
+        mask = np.ma.getmask(codes)
+        codes = np.ma.getdata(codes).astype(np.int64)
+        lum_cls = codes & _NO_LUM_CLS
+        sub_cls = codes >> _LUM_CLS_BITS & _NO_SUBCLS
+        spec_cls = codes >> _LUM_CLS_BITS + _SUBCLS_BITS
+        invalid = ((codes < 0)
+                   | (spec_cls >= len(SpectralType.spectral_classes))
+                   | ((sub_cls >= 100) & (sub_cls != _NO_SUBCLS))
+                   | ((lum_cls >= len(SpectralType.luminosity_classes))
+                      & (lum_cls != _NO_LUM_CLS)))
+        if mask is not np.ma.nomask:
+            invalid &= ~mask
+        if invalid.any():
+            raise ValueError(
+                f"{codes[invalid][0]!r} is not a valid spectral type code.")
+
+        data = np.empty(codes.shape, dtype=list(SpectralType.array_fields))
+        data["spectral_class"] = spec_cls
+        data["spectral_subclass"] = np.where(sub_cls == _NO_SUBCLS, np.nan,
+                                             sub_cls / 10)
+        data["luminosity_class"] = np.where(lum_cls == _NO_LUM_CLS, -1,
+                                            lum_cls)
+        return cls(data, mask=None if mask is np.ma.nomask else mask)
+
+    def _masked(self, values: np.ndarray) -> np.ndarray:
+        if self._mask is np.ma.nomask:
+            return values
+        return np.ma.array(values, mask=self._mask)
+
+    @property
+    def mask(self):
+        """Boolean mask of missing elements, or ``numpy.ma.nomask``."""
+        return self._mask
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Shape of the array."""
+        return self._data.shape
+
+    @property
+    def nbytes(self) -> int:
+        """Total bytes consumed by the elements (without mask)."""
+        return self._data.nbytes
+
+    @property
+    def spectral_class_index(self) -> np.ndarray:
+        """Index of spectral class in ``SpectralType.spectral_classes``."""
+        return self._masked(self._data["spectral_class"])
+
+    @property
+    def spectral_subclass(self) -> np.ndarray:
+        """Numerical spectral subclass (0.0-9.9), NaN if not given."""
+        return self._masked(self._data["spectral_subclass"])
+
+    @property
+    def luminosity_class_index(self) -> np.ndarray:
+        """Index in ``SpectralType.luminosity_classes``, -1 if not given."""
+        return self._masked(self._data["luminosity_class"])
+
+    @property
+    def _sort_key(self) -> np.ndarray:
+        # Same order as SpectralType._comp_tuple, because subclasses < 10
+        subclass = self._data["spectral_subclass"]
+        subclass = np.where(np.isnan(subclass), 5., subclass)
+        return self._data["spectral_class"] * 10. + subclass
+
+    @property
+    def numerical_spectral_class(self) -> np.ndarray:
+        """Spectral class and subclass as float for better interpolations.
+
+        See ``SpectralType.numerical_spectral_class`` for details.
+        """
+        return self._masked(self._sort_key)
+
+    @property
+    def numerical_luminosity_class(self) -> np.ndarray:
+        """Roman luminosity class converted to arabic number.
+
+        If no initial luminosity class was given, assume main sequence (V).
+        """
+        lum_cls = self._data["luminosity_class"]
+        return self._masked(np.where(lum_cls < 0, 5, lum_cls + 1))
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Packed integer codes (uint16), see ``SpectralType.code``."""
+        subclass = self._data["spectral_subclass"]
+        sub_cls = np.where(np.isnan(subclass), _NO_SUBCLS,
+                           np.rint(np.nan_to_num(subclass) * 10))
+        lum_cls = self._data["luminosity_class"]
+        codes = (self._data["spectral_class"].astype(np.uint16)
+                 << _SUBCLS_BITS | sub_cls.astype(np.uint16))
+        codes = codes << _LUM_CLS_BITS | np.where(
+            lum_cls < 0, _NO_LUM_CLS, lum_cls).astype(np.uint16)
+        return self._masked(codes.astype(np.uint16))
+
+    def argsort(self, kind: str = "stable") -> np.ndarray:
+        """Return indices that sort the array, masked elements go last."""
+        keys = self._sort_key
+        if self._mask is not np.ma.nomask:
+            keys = np.where(self._mask, np.inf, keys)
+        return np.argsort(keys, kind=kind)
+
+    def _other_arrays(self, other) -> tuple:
+        """Return sort key, luminosity class and mask of other operand."""
+        if isinstance(other, (str, SpectralType)):
+            other = SpectralType.interned(other)
+            lum_cls = (-1 if other.luminosity_class is None
+                       else other._lum_cls_idx)
+            return other.numerical_spectral_class, lum_cls, np.ma.nomask
+        if not isinstance(other, SpectralTypeArray):
+            try:
+                other = SpectralTypeArray(other)
+            except ValueError as err:
+                raise TypeError(
+                    "Can only compare spectral types or valid str.") from err
+        return (other._sort_key, other._data["luminosity_class"],
+                other._mask)
+
+    def _compare(self, result: np.ndarray, other_mask) -> np.ndarray:
+        mask = np.ma.mask_or(self._mask, other_mask)
+        if mask is np.ma.nomask:
+            return result
+        return np.ma.array(result, mask=mask)
+
+    def __eq__(self, other) -> np.ndarray:
+        """Return self == other."""
+        key, lum_cls, mask = self._other_arrays(other)
+        own_lum_cls = self._data["luminosity_class"]
+        # If luminosity class isn't given for one, don't compare it.
+        result = (self._sort_key == key) & (
+            (own_lum_cls < 0) | (lum_cls < 0) | (own_lum_cls == lum_cls))
+        return self._compare(result, mask)
+
+    def __ne__(self, other) -> np.ndarray:
+        """Return self != other."""
+        return ~(self == other)
+
+    def __lt__(self, other) -> np.ndarray:
+        """Return self < other."""
+        key, _, mask = self._other_arrays(other)
+        return self._compare(self._sort_key < key, mask)
+
+    def __le__(self, other) -> np.ndarray:
+        """Return self <= other."""
+        key, _, mask = self._other_arrays(other)
+        return self._compare(self._sort_key <= key, mask)
+
+    def __gt__(self, other) -> np.ndarray:
+        """Return self > other."""
+        key, _, mask = self._other_arrays(other)
+        return self._compare(self._sort_key > key, mask)
+
+    def __ge__(self, other) -> np.ndarray:
+        """Return self >= other."""
+        key, _, mask = self._other_arrays(other)
+        return self._compare(self._sort_key >= key, mask)
+
+    __hash__ = None  # mutable array, like NumPy
+
+    @staticmethod
+    def _element_str(spec_cls: int, subclass: float, lum_cls: int) -> str:
+        spectype = SpectralType.spectral_classes[spec_cls]
+        if subclass == subclass:  # not NaN
+            spectype += (str(int(subclass)) if subclass.is_integer()
+                         else str(subclass))
+        if lum_cls >= 0:
+            spectype += SpectralType.luminosity_classes[lum_cls]
+        return spectype
+
+    def __getitem__(self, index):
+        """x.__getitem__(y) <==> x[y]."""
+        data = self._data[index]
+        if not isinstance(data, np.void):
+            mask = (None if self._mask is np.ma.nomask
+                    else self._mask[index])
+            return self.__class__(data, mask=mask)
+        if self._mask is not np.ma.nomask and self._mask[index]:
+            return np.ma.masked
+        return SpectralType.interned(self._element_str(*data.tolist()))
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[SpectralType]:
+        """Implement iter(self)."""
+        for index in range(len(self)):
+            yield self[index]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Return the underlying structured array, for use by NumPy."""
+        if copy:
+            return np.array(self._data, dtype=dtype)
+        return np.asarray(self._data, dtype=dtype)
+
+    def tolist(self) -> list[str | None]:
+        """Return list of strings, None for masked elements."""
+        rows = self._data.tolist()
+        if self._mask is np.ma.nomask:
+            return [self._element_str(*row) for row in rows]
+        return [None if masked else self._element_str(*row)
+                for row, masked in zip(rows, self._mask.tolist())]
+
+    def to_strings(self) -> np.ndarray:
+        """Return NumPy array of strings, empty for masked elements.
+
+        Unlike `.tolist()`, this works column-wise without Python loops.
+        """
+        spec_cls = np.array(list(SpectralType.spectral_classes))
+        subclass = np.array([""] + [
+            str(tenths // 10) if not tenths % 10 else str(tenths / 10)
+            for tenths in range(100)])
+        lum_cls = np.array([*SpectralType.luminosity_classes, ""])
+
+        tenths = self._data["spectral_subclass"] * 10
+        tenths = np.where(np.isnan(tenths), -1, np.rint(tenths)).astype(int)
+        strings = np.char.add(
+            np.char.add(spec_cls[self._data["spectral_class"]],
+                        subclass[tenths + 1]),
+            lum_cls[self._data["luminosity_class"]])
+        if self._mask is not np.ma.nomask:
+            strings[self._mask] = ""
+        return strings
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        return f"{self.__class__.__name__}({self.tolist()!r})"
+
+
+class SpectralTypeIndex:
+    """Sorted index over spectral types for fast range and nearest queries.
+
+    The elements are sorted once by `numerical_spectral_class` (the same
+    order as for comparisons of `SpectralType`), separately for each
+    luminosity class as well as for all elements together. Queries then use
+    ``numpy.searchsorted`` and run in O(log n + k) for k results, instead of
+    comparing each element. All queries return positions in the original
+    sequence, which can be used to select e.g. rows of a catalog. Masked
+    elements are not included in the index.
+
+    Query boundaries can be given as `SpectralType` instances, valid strings
+    or numerical spectral classes. Queries can optionally be restricted to
+    one or more luminosity classes, which only selects elements with exactly
+    those luminosity classes given explicitly.
+
+    Parameters
+    ----------
+    spectypes : SpectralTypeArray or array_like
+        Spectral types to index, anything `SpectralTypeArray` accepts.
+
+    Examples
+    --------
+    >>> index = SpectralTypeIndex(["G2V", "K7III", "F5V", "K4V", "M2V"])
+    >>> index.range("F0", "K5", luminosity_class="V")
+    array([2, 0, 3])
+    >>> index.nearest("K8")
+    1
+    >>> index.histogram().tolist()
+    [0, 0, 0, 1, 1, 2, 1, 0, 0, 0]
+    """
+
+    def __init__(self, spectypes):
+        if not isinstance(spectypes, SpectralTypeArray):
+            spectypes = SpectralTypeArray(spectypes)
+
+        keys = spectypes._sort_key
+        lum_cls = spectypes._data["luminosity_class"]
+        if spectypes.mask is np.ma.nomask:
+            valid = np.arange(len(keys))
+        else:
+            valid = np.flatnonzero(~spectypes.mask)
+
+        positions = valid[np.argsort(keys[valid], kind="stable")]
+        self._all = (keys[positions], positions)
+
+        # Sorted by luminosity class first, then by key within each class
+        positions = valid[np.lexsort((keys[valid], lum_cls[valid]))]
+        sorted_keys = keys[positions]
+        bounds = np.searchsorted(
+            lum_cls[positions],
+            np.arange(-1, len(SpectralType.luminosity_classes) + 1))
+        self._by_lum_cls = {
+            lum_cls_idx: (sorted_keys[start:stop], positions[start:stop])
+            for lum_cls_idx, start, stop in zip(range(-1, len(bounds)),
+                                                bounds[:-1], bounds[1:])}
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._all[0])
+
+    @staticmethod
+    def _as_key(spectype) -> float:
+        if isinstance(spectype, (int, float, np.number)):
+            return float(spectype)
+        return SpectralType.interned(spectype).sort_key
+
+    def _groups(self, luminosity_class) -> list[tuple[np.ndarray, np.ndarray]]:
+        if luminosity_class is None:
+            return [self._all]
+        if isinstance(luminosity_class, str):
+            luminosity_class = [luminosity_class]
+        try:
+            return [self._by_lum_cls[SpectralType.luminosity_classes.index(
+                lum_cls.upper())] for lum_cls in luminosity_class]
+        except ValueError as err:
+            raise ValueError(
+                f"Invalid luminosity class in {luminosity_class!r}.") from err
+
+    def range(
+        self,
+        minimum=None,
+        maximum=None,
+        luminosity_class=None,
+        inclusive: tuple[bool, bool] = (True, True),
+    ) -> np.ndarray:
+        """Return positions of all elements between minimum and maximum.
+
+        Either boundary may be None to leave the range open on that side.
+        The positions are ordered by spectral type, then by position.
+        """
+        selected = []
+        for keys, positions in self._groups(luminosity_class):
+            start, stop = 0, len(keys)
+            if minimum is not None:
+                start = np.searchsorted(keys, self._as_key(minimum),
+                                        "left" if inclusive[0] else "right")
+            if maximum is not None:
+                stop = np.searchsorted(keys, self._as_key(maximum),
+                                       "right" if inclusive[1] else "left")
+            selected.append((keys[start:stop], positions[start:stop]))
+
+        if len(selected) == 1:
+            return selected[0][1].copy()
+        keys = np.concatenate([keys for keys, _ in selected])
+        positions = np.concatenate([positions for _, positions in selected])
+        return positions[np.lexsort((positions, keys))]
+
+    def count(self, minimum=None, maximum=None, luminosity_class=None) -> int:
+        """Return number of elements between minimum and maximum (inclusive).
+
+        Same as ``len(index.range(...))``, but in O(log n).
+        """
+        total = 0
+        for keys, _ in self._groups(luminosity_class):
+            start, stop = 0, len(keys)
+            if minimum is not None:
+                start = np.searchsorted(keys, self._as_key(minimum), "left")
+            if maximum is not None:
+                stop = np.searchsorted(keys, self._as_key(maximum), "right")
+            total += max(stop - start, 0)
+        return int(total)
+
+    def nearest(self, spectype, luminosity_class=None) -> int:
+        """Return position of the element closest to the given spectral type.
+
+        Luminosity classes are not considered for the distance. If several
+        elements are equally close, the earlier spectral type (and then the
+        earlier position) is returned.
+
+        Raises ValueError if there are no (matching) elements.
+        """
+        key = self._as_key(spectype)
+        best = None
+        for keys, positions in self._groups(luminosity_class):
+            i_key = np.searchsorted(keys, key)
+            for i_cand in (i_key - 1, i_key):
+                if not 0 <= i_cand < len(keys):
+                    continue
+                # First of several equal keys has the earliest position
+                i_cand = np.searchsorted(keys, keys[i_cand], "left")
+                candidate = (abs(keys[i_cand] - key), keys[i_cand],
+                             positions[i_cand])
+                if best is None or candidate < best:
+                    best = candidate
+        if best is None:
+            raise ValueError("No spectral types to search.")
+        return int(best[2])
+
+    def histogram(self, bins=None, luminosity_class=None) -> np.ndarray:
+        """Return number of elements per bin of spectral types.
+
+        Bins are half-open intervals between consecutive edges, except for
+        the last one, which also includes its upper edge, as for
+        ``numpy.histogram``. By default, each main spectral class (OBAFGKM...)
+        is one bin.
+
+        Parameters
+        ----------
+        bins : sequence, optional
+            Bin edges as spectral types or numerical spectral classes.
+        luminosity_class : str or sequence of str, optional
+            Only count elements with these luminosity classes.
+        """
+        if bins is None:
+            bins = range(0, len(SpectralType.spectral_classes) * 10 + 1, 10)
+        edges = np.array([self._as_key(edge) for edge in bins])
+        counts = np.zeros(max(len(edges) - 1, 0), dtype=int)
+        for keys, _ in self._groups(luminosity_class):
+            bounds = np.searchsorted(keys, edges, "left")
+            bounds[-1] = np.searchsorted(keys, edges[-1], "right")
+            counts += np.diff(bounds)
+        return counts
+
+
+class SpectralTypeTable:
+    """Lookup table from spectral types to (physical) quantities.
+
+    Each row of the table maps a reference spectral type to any number of
+    quantities, e.g. effective temperature, colours or template names. The
+    reference rows are sorted by numerical spectral class once, separately
+    for each luminosity class, upon creation. Evaluating the table for an
+    array of spectral types is then fully vectorised: numerical quantities
+    are linearly interpolated with ``numpy.interp`` (values outside the range
+    of the reference types are clipped to the closest one), while other
+    quantities (e.g. strings) use the nearest reference type.
+
+    Rows and queries without a luminosity class are assumed to be main
+    sequence (V), consistent with `numerical_luminosity_class`. If the table
+    contains no rows for the luminosity class of a queried type, the rows of
+    the nearest available luminosity class are used, preferring the higher
+    (i.e. closer to main sequence) one in case of a tie.
+
+    Parameters
+    ----------
+    spectypes : SpectralTypeArray or array_like
+        Reference spectral types, one per row.
+    **quantities : array_like
+        Columns of the table, each with one value per reference type.
+
+    Examples
+    --------
+    >>> table = SpectralTypeTable(["B0V", "A0V", "G2V", "M0V", "K0III"],
+    ...                           teff=[30000, 9700, 5800, 3800, 4800],
+    ...                           template=["b0v", "a0v", "g2v", "m0v",
+    ...                                     "k0iii"])
+    >>> table("teff", ["F1V", "G2", "K0III"])
+    array([7750., 5800., 4800.])
+    >>> table("template", ["A5V", "G8V"]).tolist()
+    ['a0v', 'g2v']
+    >>> table.invert("teff", [5800, 7750])
+    SpectralTypeArray(['G2V', 'F1V'])
+    """
+
+    def __init__(self, spectypes, **quantities):
+        if not isinstance(spectypes, SpectralTypeArray):
+            spectypes = SpectralTypeArray(spectypes)
+        if spectypes.mask is not np.ma.nomask and spectypes.mask.any():
+            raise ValueError("Reference spectral types must not be masked.")
+
+        self.quantities = {name: np.asarray(values)
+                           for name, values in quantities.items()}
+        for name, values in self.quantities.items():
+            if values.shape != spectypes.shape:
+                raise ValueError(
+                    f"Quantity {name!r} must have one value per spectral "
+                    f"type, got shape {values.shape} for {spectypes.shape}.")
+
+        keys = spectypes._sort_key
+        lum_cls = spectypes.numerical_luminosity_class
+        self._tables = {}
+        for lum in np.unique(lum_cls):
+            rows = np.flatnonzero(lum_cls == lum)
+            rows = rows[np.argsort(keys[rows], kind="stable")]
+            self._tables[int(lum)] = (keys[rows], rows)
+        self._lum_classes = np.array(sorted(self._tables))
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return sum(len(rows) for _, rows in self._tables.values())
+
+    def _nearest_table(self, lum_cls: np.ndarray) -> np.ndarray:
+        """Return nearest available luminosity class for each element."""
+        if len(self._lum_classes) == 1:
+            return np.full(lum_cls.shape, self._lum_classes[0])
+        i_lum = np.searchsorted(self._lum_classes, lum_cls).clip(
+            1, len(self._lum_classes) - 1)
+        lower = self._lum_classes[i_lum - 1]
+        upper = self._lum_classes[i_lum]
+        return np.where(lum_cls - lower < upper - lum_cls, lower, upper)
+
+    def __call__(self, quantity: str, spectypes) -> np.ndarray:
+        """Return values of `quantity` for the given spectral types.
+
+        Parameters
+        ----------
+        quantity : str
+            Name of the table column.
+        spectypes : SpectralTypeArray, SpectralType, str or array_like
+            Spectral types to look up.
+        """
+        values = self.quantities[quantity]
+        if not isinstance(spectypes, SpectralTypeArray):
+            spectypes = SpectralTypeArray(np.atleast_1d(spectypes))
+        keys = spectypes._sort_key
+        tables = self._nearest_table(
+            np.ma.getdata(spectypes.numerical_luminosity_class))
+
+        numeric = values.dtype.kind in "biuf"
+        result = np.empty(keys.shape,
+                          dtype=np.result_type(values.dtype, float)
+                          if numeric else values.dtype)
+        for lum_cls in np.unique(tables):
+            selected = tables == lum_cls
+            ref_keys, rows = self._tables[int(lum_cls)]
+            if numeric:
+                result[selected] = np.interp(keys[selected], ref_keys,
+                                             values[rows])
+            else:
+                result[selected] = values[rows][
+                    self._nearest_rows(ref_keys, keys[selected])]
+        return spectypes._masked(result)
+
+    @staticmethod
+    def _nearest_rows(ref_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        i_upper = np.searchsorted(ref_keys, keys).clip(1, len(ref_keys) - 1)
+        if len(ref_keys) == 1:
+            return np.zeros(keys.shape, dtype=int)
+        i_lower = i_upper - 1
+        closer_lower = (keys - ref_keys[i_lower]) <= (ref_keys[i_upper] - keys)
+        return np.where(closer_lower, i_lower, i_upper)
+
+    def invert(self, quantity: str, values,
+               luminosity_class: str = "V") -> SpectralTypeArray:
+        """Return spectral types for the given values of a quantity.
+
+        This linearly interpolates the numerical spectral class over the
+        values of `quantity` for the rows of the given luminosity class,
+        which therefore must be monotonic (e.g. effective temperature).
+        The resulting types are rounded to one decimal place subclasses.
+
+        Parameters
+        ----------
+        quantity : str
+            Name of a numerical table column.
+        values : array_like
+            Values to convert.
+        luminosity_class : str, optional
+            Luminosity class of the rows to use and of the resulting types.
+            The default is "V".
+        """
+        lum_cls = SpectralType.luminosity_classes.index(
+            luminosity_class.upper()) + 1
+        ref_keys, rows = self._tables[int(self._nearest_table(
+            np.array([lum_cls]))[0])]
+        ref_values = self.quantities[quantity][rows].astype(float)
+        order = np.argsort(ref_values, kind="stable")
+        if not (np.all(np.diff(ref_keys[order]) >= 0)
+                or np.all(np.diff(ref_keys[order]) <= 0)):
+            raise ValueError(f"Quantity {quantity!r} is not monotonic in "
+                             f"spectral type for luminosity class "
+                             f"{luminosity_class!r}.")
+        values = np.asarray(values, dtype=float)
+        numerical = np.interp(values, ref_values[order], ref_keys[order])
+        return SpectralTypeArray.from_numerical(
+            numerical, np.full(numerical.shape, lum_cls))
@@ -3,9 +3,67 @@
 
 import re
 from typing import ClassVar
+from functools import lru_cache
+from itertools import product
 from dataclasses import dataclass, field, InitVar
 
 
+_SPECTRAL_CLASSES = "OBAFGKMLTY"  # descending Teff
+_LUMINOSITY_CLASSES = ("I", "II", "III", "IV", "V")
+
+# Lookup tables for _tokenize, equivalent to SpectralType._regex
+_SPEC_CLS_TOKENS = {
+    char: (spec_cls, index)
+    for index, spec_cls in enumerate(_SPECTRAL_CLASSES)
+    for char in (spec_cls, spec_cls.lower())}
+_SUBCLS_TOKENS = {
+    subcls: float(subcls)
+    for digit in "0123456789"
+    for subcls in (digit, *(f"{digit}.{tenth}" for tenth in "0123456789"))}
+_LUM_CLS_TOKENS = {"": None} | {
+    "".join(chars): lum_cls
+    for lum_cls in _LUMINOSITY_CLASSES
+    for chars in product(*((char, char.lower()) for char in lum_cls))}
+_LUM_CLS_INDEX = {lum_cls: index
+                  for index, lum_cls in enumerate(_LUMINOSITY_CLASSES)}
+
+# Bit layout of SpectralType.code: 4 bits class, 7 bits subclass in tenths,
+# 3 bits luminosity class, with all bits set for a missing (sub)class
+_SUBCLS_BITS = 7
+_LUM_CLS_BITS = 3
+_NO_SUBCLS = (1 << _SUBCLS_BITS) - 1
+_NO_LUM_CLS = (1 << _LUM_CLS_BITS) - 1
+
+
+def _tokenize(spectype: str, lenient: bool = False):
+    """Split spectral type string into its components in a single pass.
+
+    Returns a tuple of spectral class, its index, subclass (or None),
+    luminosity class (or None) and the number of characters used, or None if
+    `spectype` is invalid. In `lenient` mode, any characters after the longest
+    valid beginning of `spectype` are ignored.
+    """
+    if (spec_cls := _SPEC_CLS_TOKENS.get(spectype[:1])) is None:
+        return None
+
+    subcls, end = None, 1
+    if spectype[2:3] == ".":
+        subcls, end = _SUBCLS_TOKENS.get(spectype[1:4]), 4
+    if subcls is None:
+        subcls = _SUBCLS_TOKENS.get(spectype[1:2])
+        end = 1 if subcls is None else 2
+
+    if not lenient:
+        if (rest := spectype[end:]) not in _LUM_CLS_TOKENS:
+            return None
+        return (*spec_cls, subcls, _LUM_CLS_TOKENS[rest], len(spectype))
+
+    for length in (3, 2, 1, 0):
+        if (rest := spectype[end:end + length]) in _LUM_CLS_TOKENS:
+            return (*spec_cls, subcls, _LUM_CLS_TOKENS[rest], end + len(rest))
+    return None  # unreachable, "" is always valid
+
+
 @dataclass(frozen=True, slots=True)
 class SpectralType:
     r"""Parse and store stellar spectral types.
@@ -56,6 +114,14 @@ class SpectralType:
         Numerical spectral subclass (0.0-9.9).
     luminosity_class : str or None
         Roman numeral luminosity class (I-V).
+    sort_key : float
+        Same as `numerical_spectral_class`, computed once upon creation and
+        used for fast sorting and comparison (e.g. as ``sorted(..., key=...)``
+        with ``operator.attrgetter("sort_key")``). Also used as the hash of
+        an instance, as the luminosity class is not always compared.
+    code : int
+        Canonical encoding of all three attributes in one (16 bit unsigned)
+        integer, see `.from_code()`.
 
     Class Attributes
     ----------------
@@ -99,35 +165,214 @@ class SpectralType:
     Note that a missing spectral subtype is considered as 5 (middle of the
     main spectral class) in the context of sorting, as shown in the example
     with the spectral type "A" ending up between "A0" and "A9".
+
+    When creating many instances from strings with lots of repetitions (e.g.
+    a catalog column), use `SpectralType.interned(spectype)` instead of the
+    constructor. It returns the same (frozen) instance for all equivalent
+    strings, from a bounded cache keyed on the uppercase string, so each
+    distinct string is only parsed once. Use `.interned_cache_info()` to check
+    the cache hit rate. The same cache is used for string operands in
+    comparisons. For catalog strings with additional flags or whitespace
+    (e.g. "B2 IVe"), use `SpectralType.lenient(spectype)`, which ignores
+    those and returns None instead of raising for invalid strings.
+
+    >>> SpectralType.interned("a0v") is SpectralType.interned("A0V")
+    True
     """
 
     spectral_class: str = field(init=False, default="")
     spectral_subclass: float | None = field(init=False, default=None)
     luminosity_class: str | None = field(init=False, default=None)
+    sort_key: float = field(init=False, default=0., repr=False, compare=False)
+    code: int = field(init=False, default=0, repr=False, compare=False)
     spectype: InitVar[str]
-    spectral_classes: ClassVar = "OBAFGKMLTY"  # descending Teff
-    luminosity_classes: ClassVar = ("I", "II", "III", "IV", "V")
+    spectral_classes: ClassVar = _SPECTRAL_CLASSES
+    luminosity_classes: ClassVar = _LUMINOSITY_CLASSES
     _regex: ClassVar = re.compile(
         r"^(?P<spec_cls>[OBAFGKMLTY])(?P<sub_cls>\d(\.\d)?)?"
         "(?P<lum_cls>I{1,3}|IV|V)?$", re.ASCII | re.IGNORECASE)
+    array_fields: ClassVar = (("spectral_class", "i1"),
+                              ("spectral_subclass", "f8"),
+                              ("luminosity_class", "i1"))
 
     def __post_init__(self, spectype) -> None:
         """Validate input and populate fields."""
-        if not (match := self._regex.fullmatch(str(spectype))):
+        if (tokens := _tokenize(str(spectype))) is None:
             raise ValueError(f"{spectype!r} is not a valid spectral type.")
 
-        classes = match.groupdict()
+        spec_cls, spec_cls_idx, sub_cls, lum_cls, _ = tokens
         # Circumvent frozen as per the docs...
-        object.__setattr__(self, "spectral_class",
-                           str(classes["spec_cls"]).upper())
+        object.__setattr__(self, "spectral_class", spec_cls)
+
+        if sub_cls is not None:
+            object.__setattr__(self, "spectral_subclass", sub_cls)
 
-        if classes["sub_cls"] is not None:
-            object.__setattr__(self, "spectral_subclass",
-                               float(classes["sub_cls"]))
+        if lum_cls is not None:
+            object.__setattr__(self, "luminosity_class", lum_cls)
+
+        object.__setattr__(self, "sort_key", spec_cls_idx * 10. + (
+            5. if sub_cls is None else sub_cls))
+
+        code = spec_cls_idx << _SUBCLS_BITS
+        code |= _NO_SUBCLS if sub_cls is None else round(sub_cls * 10)
+        code <<= _LUM_CLS_BITS
+        code |= _NO_LUM_CLS if lum_cls is None else _LUM_CLS_INDEX[lum_cls]
+        object.__setattr__(self, "code", code)
+
+    def __hash__(self) -> int:
+        """Return hash(self)."""
+        return hash(self.sort_key)
+
+    @classmethod
+    def from_code(cls, code: int):
+        """Return (interned) instance from its packed integer `.code`.
+
+        The code contains the index of the spectral class, the subclass in
+        tenths and the index of the luminosity class, as
+        ``spec_cls << 10 | subcls << 3 | lum_cls``, where a missing subclass
+        is stored as 127 and a missing luminosity class as 7. All codes fit
+        into a 16 bit unsigned integer, e.g. for catalog columns.
+
+        Examples
+        --------
+        >>> SpectralType("G2.5V").code
+        4300
+        >>> SpectralType.from_code(4300)
+        SpectralType('G2.5V')
+        """
+        code = int(code)
+        lum_cls = code & _NO_LUM_CLS
+        sub_cls = code >> _LUM_CLS_BITS & _NO_SUBCLS
+        spec_cls = code >> _LUM_CLS_BITS + _SUBCLS_BITS
+        if (code < 0 or spec_cls >= len(cls.spectral_classes)
+                or (sub_cls >= 100 and sub_cls != _NO_SUBCLS)
+                or (lum_cls >= len(cls.luminosity_classes)
+                    and lum_cls != _NO_LUM_CLS)):
+            raise ValueError(f"{code!r} is not a valid spectral type code.")
+
+        spectype = cls.spectral_classes[spec_cls]
+        if sub_cls != _NO_SUBCLS:
+            spectype += str(sub_cls // 10)
+            if sub_cls % 10:
+                spectype += f".{sub_cls % 10}"
+        if lum_cls != _NO_LUM_CLS:
+            spectype += cls.luminosity_classes[lum_cls]
+        return cls.interned(spectype)
+
+    @classmethod
+    def interned(cls, spectype):
+        """Return cached instance for `spectype`, create it if necessary.
 
-        if classes["lum_cls"] is not None:
-            object.__setattr__(self, "luminosity_class",
-                               str(classes["lum_cls"]).upper())
+        Equivalent strings (ignoring case) return the identical instance.
+        """
+        return cls._interned(str(spectype).upper())
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _interned(cls, spectype: str):
+        return cls(spectype)
+
+    @classmethod
+    def lenient(cls, spectype):
+        """Return (interned) instance for `spectype`, ignoring catalog noise.
+
+        Whitespace anywhere in `spectype` is removed and anything following
+        the longest valid spectral type at the beginning of it, such as
+        peculiarity flags ("e", "n", "p", ":", ...), luminosity sub-classes
+        ("Ia", "IIIb") or ranges ("G8-K0"), is ignored. Returns None instead of
+        raising an exception if `spectype` doesn't start with a spectral type
+        at all.
+
+        Examples
+        --------
+        >>> SpectralType.lenient(" B2 IVe ")
+        SpectralType('B2IV')
+        >>> SpectralType.lenient("K0IIIbCN-1")
+        SpectralType('K0III')
+        >>> SpectralType.lenient("DA2") is None
+        True
+        """
+        spectype = "".join(str(spectype).split())
+        if (tokens := _tokenize(spectype, lenient=True)) is None:
+            return None
+        return cls.interned(spectype[:tokens[-1]])
+
+    @classmethod
+    def interned_cache_info(cls):
+        """Return hits, misses, maxsize and size of the `.interned()` cache.
+
+        The result is the ``CacheInfo`` of ``functools.lru_cache``, the hit
+        rate is thus ``info.hits / (info.hits + info.misses)``.
+        """
+        return cls._interned.cache_info()
+
+    @classmethod
+    def interned_cache_clear(cls) -> None:
+        """Clear the `.interned()` cache and its statistics."""
+        cls._interned.cache_clear()
+
+    @classmethod
+    def parse_array(cls, spectypes):
+        """Parse an array (e.g. a catalog column) of spectral type strings.
+
+        Each distinct string is only parsed once, regardless of how often it
+        occurs in the array, by using ``numpy.unique``. Requires NumPy.
+
+        Parameters
+        ----------
+        spectypes : array_like
+            Spectral type strings (or bytes), e.g. a NumPy array or an Astropy
+            Table column. Masked elements are not parsed.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of the same shape as `spectypes` with the fields
+            listed in `array_fields`: "spectral_class" (index in
+            `spectral_classes`), "spectral_subclass" (NaN if not given) and
+            "luminosity_class" (index in `luminosity_classes`, -1 if not
+            given). If `spectypes` is masked, a masked array is returned.
+
+        Raises
+        ------
+        ValueError
+            If any (unmasked) element is not a valid spectral type.
+
+        Examples
+        --------
+        >>> parsed = SpectralType.parse_array(["A0V", "G", "a0v"])
+        >>> parsed["spectral_class"].tolist()
+        [2, 4, 2]
+        >>> parsed["spectral_subclass"].tolist()
+        [0.0, nan, 0.0]
+        >>> parsed["luminosity_class"].tolist()
+        [4, -1, 4]
+        """
+        import numpy as np  # optional dependency, only needed here
+
+        mask = np.ma.getmask(spectypes)
+        spectypes = np.ma.getdata(spectypes)
+        if spectypes.dtype.kind not in "SU":
+            spectypes = spectypes.astype(str)
+        if mask is not np.ma.nomask:
+            spectypes = spectypes.copy()
+            spectypes[mask] = cls.spectral_classes[0]
+
+        unique, inverse = np.unique(spectypes, return_inverse=True)
+        table = np.empty(len(unique), dtype=list(cls.array_fields))
+        for i_row, spectype in enumerate(unique.astype(str)):
+            spt = cls(spectype)
+            table[i_row] = (
+                spt._spec_cls_idx,
+                (np.nan if spt.spectral_subclass is None
+                 else spt.spectral_subclass),
+                (-1 if spt.luminosity_class is None else spt._lum_cls_idx),
+            )
+
+        parsed = table[inverse.ravel()].reshape(spectypes.shape)
+        if mask is not np.ma.nomask:
+            return np.ma.array(parsed, mask=mask)
+        return parsed
 
     @property
     def _subcls_str(self) -> str:
@@ -178,7 +423,7 @@ class SpectralType:
         float value by 10 to get the original OBAFGKM index and subclass, e.g.
         ``divmod(53.5, 10) -> 5, 3.5 -> K3.5``.
         """
-        return self._spec_cls_idx * 10. + self._spec_subcls
+        return self.sort_key
 
     @property
     def numerical_luminosity_class(self) -> float:
@@ -201,42 +446,54 @@ class SpectralType:
 
     @classmethod
     def _comp_guard(cls, other):
-        if isinstance(other, str):
-            other = cls(other)
-        if not isinstance(other, cls):
-            raise TypeError("Can only compare equal types or valid str.")
-        return other
+        # Let Python try the reflected operation (e.g. on a
+        # SpectralTypeArray), which raises TypeError if that's unsupported too.
+        if not isinstance(other, str):
+            return NotImplemented
+        return cls.interned(other)
 
     def __eq__(self, other) -> bool:
         """Return self == other."""
-        if other == "":
-            # Required for Astropy Table writing...
+        if not isinstance(other, SpectralType):
+            if isinstance(other, str) and other == "":
+                # Required for Astropy Table writing...
+                return False
+            if (other := self._comp_guard(other)) is NotImplemented:
+                return other
+        if self.sort_key != other.sort_key:
             return False
-        other = self._comp_guard(other)
         if self.luminosity_class is None or other.luminosity_class is None:
             # If luminosity class isn't given for one, don't compare it.
-            return self._comp_tuple == other._comp_tuple
-        return self._comp_tuple_full == other._comp_tuple_full
+            return True
+        return self.luminosity_class == other.luminosity_class
 
     def __lt__(self, other) -> bool:
         """Return self < other."""
-        other = self._comp_guard(other)
-        return self._comp_tuple < other._comp_tuple
+        if not isinstance(other, SpectralType):
+            if (other := self._comp_guard(other)) is NotImplemented:
+                return other
+        return self.sort_key < other.sort_key
 
     def __le__(self, other) -> bool:
         """Return self <= other."""
-        other = self._comp_guard(other)
-        return self._comp_tuple <= other._comp_tuple
+        if not isinstance(other, SpectralType):
+            if (other := self._comp_guard(other)) is NotImplemented:
+                return other
+        return self.sort_key <= other.sort_key
 
     def __gt__(self, other) -> bool:
         """Return self > other."""
-        other = self._comp_guard(other)
-        return self._comp_tuple > other._comp_tuple
+        if not isinstance(other, SpectralType):
+            if (other := self._comp_guard(other)) is NotImplemented:
+                return other
+        return self.sort_key > other.sort_key
 
     def __ge__(self, other) -> bool:
         """Return self >= other."""
-        other = self._comp_guard(other)
-        return self._comp_tuple >= other._comp_tuple
+        if not isinstance(other, SpectralType):
+            if (other := self._comp_guard(other)) is NotImplemented:
+                return other
+        return self.sort_key >= other.sort_key
 
     def tolist(self):
         """Return str(self), for use in Astropy Table."""
@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""Contains SQLiteNestedMapping class."""
+
+import json
+import pickle
+import sqlite3
+from typing import Any, ClassVar
+from collections import abc
+from contextlib import contextmanager
+
+from .nested_mapping import NestedMapping, is_bangkey, is_nested_mapping
+from .loggers import get_logger
+
+logger = get_logger(__name__)
+
+# Empty sub-mappings are stored as leaves, but don't count as keys
+_EMPTY_MAPPING = pickle.dumps({})
+
+
+def _encode_path(chunks: abc.Sequence) -> str:
+    return json.dumps(list(chunks), separators=(",", ":"))
+
+
+def _prefix_bounds(chunks: abc.Sequence) -> tuple[str, str]:
+    """Return half-open range of encoded paths below `chunks`."""
+    # Encoded children of ["a"] all start with '["a",', so the range ends at
+    # the next character after the comma, which is '-'.
+    head = _encode_path(chunks)[:-1]
+    return f"{head},", f"{head}-"
+
+
+def _flatten(
+    mapping: abc.Mapping,
+    chunks: list,
+) -> abc.Iterator[tuple[list, Any]]:
+    for key, value in mapping.items():
+        if isinstance(value, abc.Mapping) and value:
+            yield from _flatten(value, chunks + [key])
+        else:
+            yield chunks + [key], value
+
+
+class SQLiteNestedMapping(NestedMapping):
+    """NestedMapping stored in an on-disk SQLite database.
+
+    Intended for very large configurations (e.g. parameter sweeps with
+    millions of leaves), which should not be held in memory as a whole. Each
+    leaf value is stored as one row, keyed by its full path, so lookups of
+    both single values and entire sub-mappings via !-style bang-string keys
+    use the primary key index of the database. Values are pickled, so only
+    open database files from trusted sources, because loading pickled data
+    can execute arbitrary code.
+
+    Bang-key semantics, the fallback to integer key chunks, the handling of
+    "alias" and "properties" in ``.update()`` and the errors raised when
+    trying to use a single value as a sub-mapping are the same as in
+    `NestedMapping`. Iteration is lazy and yields keys in the order in which
+    their values were first inserted. Retrieving a sub-mapping returns a
+    regular ``dict`` or `NestedMapping` (for bang-string keys) of that part of
+    the tree, which is loaded into memory.
+
+    Each write is committed immediately, unless it happens inside a
+    ``with mapping.batch():`` block, in which case all writes are committed
+    together in a single transaction at the end of the block (or rolled back
+    if an exception occurs).
+
+    The ``.dic`` attribute is built from the full database on access, so only
+    use it (or ``str()`` and the notebook representation, which rely on it)
+    for mappings of a reasonable size.
+
+    Parameters
+    ----------
+    filename : str or Path, optional
+        Database file to use, which is created if it doesn't exist yet. The
+        default is ":memory:", which creates a temporary in-memory database.
+    new_dict : Mapping or Iterable, optional
+        Initial contents, same as for `NestedMapping`.
+    title : str, optional
+        Title used in string representations.
+
+    Examples
+    --------
+    >>> with SQLiteNestedMapping(":memory:") as sweep:
+    ...     with sweep.batch():
+    ...         for i in range(1000):
+    ...             sweep[f"!run_{i}.exptime"] = i * 10
+    ...     sweep["!run_42.exptime"]
+    420
+    """
+
+    _in_memory: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        filename=":memory:",
+        new_dict: abc.Iterable | None = None,
+        title: str | None = None,
+    ):
+        # Don't call super().__init__(), it would overwrite self.dic
+        self._title = title
+        self.filename = filename
+        self._batch_depth = 0
+        self._bump_version()
+        self._conn = sqlite3.connect(filename)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leaves "
+            "(path TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self._conn.commit()
+
+        with self.batch():
+            if isinstance(new_dict, abc.MutableMapping):
+                self.update(new_dict)
+            elif isinstance(new_dict, abc.Iterable):
+                for entry in new_dict:
+                    self.update(entry)
+
+    @contextmanager
+    def batch(self):
+        """Context manager to group writes into a single transaction."""
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._conn.rollback()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth:
+            self._conn.commit()
+
+    def __deepcopy__(self, memo):
+        """Return copy.deepcopy(self), see ``.copy()``."""
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        new._title = self._title
+        new.filename = ":memory:"
+        new._batch_depth = 0
+        new._bump_version()
+        new._conn = sqlite3.connect(":memory:")
+        new._conn.execute(
+            "CREATE TABLE leaves (path TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        # Copy rows rather than the database file, to include pending writes
+        new._conn.executemany(
+            "INSERT INTO leaves (path, value) VALUES (?, ?)",
+            self._conn.execute(
+                "SELECT path, value FROM leaves ORDER BY rowid"))
+        new._conn.commit()
+        return new
+
+    def copy(self):
+        """Return a copy, stored in a new temporary in-memory database.
+
+        For copying to a file, use ``SQLiteNestedMapping(filename, self)``.
+        """
+        return self.__deepcopy__({})
+
+    def close(self) -> None:
+        """Commit any pending writes and close the database connection."""
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        """Context manager __enter__."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """Context manager __exit__."""
+        self.close()
+
+    @property
+    def dic(self) -> dict[str, Any]:
+        """Full contents as a nested ``dict``, loaded from the database."""
+        return self._load_subtree([])
+
+    def _chunks(self, key) -> list:
+        if not is_bangkey(key):
+            return [key]
+        return self._split_subkey(key)
+
+    def _get_leaf(self, chunks: abc.Sequence) -> tuple[bool, Any]:
+        row = self._conn.execute(
+            "SELECT value FROM leaves WHERE path = ?",
+            (_encode_path(chunks),)).fetchone()
+        if row is None:
+            return False, None
+        return True, pickle.loads(row[0])
+
+    def _has_subtree(self, chunks: abc.Sequence) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM leaves WHERE path >= ? AND path < ? LIMIT 1",
+            _prefix_bounds(chunks)).fetchone()
+        return row is not None
+
+    def _iter_leaves(
+        self,
+        chunks: abc.Sequence = (),
+    ) -> abc.Iterator[tuple[list, Any]]:
+        if chunks:
+            cursor = self._conn.execute(
+                "SELECT path, value FROM leaves "
+                "WHERE path >= ? AND path < ? ORDER BY rowid",
+                _prefix_bounds(chunks))
+        else:
+            cursor = self._conn.execute(
+                "SELECT path, value FROM leaves ORDER BY rowid")
+        for path, value in cursor:
+            yield json.loads(path), pickle.loads(value)
+
+    def _load_subtree(self, chunks: abc.Sequence) -> dict[str, Any]:
+        subtree: dict[str, Any] = {}
+        n_base = len(chunks)
+        for path, value in self._iter_leaves(chunks):
+            *subchunks, final_key = path[n_base:]
+            entry = subtree
+            for chunk in subchunks:
+                entry = entry.setdefault(chunk, {})
+            entry[final_key] = value
+        return subtree
+
+    def _resolve_chunks(self, chunks: list, key) -> list:
+        """Walk path one level at a time, retrying int chunks if needed."""
+        resolved = []
+        for i_chunk, chunk in enumerate(chunks):
+            candidates = [chunk]
+            try:
+                candidates.append(int(chunk))
+            except (TypeError, ValueError):
+                pass
+
+            for candidate in candidates:
+                path = resolved + [candidate]
+                found, value = self._get_leaf(path)
+                if found:
+                    if i_chunk < len(chunks) - 1:
+                        self._guard_submapping(
+                            value, chunks[:i_chunk + 1], "get")
+                    break
+                if self._has_subtree(path):
+                    break
+            else:
+                raise KeyError(key)
+            resolved = path
+        return resolved
+
+    def _clear_ancestors(self, chunks: list, kind: str) -> None:
+        """Raise if any parent of `chunks` is a single value.
+
+        Ancestors holding an empty mapping are removed, as they now get
+        actual content.
+        """
+        ancestors = [_encode_path(chunks[:i]) for i in range(1, len(chunks))]
+        if not ancestors:
+            return
+        rows = self._conn.execute(
+            "SELECT path, value FROM leaves WHERE path IN "
+            f"({', '.join('?' * len(ancestors))})", ancestors).fetchall()
+        for path, value in rows:
+            value = pickle.loads(value)
+            if kind == "merge" and not isinstance(value, abc.Mapping):
+                logger.warning("Overwriting non-dict %s with dict: %s",
+                               value, chunks[len(json.loads(path)):])
+            elif kind != "merge":
+                self._guard_submapping(value, json.loads(path), kind)
+            if kind != "del":
+                self._conn.execute(
+                    "DELETE FROM leaves WHERE path = ?", (path,))
+
+    def _delete(self, chunks: list) -> int:
+        n_deleted = self._conn.execute(
+            "DELETE FROM leaves WHERE path >= ? AND path < ?",
+            _prefix_bounds(chunks)).rowcount
+        n_deleted += self._conn.execute(
+            "DELETE FROM leaves WHERE path = ?",
+            (_encode_path(chunks),)).rowcount
+        return n_deleted
+
+    def _insert(self, chunks: list, value) -> None:
+        if isinstance(value, abc.Mapping) and value:
+            leaves = _flatten(value, chunks)
+        else:
+            leaves = iter([(chunks, value)])
+        self._conn.executemany(
+            "INSERT INTO leaves (path, value) VALUES (?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET value = excluded.value",
+            ((_encode_path(path), _EMPTY_MAPPING
+              if isinstance(val, abc.Mapping) else pickle.dumps(val))
+             for path, val in leaves))
+
+    def _is_submapping(self, chunks: abc.Sequence) -> bool:
+        """Return True if `chunks` holds a (possibly empty) sub-mapping."""
+        if self._has_subtree(chunks):
+            return True
+        found, value = self._get_leaf(chunks)
+        return found and isinstance(value, abc.Mapping)
+
+    def _merge(self, chunks: list, new_dict: abc.Mapping) -> None:
+        """Same as ``recursive_update`` but directly in the database."""
+        if isinstance(new_dict, abc.Mapping) and new_dict:
+            for path, value in _flatten(new_dict, chunks):
+                self._merge(path, value)
+            return
+
+        # Single value or empty sub-mapping
+        self._clear_ancestors(chunks, "merge")
+        if isinstance(new_dict, abc.Mapping):
+            if self._is_submapping(chunks):
+                return  # Nothing to merge into existing sub-mapping
+            found, value = self._get_leaf(chunks)
+            if found:
+                logger.warning("Overwriting non-dict %s with dict: %s",
+                               value, new_dict)
+        elif self._is_submapping(chunks):
+            logger.warning("Overwriting dict %s with non-dict: %s",
+                           chunks, new_dict)
+        self._delete(chunks)
+        self._insert(chunks, new_dict)
+
+    def update(self, new_dict: abc.MutableMapping[str, Any]) -> None:
+        self._bump_version()
+        with self.batch():
+            if isinstance(new_dict, SQLiteNestedMapping):
+                for path, value in new_dict._iter_leaves():
+                    self._merge(path, value)
+                return
+
+            if isinstance(new_dict, NestedMapping):
+                new_dict = new_dict.dic  # Avoid updating with another one
+
+            if isinstance(new_dict, abc.Mapping) and "alias" in new_dict:
+                alias = new_dict["alias"]
+                propdict = new_dict.get("properties", {})
+                self._merge([alias], propdict)
+            elif isinstance(new_dict, abc.Sequence):
+                # To catch list of tuples
+                self.update(dict([new_dict]))
+            else:
+                # Bang-string properties keys are set directly
+                for key, value in new_dict.items():
+                    if is_bangkey(key):
+                        self[key] = value
+                    else:
+                        self._merge([key], value)
+
+    def top_level_items(self) -> abc.Iterator[tuple[Any, Any]]:
+        """Iterate over top-level keys and their (sub-mapping) values.
+
+        Keys are ordered by their first insertion. Only one sub-mapping is
+        loaded into memory at a time, as a regular ``dict``, which allows
+        processing the full contents section by section.
+        """
+        for key in self._top_level_keys():
+            found, value = self._get_leaf([key])
+            yield key, value if found else self._load_subtree([key])
+
+    def _top_level_keys(self) -> list:
+        """Return top-level keys, ordered by their first insertion."""
+        cursor = self._conn.execute(
+            "SELECT json_extract(path, '$[0]') AS top FROM leaves "
+            "GROUP BY top ORDER BY MIN(rowid)")
+        return [key for (key,) in cursor]
+
+    def _has_top_level_key(self, key) -> bool:
+        """Return True if `key` is a top-level key (without int fallback)."""
+        return self._get_leaf([key])[0] or self._has_subtree([key])
+
+    def __getitem__(self, key: str):
+        """x.__getitem__(y) <==> x[y]."""
+        value = self._get_entry(key)
+        if is_bangkey(key) and is_nested_mapping(value):
+            return NestedMapping(value)
+        return value
+
+    def _get_entry(self, key: str):
+        """Return value or sub-mapping (as a dict) loaded from database."""
+        chunks = self._chunks(key)
+        found, value = self._get_leaf(chunks)
+        if found:
+            return value
+
+        if not self._has_subtree(chunks):
+            if not is_bangkey(key):
+                raise KeyError(key)  # No int fallback for simple keys
+            chunks = self._resolve_chunks(chunks, key)
+            found, value = self._get_leaf(chunks)
+            if found:
+                return value
+
+        return self._load_subtree(chunks)
+
+    def __setitem__(self, key: str, value) -> None:
+        """Set self[key] to value."""
+        chunks = self._chunks(key)
+        self._bump_version()
+        with self.batch():
+            self._clear_ancestors(chunks, "set")
+            self._delete(chunks)
+            self._insert(chunks, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Delete self[key]."""
+        chunks = self._chunks(key)
+        self._bump_version()
+        with self.batch():
+            self._clear_ancestors(chunks, "del")
+            if not self._delete(chunks):
+                raise KeyError(key)
+            if len(chunks) > 1 and not self._has_subtree(chunks[:-1]):
+                # Keep the parent as an empty sub-mapping, like NestedMapping
+                self._insert(chunks[:-1], {})
+
+    def __contains__(self, key) -> bool:
+        """Return key in self."""
+        chunks = self._chunks(key)
+        if self._get_leaf(chunks)[0] or self._has_subtree(chunks):
+            return True
+        if not is_bangkey(key):
+            return False
+        try:
+            self._resolve_chunks(chunks, key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> abc.Iterator[str]:
+        """Implement iter(self)."""
+        cursor = self._conn.execute(
+            "SELECT path FROM leaves WHERE value != ? ORDER BY rowid",
+            (_EMPTY_MAPPING,))
+        for (path,) in cursor:
+            chunks = json.loads(path)
+            if len(chunks) == 1:
+                yield chunks[0]
+            else:
+                yield f"!{'.'.join(str(chunk) for chunk in chunks)}"
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM leaves WHERE value != ?",
+            (_EMPTY_MAPPING,)).fetchone()[0]
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        return f"{self.__class__.__name__}({self.filename!r})"
@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
 """Contains UniqueList class."""
 
-from typing import Any
-from collections.abc import Iterable, MutableSequence
+from typing import Any, ClassVar
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice
+from collections.abc import (Callable, Iterable, Iterator, MutableSequence,
+                             Sequence)
+
+
+class _Block(list):
+    """Consecutive keys in a `UniqueList`, which knows its own position."""
+
+    __slots__ = ("pos",)
 
 
 class UniqueList(MutableSequence):
@@ -17,18 +26,209 @@ class UniqueList(MutableSequence):
     at index 0 instead of -1. All other items are shifted one index to the
     right, just like when inserting at any other position in between other
     items.
+
+    Internally, items are stored in a list of blocks holding up to about a
+    thousand items each, together with a ``dict`` mapping each item to its
+    block and a binary indexed (Fenwick) tree counting the items per block.
+    This makes `.insert()` at any position (including `.append()` and
+    `.append_first()`), `.remove()`, `.index()`, ``in`` and deletion or
+    retrieval by index all O(log n), plus one pass over a single block (to
+    find or shift items), which is cheap for blocks of this size. Blocks that
+    grow too large are split in half, and all blocks are rebuilt once they
+    have become too sparse after many removals.
+
+    Bulk operations `.extend()`, `.update_first()` and `.remove_many()`
+    process all elements in a single pass. The methods `.union()`,
+    `.intersection()` and `.difference()` work like their ``set``
+    counterparts, but return a new instance preserving the order of elements.
+
+    Slicing returns a `UniqueListView` instead of a copy. Deleting a slice
+    (``del ulst[2:10]``) or a collection of indices (``del ulst[[0, 3, 5]]``)
+    removes all those elements at once in at most linear time.
+
+    Optionally, a `key` function can be passed, in which case uniqueness is
+    decided based on ``key(element)`` rather than the element itself, e.g.
+    ``UniqueList(names, key=str.casefold)``. Only the first element for each
+    key is kept. Checks via ``in``, `.index()` and `.remove()` then also
+    compare the key of the given element, while `.get(key)` returns the
+    stored element for a given key in O(1).
     """
 
-    def __init__(self, initial: Iterable[Any] | None = None):
-        self._set: set[Any] = set()  # For uniqueness
-        self._list: list[Any] = []    # For order
+    _block_size: ClassVar[int] = 500  # Blocks are split at twice this size
+
+    def __init__(
+        self,
+        initial: Iterable[Any] | None = None,
+        key: Callable[[Any], Any] | None = None,
+    ):
+        self._key = key
+        self._blocks: list[_Block] = []      # For order, holds the keys
+        self._keys: dict[Any, _Block] = {}   # For uniqueness, key -> block
+        self._elements: dict[Any, Any] = {}  # key -> element, only with key
+        self._tree: list[int] = [0]          # Counts keys per block, 1-based
 
         if initial is not None:
             self.extend(initial)
 
+    def _layout(self, values: list[Any]) -> None:
+        """Store (unique) values in new blocks of equal size."""
+        if self._key is None:
+            keys = values
+            self._elements = {}
+        else:
+            keys = [self._key(value) for value in values]
+            self._elements = dict(zip(keys, values))
+        size = self._block_size
+        self._blocks = [_Block(keys[i:i + size])
+                        for i in range(0, len(keys), size)]
+        self._keys = {key: block for block in self._blocks for key in block}
+        self._renumber()
+
+    def _renumber(self) -> None:
+        """Update block positions and rebuild tree after adding blocks."""
+        tree = [0]
+        for pos, block in enumerate(self._blocks):
+            block.pos = pos
+            tree.append(len(block))
+
+        # Build tree in O(n) by pushing each node's sum up to its parent
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _key_of(self, value):
+        return value if self._key is None else self._key(value)
+
+    def _elements_of(self, keys: Iterator[Any]) -> Iterator[Any]:
+        """Return iterator over the stored elements for (present) `keys`."""
+        if self._key is None:
+            return keys
+        return map(self._elements.__getitem__, keys)
+
+    def _unique_new(self, values: Iterable[Any]) -> dict[Any, Any]:
+        """Return first element for each key in `values` not in self yet."""
+        if self._key is None:
+            return {value: value for value in dict.fromkeys(values)
+                    if value not in self._keys}
+        new = {}
+        for value in values:
+            key = self._key(value)
+            if key not in self._keys and key not in new:
+                new[key] = value
+        return new
+
+    def _lookup_keys(self, values: Iterable[Any]):
+        """Return keys of `values` as something supporting fast ``in``."""
+        if isinstance(values, UniqueList) and values._key is self._key:
+            return values._keys
+        if self._key is None:
+            if isinstance(values, (set, frozenset, dict)):
+                return values
+            return dict.fromkeys(values)
+        return {self._key(value) for value in values}
+
+    def _update(self, pos: int, delta: int) -> None:
+        i = pos + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_before(self, pos: int) -> int:
+        """Return number of items in the blocks before block `pos`."""
+        total = 0
+        while pos > 0:
+            total += self._tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def _find_block(self, index: int) -> tuple[_Block, int]:
+        """Return block and offset in it of the item at (valid) `index`."""
+        tree = self._tree
+        n_nodes = len(tree)
+        pos = 0
+        remaining = index
+        step = 1 << (n_nodes - 1).bit_length() >> 1
+        while step:
+            if pos + step < n_nodes and tree[pos + step] <= remaining:
+                pos += step
+                remaining -= tree[pos]
+            step >>= 1
+        return self._blocks[pos], remaining
+
+    def _normalize_index(self, index: int) -> int:
+        n_items = len(self)
+        if index < 0:
+            index += n_items
+        if not 0 <= index < n_items:
+            raise IndexError(f"{self.__class__.__name__} index out of range")
+        return index
+
+    def _insert_key(self, block: _Block, offset: int, key) -> None:
+        block.insert(offset, key)
+        self._keys[key] = block
+        self._update(block.pos, 1)
+        if len(block) > 2 * self._block_size:
+            second = _Block(block[self._block_size:])
+            del block[self._block_size:]
+            for moved in second:
+                self._keys[moved] = second
+            self._blocks.insert(block.pos + 1, second)
+            self._renumber()
+
+    def _remove_key(self, key) -> None:
+        block = self._keys[key]
+        self._remove_at(block, block.index(key))
+
+    def _remove_at(self, block: _Block, offset: int) -> None:
+        key = block.pop(offset)
+        del self._keys[key]
+        self._elements.pop(key, None)
+        self._update(block.pos, -1)
+
+        if not block:
+            del self._blocks[block.pos]
+            self._renumber()
+        elif len(self._blocks) > 2 * len(self._keys) // self._block_size + 2:
+            self._layout(list(self))
+
+    def _iter_range(self, positions: range) -> Iterator[Any]:
+        """Iterate over the items at (valid, non-negative) `positions`."""
+        if not positions:
+            return iter(())
+        block, offset = self._find_block(positions[0])
+        if positions.step > 0:
+            keys = chain(islice(block, offset, None), chain.from_iterable(
+                self._blocks[block.pos + 1:]))
+        else:
+            keys = chain(reversed(block[:offset + 1]), chain.from_iterable(
+                map(reversed, reversed(self._blocks[:block.pos]))))
+        step = abs(positions.step)
+        return self._elements_of(
+            islice(keys, 0, (len(positions) - 1) * step + 1, step))
+
+    def _delete_positions(self, positions: range | set[int]) -> None:
+        """Delete the items at (valid, non-negative) `positions`."""
+        if len(positions) * 8 < len(self):
+            if isinstance(positions, range):
+                values = list(self._iter_range(positions))
+            else:
+                values = [self[index] for index in positions]
+            for value in values:
+                self._remove_key(self._key_of(value))
+        elif positions:
+            self._layout([value for index, value in enumerate(self)
+                          if index not in positions])
+
     def __getitem__(self, index: int):
         """x.__getitem__(y) <==> x[y]."""
-        return self._list[index]
+        if isinstance(index, slice):
+            return UniqueListView(self, index)
+        block, offset = self._find_block(self._normalize_index(index))
+        if self._key is None:
+            return block[offset]
+        return self._elements[block[offset]]
 
     def __setitem__(self, index: int, value) -> None:
         """Not supported."""
@@ -37,22 +237,172 @@ class UniqueList(MutableSequence):
             "insertion, removal and reordering.")
 
     def __delitem__(self, index: int) -> None:
-        """Delete self[key]."""
-        self._set.discard(self._list.pop(index))
+        """Delete self[key].
+
+        Besides a single index, `index` can also be a slice or an iterable of
+        indices, to delete several elements at once in linear time.
+        """
+        if isinstance(index, slice):
+            self._delete_positions(range(len(self))[index])
+        elif isinstance(index, Iterable):
+            self._delete_positions({self._normalize_index(i) for i in index})
+        else:
+            self._remove_at(*self._find_block(self._normalize_index(index)))
 
     def __len__(self) -> int:
         """Return len(self)."""
-        return len(self._set)
+        return len(self._keys)
 
     def __contains__(self, value) -> bool:
         """Return key in self."""
-        return value in self._set
+        return self._key_of(value) in self._keys
+
+    def __iter__(self) -> Iterator[Any]:
+        """Implement iter(self)."""
+        return self._elements_of(chain.from_iterable(self._blocks))
+
+    def __reversed__(self) -> Iterator[Any]:
+        """Return a reverse iterator over the list."""
+        return self._elements_of(chain.from_iterable(
+            map(reversed, reversed(self._blocks))))
+
+    def index(self, value, start: int = 0, stop: int | None = None) -> int:
+        """Return first index of value.
+
+        Raises ValueError if the value is not present.
+        """
+        key = self._key_of(value)
+        try:
+            block = self._keys[key]
+        except KeyError:
+            raise ValueError(f"{value!r} is not in list") from None
+        index = self._count_before(block.pos) + block.index(key)
+
+        n_items = len(self)
+        if start < 0:
+            start = max(start + n_items, 0)
+        if stop is None:
+            stop = n_items
+        elif stop < 0:
+            stop += n_items
+        if not start <= index < stop:
+            raise ValueError(f"{value!r} is not in list")
+        return index
+
+    def count(self, value) -> int:
+        """Return number of occurrences of value (which is either 0 or 1)."""
+        return int(value in self)
+
+    def remove(self, value) -> None:
+        """Remove value, raise ValueError if the value is not present."""
+        key = self._key_of(value)
+        if key not in self._keys:
+            raise ValueError(f"{value!r} is not in list")
+        self._remove_key(key)
+
+    def get(self, key, default=None):
+        """Return element with the given key, or `default` if not present.
+
+        Without a key function, `key` is just the element itself.
+        """
+        if key not in self._keys:
+            return default
+        if self._key is not None:
+            return self._elements[key]
+        block = self._keys[key]
+        return block[block.index(key)]
+
+    def clear(self) -> None:
+        """Remove all items."""
+        self._layout([])
 
     def insert(self, index: int, value) -> None:
         """Insert value before index."""
-        if value not in self:
-            self._set.add(value)
-            self._list.insert(index, value)
+        key = self._key_of(value)
+        if key in self._keys:
+            return
+        if self._key is not None:
+            self._elements[key] = value
+
+        n_items = len(self)
+        if index < 0:
+            index = max(index + n_items, 0)
+        if index < n_items:
+            self._insert_key(*self._find_block(index), key)
+            return
+        if not self._blocks:
+            self._blocks.append(_Block())
+            self._renumber()
+        self._insert_key(self._blocks[-1], len(self._blocks[-1]), key)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        """Extend list by appending all new elements from the iterable."""
+        if values is self:
+            return
+        new = list(self._unique_new(values).values())
+        if len(new) > len(self) // 4:
+            self._layout(list(self) + new)
+        else:
+            for value in new:
+                self.append(value)
+
+    def update_first(self, values: Iterable[Any]) -> None:
+        """Move or insert all elements from the iterable to the front.
+
+        Afterwards, the list starts with the (unique) elements from `values`
+        in their given order, followed by all other previous elements.
+        """
+        front: dict[Any, Any] = {}
+        for value in values:
+            front.setdefault(self._key_of(value), value)
+        if len(front) * 8 < len(self):
+            for value in reversed(front.values()):
+                self.append_first(value)
+        else:
+            self._layout(list(front.values()) + [
+                value for value in self if self._key_of(value) not in front])
+
+    def remove_many(self, values: Iterable[Any]) -> None:
+        """Remove all elements from the iterable, ignoring missing ones."""
+        to_remove = dict.fromkeys(key for key in map(self._key_of, values)
+                                  if key in self._keys)
+        if len(to_remove) * 8 < len(self):
+            for key in to_remove:
+                self._remove_key(key)
+        else:
+            self._layout([value for value in self
+                          if self._key_of(value) not in to_remove])
+
+    def union(self, *others: Iterable[Any]):
+        """Return new list with elements from self and all others, in order."""
+        new = self.copy()
+        for other in others:
+            new.extend(other)
+        return new
+
+    def intersection(self, *others: Iterable[Any]):
+        """Return new list with elements of self found in all others."""
+        lookups = [self._lookup_keys(other) for other in others]
+        return self._from_unique([value for value in self
+                                  if all(self._key_of(value) in lookup
+                                         for lookup in lookups)])
+
+    def difference(self, *others: Iterable[Any]):
+        """Return new list with elements of self not found in any others."""
+        lookups = [self._lookup_keys(other) for other in others]
+        return self._from_unique([value for value in self
+                                  if not any(self._key_of(value) in lookup
+                                             for lookup in lookups)])
+
+    def copy(self):
+        """Return a shallow copy of the list."""
+        return self._from_unique(list(self))
+
+    def _from_unique(self, values: list[Any]):
+        """Return new instance from list of already unique elements."""
+        new = self.__class__(key=self._key)
+        new._layout(values)
+        return new
 
     def append_first(self, value) -> None:
         """
@@ -66,4 +416,276 @@ class UniqueList(MutableSequence):
 
     def __repr__(self) -> str:
         """Return repr(self)."""
-        return f"{self.__class__.__name__}({self._list!r})"
+        return f"{self.__class__.__name__}({list(self)!r})"
+
+
+class SortedUniqueList(UniqueList):
+    """UniqueList which keeps its elements sorted.
+
+    Elements are sorted by themselves or by `key` (if given), which also
+    decides uniqueness, as in `UniqueList`. Because the position of each
+    element is defined by the sort order, `.insert()` ignores the index and
+    works like `.append()`, while `.append_first()` and `.update_first()` are
+    not supported and raise ``TypeError``.
+
+    Lookups by element or key use ``bisect`` on the sorted keys. The methods
+    `.bisect_left()`, `.bisect_right()` and `.irange()` allow range queries
+    in O(log n + k) for k results, without sorting and de-duplicating the
+    list again on every use.
+
+    Examples
+    --------
+    >>> sul = SortedUniqueList(["Foo", "bar", "BAZ", "foo"], key=str.casefold)
+    >>> list(sul)
+    ['bar', 'BAZ', 'Foo']
+    >>> list(sul.irange("baz", "foo", inclusive=(False, True)))
+    ['Foo']
+    """
+
+    def __init__(
+        self,
+        initial: Iterable[Any] | None = None,
+        key: Callable[[Any], Any] | None = None,
+    ):
+        self._sort_keys: list[Any] = []
+        self._values: list[Any] = []
+        super().__init__(initial, key)
+
+    def _layout(self, values: list[Any]) -> None:
+        """Store (unique) values in sorted order."""
+        pairs = sorted(((self._key_of(value), value) for value in values),
+                       key=lambda pair: pair[0])
+        self._sort_keys = [pair[0] for pair in pairs]
+        self._values = [pair[1] for pair in pairs]
+        self._keys = dict(pairs)  # key -> element here, only for lookups
+
+    def _iter_range(self, positions: range) -> Iterator[Any]:
+        """Iterate over the items at (valid, non-negative) `positions`."""
+        return map(self._values.__getitem__, positions)
+
+    def __getitem__(self, index: int):
+        """x.__getitem__(y) <==> x[y]."""
+        if isinstance(index, slice):
+            return UniqueListView(self, index)
+        return self._values[index]
+
+    def __delitem__(self, index: int) -> None:
+        """Delete self[key]."""
+        if not isinstance(index, (slice, int)) and isinstance(index, Iterable):
+            positions = {self._normalize_index(i) for i in index}
+            self._layout([value for i, value in enumerate(self._values)
+                          if i not in positions])
+            return
+
+        removed = self._sort_keys[index]
+        del self._sort_keys[index]
+        del self._values[index]
+        if not isinstance(index, slice):
+            removed = (removed,)
+        for key in removed:
+            del self._keys[key]
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Implement iter(self)."""
+        return iter(self._values)
+
+    def __reversed__(self) -> Iterator[Any]:
+        """Return a reverse iterator over the list."""
+        return reversed(self._values)
+
+    def index(self, value, start: int = 0, stop: int | None = None) -> int:
+        """Return index of value.
+
+        Raises ValueError if the value is not present.
+        """
+        key = self._key_of(value)
+        if key not in self._keys:
+            raise ValueError(f"{value!r} is not in list")
+        index = bisect_left(self._sort_keys, key)
+        if index not in range(len(self))[start:stop]:
+            raise ValueError(f"{value!r} is not in list")
+        return index
+
+    def remove(self, value) -> None:
+        """Remove value, raise ValueError if the value is not present."""
+        del self[self.index(value)]
+
+    def remove_many(self, values: Iterable[Any]) -> None:
+        """Remove all elements from the iterable, ignoring missing ones."""
+        to_remove = {key for key in map(self._key_of, values)
+                     if key in self._keys}
+        if len(to_remove) * 8 < len(self):
+            for key in to_remove:
+                del self[bisect_left(self._sort_keys, key)]
+        else:
+            self._layout([value for value in self
+                          if self._key_of(value) not in to_remove])
+
+    def get(self, key, default=None):
+        """Return element with the given key, or `default` if not present.
+
+        Without a key function, `key` is just the element itself.
+        """
+        return self._keys.get(key, default)
+
+    def insert(self, index: int, value) -> None:
+        """Insert value at its sorted position, `index` is ignored."""
+        key = self._key_of(value)
+        if key in self._keys:
+            return
+        index = bisect_right(self._sort_keys, key)
+        self._sort_keys.insert(index, key)
+        self._values.insert(index, value)
+        self._keys[key] = value
+
+    def extend(self, values: Iterable[Any]) -> None:
+        """Add all new elements from the iterable."""
+        if values is self:
+            return
+        new = list(self._unique_new(values).values())
+        if len(new) > len(self) // 4:
+            self._layout(self._values + new)
+        else:
+            for value in new:
+                self.insert(-1, value)
+
+    def append_first(self, value) -> None:
+        """Not supported."""
+        raise TypeError(
+            f"{self.__class__.__name__} is always sorted, so elements cannot "
+            "be moved to the front.")
+
+    update_first = append_first
+
+    def bisect_left(self, key) -> int:
+        """Return index where an element with `key` would be inserted.
+
+        If an element with `key` is present, return its index.
+        """
+        return bisect_left(self._sort_keys, key)
+
+    def bisect_right(self, key) -> int:
+        """Return index where an element with `key` would be inserted.
+
+        If an element with `key` is present, return the index after it.
+        """
+        return bisect_right(self._sort_keys, key)
+
+    def irange(
+        self,
+        minimum=None,
+        maximum=None,
+        inclusive: tuple[bool, bool] = (True, True),
+    ) -> Iterator[Any]:
+        """Iterate over all elements with keys between minimum and maximum.
+
+        Either boundary may be None to leave the range open on that side.
+        """
+        start, stop = 0, len(self)
+        if minimum is not None:
+            start = (self.bisect_left if inclusive[0]
+                     else self.bisect_right)(minimum)
+        if maximum is not None:
+            stop = (self.bisect_right if inclusive[1]
+                    else self.bisect_left)(maximum)
+        return iter(self._values[start:stop])
+
+
+class UniqueListView(Sequence):
+    """Read-only view on a slice of a `UniqueList`.
+
+    Returned when slicing a `UniqueList` (or another view), without copying
+    any elements. Like a ``dict`` view, it is live, i.e. it reflects later
+    changes to the underlying list, exactly as slicing the list again would.
+    Views compare equal to any (non-string) sequence with equal elements in
+    the same order, e.g. ``ul[0:2] == [ul[0], ul[1]]``.
+
+    Iterating over a view of k elements takes O(k) time. Checks via ``in`` and
+    `.index()` use the lookup of the underlying list. Use `.copy()` to get a
+    new, independent list (of the same type as the underlying one) with the
+    elements of the view.
+    """
+
+    def __init__(self, parent: Sequence, index: slice):
+        self._parent = parent
+        self._slice = index
+
+    @property
+    def _positions(self) -> range:
+        return range(len(self._parent))[self._slice]
+
+    def _iter_range(self, positions: range) -> Iterator[Any]:
+        """Iterate over the items at (valid, non-negative) `positions`."""
+        if not positions:
+            return iter(())
+        base = self._positions
+        start = base[positions[0]]
+        step = base.step * positions.step
+        return self._parent._iter_range(
+            range(start, start + step * len(positions), step))
+
+    def _from_unique(self, values: list[Any]):
+        """Return new list from already unique elements."""
+        return self._parent._from_unique(values)
+
+    def __getitem__(self, index: int):
+        """x.__getitem__(y) <==> x[y]."""
+        if isinstance(index, slice):
+            return UniqueListView(self, index)
+        return self._parent[self._positions[index]]
+
+    def __len__(self) -> int:
+        """Return len(self)."""
+        return len(self._positions)
+
+    def __eq__(self, other) -> bool:
+        """Return self == other, comparing elements like a list."""
+        if (not isinstance(other, Sequence)
+                or isinstance(other, (str, bytes, bytearray))):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            mine == theirs for mine, theirs in zip(self, other))
+
+    __hash__ = None  # live view, like a list
+
+    def __contains__(self, value) -> bool:
+        """Return key in self."""
+        try:
+            self.index(value)
+        except ValueError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[Any]:
+        """Implement iter(self)."""
+        return self._parent._iter_range(self._positions)
+
+    def __reversed__(self) -> Iterator[Any]:
+        """Return a reverse iterator over the view."""
+        return self._parent._iter_range(self._positions[::-1])
+
+    def index(self, value, start: int = 0, stop: int | None = None) -> int:
+        """Return index of value.
+
+        Raises ValueError if the value is not present.
+        """
+        index = self._positions.index(self._parent.index(value))
+        if index not in range(len(self))[start:stop]:
+            raise ValueError(f"{value!r} is not in view")
+        return index
+
+    def count(self, value) -> int:
+        """Return number of occurrences of value (which is either 0 or 1)."""
+        return int(value in self)
+
+    def copy(self):
+        """Return new list with the elements of this view."""
+        return self._from_unique(list(self))
+
+    def __repr__(self) -> str:
+        """Return repr(self)."""
+        return f"{self.__class__.__name__}({list(self)!r})"
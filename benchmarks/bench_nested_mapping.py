@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Timing benchmarks for nested_mapping.py."""
+
+from io import StringIO
+from copy import deepcopy
+from timeit import timeit
+
+from astar_utils import NestedMapping, RecursiveNestedMapping, NestedChainMap
+
+
+def make_config(n_top: int = 200, n_sub: int = 50, n_leaf: int = 20) -> dict:
+    """Return large nested dict with n_top * n_sub * n_leaf leaves."""
+    return {f"effect_{i}": {f"param_{j}": {f"value_{k}": k * j
+                                           for k in range(n_leaf)}
+                            for j in range(n_sub)}
+            for i in range(n_top)}
+
+
+def bench_rendering(number: int = 3) -> None:
+    nestmap = NestedMapping(make_config())
+
+    def render(method, **limits):
+        with StringIO() as str_stream:
+            getattr(nestmap, method)(str_stream, **limits)
+
+    cases = {
+        "write_string, no limits": ("write_string", {}),
+        "write_string, repr_limits": ("write_string",
+                                      NestedMapping.repr_limits),
+        "write_string, max_depth=1": ("write_string", {"max_depth": 1}),
+        "write_html, no limits": ("write_html", {}),
+        "write_html, repr_limits": ("write_html", NestedMapping.repr_limits),
+    }
+    for name, (method, limits) in cases.items():
+        time = timeit(lambda: render(method, **limits), number=number)
+        print(f"{name:30}: {time / number * 1e3:10.2f} ms")
+
+
+def bench_copy(number: int = 5) -> None:
+    nestmap = NestedMapping(make_config(n_top=100))
+    chainmap = NestedChainMap(
+        *(RecursiveNestedMapping(make_config(n_top=20)) for _ in range(8)))
+
+    cases = {
+        "generic deepcopy of .dic": lambda: deepcopy(nestmap.dic),
+        "NestedMapping.copy()": nestmap.copy,
+        "generic deepcopy of all maps": lambda: [deepcopy(mapping.dic)
+                                                 for mapping in chainmap.maps],
+        "NestedChainMap deepcopy": lambda: deepcopy(chainmap),
+        "NestedChainMap.copy()": chainmap.copy,
+    }
+    for name, func in cases.items():
+        time = timeit(func, number=number)
+        print(f"{name:30}: {time / number * 1e3:10.2f} ms")
+
+
+if __name__ == "__main__":
+    bench_rendering()
+    bench_copy()
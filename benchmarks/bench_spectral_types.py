@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Timing benchmarks for spectral_types.py."""
+
+import random
+from operator import attrgetter
+from timeit import timeit
+
+from astar_utils import SpectralType
+
+
+def make_catalog_column(n_rows: int = 1_000_000,
+                        seed: int = 42) -> list[str]:
+    """Random column drawn from ~500 distinct spectral type strings."""
+    rng = random.Random(seed)
+    distinct = [f"{spec}{sub}{lum}"
+                for spec in "OBAFGKM"
+                for sub in ["", *map(str, range(10)), "0.5", "2.5", "7.5"]
+                for lum in ["", "I", "III", "IV", "V"]]
+    distinct += [spectype.lower() for spectype in distinct[::4]]
+    # Catalogs are dominated by few common types, so weigh accordingly
+    weights = [1 / (rank + 1) for rank in range(len(distinct))]
+    return rng.choices(distinct, weights, k=n_rows)
+
+
+def bench_construction(n_rows: int = 1_000_000) -> None:
+    column = make_catalog_column(n_rows)
+    print(f"{len(set(column))} distinct strings in {n_rows:.0e} rows")
+
+    cases = {
+        "constructor": lambda: [SpectralType(s) for s in column],
+        "interned": lambda: [SpectralType.interned(s) for s in column],
+    }
+    for name, func in cases.items():
+        SpectralType.interned_cache_clear()
+        time = timeit(func, number=1)
+        print(f"{name:30}: {time:10.2f} s")
+
+    info = SpectralType.interned_cache_info()
+    hit_rate = info.hits / (info.hits + info.misses)
+    print(f"interned cache hit rate: {hit_rate:.2%} "
+          f"({info.currsize} cached instances)")
+
+
+def _regex_parse(spectype: str):
+    """Previous parser, for comparison."""
+    if not (match := SpectralType._regex.fullmatch(spectype)):
+        raise ValueError(f"{spectype!r} is not a valid spectral type.")
+    classes = match.groupdict()
+    return (str(classes["spec_cls"]).upper(),
+            None if classes["sub_cls"] is None else float(classes["sub_cls"]),
+            None if classes["lum_cls"] is None
+            else str(classes["lum_cls"]).upper())
+
+
+def bench_tokenizer(n_rows: int = 1_000_000) -> None:
+    from astar_utils.spectral_types import _tokenize
+
+    column = make_catalog_column(n_rows)
+    noisy = [f"{spectype}e: " for spectype in column]
+
+    cases = {
+        "regex parser": lambda: [_regex_parse(s) for s in column],
+        "tokenizer": lambda: [_tokenize(s) for s in column],
+        "tokenizer (lenient)": lambda: [_tokenize(s, True) for s in noisy],
+        "constructor": lambda: [SpectralType(s) for s in column],
+        "lenient (noisy input)": lambda: [SpectralType.lenient(s)
+                                          for s in noisy],
+    }
+    for name, func in cases.items():
+        time = timeit(func, number=1)
+        print(f"{name:30}: {n_rows / time / 1e6:10.2f} M strings/s")
+
+
+def bench_parse_array(n_rows: int = 10_000_000) -> None:
+    import numpy as np
+
+    column = np.array(make_catalog_column(n_rows))
+    time = timeit(lambda: SpectralType.parse_array(column), number=1)
+    print(f"{'parse_array':30}: {time:10.2f} s for {n_rows:.0e} rows")
+
+
+def bench_sorting(n_rows: int = 1_000_000) -> None:
+    column = make_catalog_column(n_rows)
+    instances = [SpectralType.interned(s) for s in column]
+
+    cases = {
+        "sorted": lambda: sorted(instances),
+        "sorted by sort_key": lambda: sorted(instances,
+                                             key=attrgetter("sort_key")),
+        "compare to str": lambda: [spt < "G2V" for spt in instances],
+    }
+    for name, func in cases.items():
+        time = timeit(func, number=1)
+        print(f"{name:30}: {time:10.2f} s for {n_rows:.0e} rows")
+
+
+def bench_hashing(n_rows: int = 1_000_000) -> None:
+    column = make_catalog_column(n_rows)
+    instances = [SpectralType(s) for s in column]
+
+    def group_by_type():
+        groups = {}
+        for i_row, spt in enumerate(instances):
+            groups.setdefault(spt, []).append(i_row)
+        return groups
+
+    cases = {
+        "set of instances": lambda: set(instances),
+        "group by type": group_by_type,
+        "to codes": lambda: [spt.code for spt in instances],
+    }
+    for name, func in cases.items():
+        time = timeit(func, number=1)
+        print(f"{name:30}: {time:10.2f} s for {n_rows:.0e} rows")
+
+
+def bench_index(n_rows: int = 1_000_000, n_queries: int = 1_000) -> None:
+    from astar_utils.spectral_type_array import SpectralTypeIndex
+
+    column = make_catalog_column(n_rows)
+    instances = [SpectralType.interned(s) for s in column]
+    time = timeit(lambda: SpectralTypeIndex(column), number=1)
+    print(f"{'build index':30}: {time:10.2f} s for {n_rows:.0e} rows")
+    index = SpectralTypeIndex(column)
+
+    def linear_scan():
+        return [i_row for i_row, spt in enumerate(instances)
+                if "F0" <= spt <= "K5" and spt.luminosity_class == "V"]
+
+    cases = {
+        "linear scan (1 query)": (linear_scan, 1),
+        "index range": (lambda: index.range("F0", "K5", "V"), n_queries),
+        "index count": (lambda: index.count("F0", "K5", "V"), n_queries),
+        "index nearest": (lambda: index.nearest("G2.5"), n_queries),
+    }
+    for name, (func, number) in cases.items():
+        time = timeit(func, number=number)
+        print(f"{name:30}: {time / number * 1e3:10.3f} ms/query")
+
+
+if __name__ == "__main__":
+    bench_construction()
+    bench_tokenizer()
+    bench_parse_array()
+    bench_sorting()
+    bench_hashing()
+    bench_index()
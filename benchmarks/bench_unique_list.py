@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Timing benchmarks for unique_list.py."""
+
+from timeit import timeit
+
+from astar_utils import UniqueList
+
+
+def bench_reordering(n_items: int = 50_000, n_moves: int = 10_000) -> None:
+    unilst = UniqueList(range(n_items))
+    step = n_items // n_moves
+
+    def move_to_front():
+        for item in range(0, n_items, step):
+            unilst.append_first(item)
+
+    def lookup_index():
+        for item in range(0, n_items, step):
+            unilst.index(item)
+
+    def remove_and_append():
+        for item in range(0, n_items, step):
+            unilst.remove(item)
+            unilst.append(item)
+
+    for func in (move_to_front, lookup_index, remove_and_append):
+        time = timeit(func, number=1)
+        print(f"{func.__name__:30}: {time / n_moves * 1e6:10.2f} us/op")
+
+
+def bench_positional(n_items: int = 100_000, n_ops: int = 10_000) -> None:
+    unilst = UniqueList(range(n_items))
+    indices = [(item * 7919) % n_items for item in range(n_ops)]
+
+    def insert_in_middle():
+        for item in range(n_ops):
+            unilst.insert(len(unilst) // 2, -item - 1)
+
+    def get_by_index():
+        for index in indices:
+            unilst[index]
+
+    def delete_by_index():
+        for index in indices:
+            del unilst[index]
+
+    for func in (insert_in_middle, get_by_index, delete_by_index):
+        time = timeit(func, number=1)
+        print(f"{func.__name__:30}: {time / n_ops * 1e6:10.2f} us/op")
+
+
+def bench_bulk(n_items: int = 1_000_000) -> None:
+    values = [item % (n_items // 2) for item in range(n_items)]
+    others = [list(range(0, n_items, 3)), list(range(0, n_items, 5))]
+    base = UniqueList(values)
+
+    def one_by_one():
+        unilst = UniqueList()
+        for value in values:
+            unilst.append(value)
+
+    cases = {
+        "append one by one": one_by_one,
+        "extend": lambda: UniqueList(values),
+        "update_first": lambda: base.copy().update_first(others[0]),
+        "remove_many": lambda: base.copy().remove_many(others[0]),
+        "union": lambda: base.union(*others),
+        "intersection": lambda: base.intersection(*others),
+        "difference": lambda: base.difference(*others),
+    }
+    for name, func in cases.items():
+        time = timeit(func, number=1)
+        print(f"{name:30}: {time * 1e3:10.2f} ms for {n_items:.0e} items")
+
+
+if __name__ == "__main__":
+    bench_reordering()
+    bench_positional()
+    bench_bulk(100_000)
+    bench_bulk(1_000_000)
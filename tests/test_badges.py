@@ -9,6 +9,7 @@ import pytest
 from astar_utils.badges import (BadgeReport, Badge, BoolBadge, NumBadge,
                                 StrBadge, MsgOnlyBadge, make_entries)
 from astar_utils.nested_mapping import NestedMapping
+from astar_utils.sqlite_mapping import SQLiteNestedMapping
 
 
 @pytest.fixture(name="temp_dir", scope="module")
@@ -133,6 +134,228 @@ class TestReport:
         assert report.yamlpath.parts[-2] == "_REPORTS"
 
 
+class _Record:
+    """Minimal stand-in for logging.LogRecord as used by BadgeReport."""
+
+    def __init__(self, levelname, message):
+        self.levelname = levelname
+        self.message = message
+
+
+class TestIncrementalReport:
+    @staticmethod
+    def _fill(report):
+        report["!pkg_a.foo"] = "OK"
+        report["!pkg_b.bar.baz"] = True
+        report["!pkg_a.bar"] = 42
+        report.logs.extend([_Record("WARNING", "Oh no!")])
+        report.logs.append(_Record("ERROR", "Oh dear!"))
+
+    def test_same_output_as_in_memory(self, tmp_path):
+        (tmp_path / "mem").mkdir()
+        with BadgeReport(base_path=tmp_path / "mem") as report:
+            self._fill(report)
+        with BadgeReport(base_path=tmp_path / "inc",
+                         incremental=True) as report:
+            self._fill(report)
+            assert report.incremental
+            assert report["!pkg_a.bar"] == 42
+            assert "!pkg_b.bar.baz" in report
+            assert not report.dic
+        for name in ["badges.yaml", "badges.md", "badge_report_log.txt"]:
+            assert (tmp_path / "inc" / name).read_text(encoding="utf-8") \
+                == (tmp_path / "mem" / name).read_text(encoding="utf-8")
+
+    def test_writes_before_exit(self, tmp_path):
+        report = BadgeReport(base_path=tmp_path, incremental=True)
+        self._fill(report)
+        assert len(report.logs) == 2
+        assert "Oh dear!" in report.log_path.read_text(encoding="utf-8")
+        with SQLiteNestedMapping(report.journal_path) as journal:
+            assert journal["!pkg_a.foo"] == "OK"
+        report.close()
+
+    def test_resume_after_crash(self, tmp_path):
+        report = BadgeReport(base_path=tmp_path, incremental=True)
+        self._fill(report)
+        report.close()  # No __exit__, as if the session crashed
+        with BadgeReport(base_path=tmp_path, incremental=True,
+                         resume=True) as report:
+            report["!pkg_c.new"] = "found"
+        data = yaml.safe_load(report.yamlpath.read_text(encoding="utf-8"))
+        assert data == {"pkg_a": {"foo": "OK", "bar": 42},
+                        "pkg_b": {"bar": {"baz": True}},
+                        "pkg_c": {"new": "found"}}
+        logs = report.log_path.read_text(encoding="utf-8")
+        assert logs == "WARNING::Oh no!\nERROR::Oh dear!\n"
+
+    def test_copy_is_in_memory_report(self, tmp_path):
+        with BadgeReport(base_path=tmp_path, incremental=True) as report:
+            self._fill(report)
+            copied = report.copy()
+        assert not copied.incremental
+        assert copied.yamlpath == report.yamlpath
+        assert copied["!pkg_a.bar"] == 42
+        copied["!pkg_a.bar"] = 0
+        with SQLiteNestedMapping(report.journal_path) as journal:
+            assert journal["!pkg_a.bar"] == 42
+
+    def test_starts_fresh_without_resume(self, tmp_path):
+        report = BadgeReport(base_path=tmp_path, incremental=True)
+        self._fill(report)
+        report.close()
+        with BadgeReport(base_path=tmp_path, incremental=True) as report:
+            assert not len(report)
+            report["!pkg_c.new"] = "found"
+        markdown = report.report_path.read_text(encoding="utf-8")
+        assert "## pkg_c" in markdown
+        assert "pkg_a" not in markdown
+
+
+class TestShardedReport:
+    @staticmethod
+    def _write_shard(path, shard, badges, logs=()):
+        with BadgeReport(base_path=path, shard=shard) as report:
+            for key, value in badges.items():
+                report[key] = value
+            report.logs.extend(_Record("WARNING", msg) for msg in logs)
+
+    def test_uses_xdist_worker_name(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+        report = BadgeReport(base_path=tmp_path, incremental=True)
+        report.close()
+        assert report.shard == "gw3"
+        assert report.yamlpath.name == "badges.gw3.yaml"
+        assert report.report_path.name == "badges.gw3.md"
+        assert report.log_path.name == "badge_report_log.gw3.txt"
+        assert report.journal_path.name == "badges_journal.gw3.db"
+
+    def test_not_sharded_outside_xdist(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+        report = BadgeReport(base_path=tmp_path)
+        assert not report.shard
+        assert report.yamlpath.name == "badges.yaml"
+
+    def test_merge_shards(self, tmp_path):
+        self._write_shard(tmp_path, "gw10", {"!pkg_a.baz": 1}, ["late"])
+        self._write_shard(tmp_path, "gw2", {"!pkg_a.foo": "OK",
+                                            "!pkg_b.bar": True}, ["early"])
+        self._write_shard(tmp_path, "gw0", {"!pkg_a.foo": "error"})
+        report = BadgeReport.merge_shards(base_path=tmp_path)
+        assert report["!pkg_a.foo"] == "OK"
+        data = yaml.safe_load(report.yamlpath.read_text(encoding="utf-8"))
+        assert data == {"pkg_a": {"foo": "OK", "baz": 1},
+                        "pkg_b": {"bar": True}}
+        markdown = report.report_path.read_text(encoding="utf-8")
+        assert "## pkg_a" in markdown and "## pkg_b" in markdown
+        logs = report.log_path.read_text(encoding="utf-8")
+        assert logs == "WARNING::early\nWARNING::late\n"
+        assert (tmp_path / "badges.gw2.yaml").exists()
+
+    def test_merge_with_subclasses_of_basic_types(self, tmp_path):
+        class Status(str):
+            pass
+
+        class Ratio(float):
+            pass
+
+        self._write_shard(tmp_path, "gw0", {"!pkg_a.foo": Status("OK"),
+                                            "!pkg_a.bar": Ratio(0.5)})
+        shard_yaml = (tmp_path / "badges.gw0.yaml").read_text(encoding="utf-8")
+        assert "!!python" not in shard_yaml
+        report = BadgeReport.merge_shards(base_path=tmp_path)
+        assert report.dic == {"pkg_a": {"foo": "OK", "bar": 0.5}}
+
+    def test_merge_same_as_serial(self, tmp_path):
+        (tmp_path / "serial").mkdir()
+        with BadgeReport(base_path=tmp_path / "serial", shard="") as report:
+            report["!pkg_a.foo"] = "OK"
+            report["!pkg_b.bar"] = 42
+        (tmp_path / "sharded").mkdir()
+        self._write_shard(tmp_path / "sharded", "gw0", {"!pkg_a.foo": "OK"})
+        self._write_shard(tmp_path / "sharded", "gw1", {"!pkg_b.bar": 42})
+        BadgeReport.merge_shards(base_path=tmp_path / "sharded")
+        for name in ["badges.yaml", "badges.md"]:
+            assert (tmp_path / "sharded" / name).read_text(encoding="utf-8") \
+                == (tmp_path / "serial" / name).read_text(encoding="utf-8")
+
+    def test_remove_shards(self, tmp_path):
+        self._write_shard(tmp_path, "gw0", {"!pkg_a.foo": "OK"}, ["msg"])
+        BadgeReport.merge_shards(base_path=tmp_path, remove_shards=True)
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "badge_report_log.txt", "badges.md", "badges.yaml"]
+
+
+class TestReuseSections:
+    @pytest.fixture(name="render_count")
+    def fixture_render_count(self, monkeypatch):
+        rendered = []
+
+        def counting_make_entries(stream, entry, level=0):
+            if not level:
+                rendered.extend(entry)
+            make_entries(stream, entry, level)
+
+        monkeypatch.setattr("astar_utils.badges.make_entries",
+                            counting_make_entries)
+        return rendered
+
+    @staticmethod
+    def _generate(path, badges, **kwargs):
+        with BadgeReport(base_path=path, shard="", reuse_sections=True,
+                         **kwargs) as report:
+            for key, value in badges.items():
+                report[key] = value
+        return report
+
+    def test_only_changed_sections_rendered(self, tmp_path, render_count):
+        badges = {f"!pkg_{i}.foo": "OK" for i in range(5)}
+        report = self._generate(tmp_path, badges)
+        assert report.hashes_path.exists()
+        assert len(render_count) == 5
+
+        render_count.clear()
+        badges["!pkg_3.foo"] = "error"
+        badges["!pkg_9.bar"] = 42
+        report = self._generate(tmp_path, badges)
+        assert render_count == ["pkg_3", "pkg_9"]
+
+        (tmp_path / "fresh").mkdir()
+        fresh = self._generate(tmp_path / "fresh", badges)
+        assert report.report_path.read_text(encoding="utf-8") \
+            == fresh.report_path.read_text(encoding="utf-8")
+
+    def test_section_order_and_removal(self, tmp_path, render_count):
+        self._generate(tmp_path, {"!pkg_a.foo": "OK", "!pkg_b.foo": "OK",
+                                  "!pkg_c.foo": "OK"})
+        render_count.clear()
+        report = self._generate(tmp_path, {"!pkg_c.foo": "OK",
+                                           "!pkg_a.foo": "OK"})
+        assert not render_count
+        markdown = report.report_path.read_text(encoding="utf-8")
+        assert "pkg_b" not in markdown
+        assert markdown.index("## pkg_c") < markdown.index("## pkg_a")
+
+    def test_modified_report_rendered_again(self, tmp_path, render_count):
+        badges = {"!pkg_a.foo": "OK", "!pkg_b.foo": "OK"}
+        report = self._generate(tmp_path, badges)
+        with report.report_path.open("a", encoding="utf-8") as file:
+            file.write("manual edit")
+        render_count.clear()
+        report = self._generate(tmp_path, badges)
+        assert len(render_count) == 2
+        assert "manual edit" not in report.report_path.read_text(
+            encoding="utf-8")
+
+    def test_incremental_mode(self, tmp_path, render_count):
+        self._generate(tmp_path, {"!pkg_a.foo": "OK", "!pkg_b.foo": "OK"},
+                       incremental=True)
+        render_count.clear()
+        self._generate(tmp_path, {"!pkg_a.foo": "OK", "!pkg_b.foo": True},
+                       incremental=True)
+        assert render_count == ["pkg_b"]
+
+
 class TestMakeEntries:
     def test_does_nothing_if_not_mapping(self):
         with StringIO() as str_stream:
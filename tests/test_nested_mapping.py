@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 """Unit tests for nested_mapping.py."""
 
+from io import StringIO
+from html.parser import HTMLParser
+from copy import deepcopy
+from contextlib import nullcontext
+from collections import ChainMap
 from unittest.mock import Mock
 
 import pytest
@@ -136,6 +141,37 @@ class TestActsLikeDict:
         assert nested_nestmap["!newkey.2"] == "two"
 
 
+class TestCopy:
+    def test_copy_is_equal_but_independent(self, nested_nestmap):
+        copied = nested_nestmap.copy()
+        assert copied == nested_nestmap
+        copied["!bar.bogus.a"] = 0
+        assert nested_nestmap["!bar.bogus.a"] == 42
+
+    def test_copy_shares_immutable_leaves(self):
+        nestmap = NestedMapping({"a": {"b": ("x", "y"), "c": [1, 2]}})
+        copied = nestmap.copy()
+        assert copied["!a.b"] is nestmap["!a.b"]
+        assert copied["!a.c"] is not nestmap["!a.c"]
+
+    def test_deepcopy_keeps_class_and_title(self, basic_yaml):
+        nestmap = RecursiveNestedMapping(basic_yaml, title="MyNestMap")
+        copied = deepcopy(nestmap)
+        assert isinstance(copied, RecursiveNestedMapping)
+        assert copied.title == "MyNestMap"
+        assert copied.dic == nestmap.dic
+        assert copied.dic is not nestmap.dic
+
+    def test_copy_preserves_shared_references_and_cycles(self):
+        shared = {"x": 1}
+        nestmap = NestedMapping({"a": {"b": shared, "c": shared}})
+        nestmap["!a.d"] = nestmap.dic["a"]
+        copied = nestmap.copy()
+        assert copied["!a.b"] is copied["!a.c"]
+        assert copied["!a.b"] is not shared
+        assert copied.dic["a"]["d"] is copied.dic["a"]
+
+
 class TestRecursiveUpdate:
     def test_updates_normal_recursive_dicts(self):
         nestmap = NestedMapping()
@@ -239,6 +275,70 @@ NestedMapping contents:
         assert "<li>" in html
 
 
+class TestLimitedRepresentation:
+    def test_max_depth_collapses_submappings(self, nested_nestmap):
+        with StringIO() as str_stream:
+            nested_nestmap.write_string(str_stream, max_depth=1)
+            output = str_stream.getvalue()
+        assert "├─bar: {...}" in output
+        assert "bogus" not in output
+
+    def test_max_items_per_node(self, nested_nestmap):
+        with StringIO() as str_stream:
+            nested_nestmap.write_string(str_stream, max_items_per_node=2)
+            output = str_stream.getvalue()
+        assert output.endswith("└─... (2 more)")
+        assert "moo" not in output
+
+    def test_max_chars(self, nested_nestmap):
+        with StringIO() as str_stream:
+            nested_nestmap.write_string(str_stream, max_chars=40)
+            output = str_stream.getvalue()
+        assert len(output) == 43
+        assert output.endswith("...")
+
+    def test_no_limits_reached_gives_full_str(self, nested_nestmap):
+        with StringIO() as str_stream:
+            nested_nestmap.write_string(str_stream, max_depth=5,
+                                        max_items_per_node=5, max_chars=1000)
+            assert str_stream.getvalue() == str(nested_nestmap)
+
+    def test_html_collapses_beyond_max_depth(self, nested_nestmap):
+        with StringIO() as str_stream:
+            nested_nestmap.write_html(str_stream, max_depth=1)
+            html = str_stream.getvalue()
+        assert "<details><summary>... (2 items)</summary></details>" in html
+        assert "bogus" not in html
+
+    @pytest.mark.parametrize("max_chars", [10, 100, 150, 200, 250, 300])
+    def test_html_max_chars_closes_all_tags(self, nested_nestmap, max_chars):
+        with StringIO() as str_stream:
+            nested_nestmap.write_html(str_stream, max_chars=max_chars)
+            html = str_stream.getvalue()
+        assert "<em>...</em>" in html
+        assert html.endswith("</details>\n")
+        parser = _TagBalanceParser()
+        parser.feed(html)
+        assert not parser.open_tags
+        assert not parser.errors
+
+
+class _TagBalanceParser(HTMLParser):
+    """Check that all HTML elements are closed in the right order."""
+
+    def __init__(self):
+        super().__init__()
+        self.open_tags = []
+        self.errors = []
+
+    def handle_starttag(self, tag, attrs):
+        self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.open_tags or self.open_tags.pop() != tag:
+            self.errors.append(tag)
+
+
 class TestRecursiveNestedMapping:
     @pytest.mark.parametrize(("key", "result"), (("bar", "!foo"),
                                                  ("bar!", "a")))
@@ -284,6 +384,124 @@ class TestRecursiveNestedMapping:
              })
         assert rnm["!foo.b!"] == "!bar.y"
 
+    def test_infinite_loop_reports_chain(self):
+        rnm = RecursiveNestedMapping({"a": "!b", "b": "!c", "c": "!b"})
+        with pytest.raises(RecursionError) as excinfo:
+            rnm["a!"]
+        assert "!b -> !c -> !b" in str(excinfo.value)
+
+    def test_long_chain_doesnt_hit_recursion_limit(self):
+        rnm = RecursiveNestedMapping(
+            {f"k{i}": f"!k{i + 1}" for i in range(5000)} | {"k5000": 42})
+        assert rnm["k0!"] == 42
+
+    def test_caches_resolved_values(self):
+        rnm = RecursiveNestedMapping({"a": "!b", "b": "!c", "c": 42,
+                                      "d": {"e": 1}})
+        with rnm.caching():
+            rnm["d"]  # Reading a plain sub-dict doesn't disable caching
+            assert rnm["a!"] == 42
+            assert rnm._resolve_cache == {
+                "a": ("!c", 42), "!b": ("!c", 42), "!c": ("!c", 42)}
+        assert not hasattr(rnm, "_resolve_cache")
+
+    def test_doesnt_cache_outside_caching_block(self):
+        rnm = RecursiveNestedMapping({"a": "!b", "b": 42})
+        assert rnm["a!"] == 42
+        assert not hasattr(rnm, "_resolve_cache")
+
+    def test_cache_is_invalidated_on_change(self):
+        rnm = RecursiveNestedMapping({"a": "!b", "b": "!c", "c": 42})
+        with rnm.caching():
+            assert rnm["a!"] == 42
+            rnm["c"] = 7
+            assert rnm["a!"] == 7
+            del rnm["c"]
+            assert rnm["a!"] == "!c"
+            rnm.update({"c": "yeet"})
+            assert rnm["a!"] == "yeet"
+
+    def test_sees_changes_to_source_dict_and_dic(self):
+        source = {"a": {"b": "!a.c", "c": 1}}
+        rnm = RecursiveNestedMapping(source)
+        assert rnm["!a.b!"] == 1
+        source["a"]["c"] = 2
+        assert rnm["!a.b!"] == 2
+        rnm.dic["a"]["c"] = 3
+        assert rnm["!a.b!"] == 3
+
+    def test_sees_changes_to_returned_subdict(self):
+        rnm = RecursiveNestedMapping({"a": {"ref": "!x.y"}, "x": {"y": 1}})
+        assert rnm["!a.ref!"] == 1
+        rnm["!x"]["y"] = 2
+        assert rnm["!a.ref!"] == 2
+        rnm["x"]["y"] = 3
+        assert rnm["!a.ref!"] == 3
+
+    def test_caches_are_dropped_after_caching_block(self):
+        rnm = RecursiveNestedMapping({"a": {"b": "!a.c", "c": 1}})
+        with rnm.caching():
+            assert rnm["!a.b!"] == 1
+        rnm.dic["a"]["c"] = 2
+        with rnm.caching():
+            assert rnm["!a.b!"] == 2
+
+    def test_cache_sees_changes_via_returned_submapping(self):
+        rnm = RecursiveNestedMapping(
+            {"a": {"ref": "!x.y.z"}, "x": {"y": {"z": 1}}})
+        with rnm.caching():
+            submap = rnm["!x"]
+            assert rnm["!a.ref!"] == 1
+            submap["!y.z"] = 2
+            assert rnm["!a.ref!"] == 2
+
+    def test_returned_submapping_sees_changes_to_parent(self):
+        rnm = RecursiveNestedMapping(
+            {"x": {"y": {"z": 1}, "ref": "!y.z"}})
+        submap = rnm["!x"]
+        assert submap["ref!"] == 1
+        rnm["!x.y.z"] = 2
+        assert submap["ref!"] == 2
+
+
+class TestResolveAll:
+    def test_resolves_all_references(self):
+        rnm = RecursiveNestedMapping(
+            {"foo": {"a": "!bar.x", "b": "!bar.y", "c": 1},
+             "bar": {"x": 42, "y": "!foo.a"},
+             "baz": "!nope"})
+        resolved = rnm.resolve_all()
+        assert type(resolved) is NestedMapping
+        assert resolved.dic == {"foo": {"a": 42, "b": 42, "c": 1},
+                                "bar": {"x": 42, "y": 42},
+                                "baz": "!nope"}
+
+    def test_resolves_references_to_submappings(self):
+        rnm = RecursiveNestedMapping(
+            {"foo": {"a": "!bar.y", "b": "!bar"},
+             "bar": {"x": 42, "y": {"z": "!bar.x"}}})
+        resolved = rnm.resolve_all()
+        assert resolved["!foo.a"] == {"z": 42}
+        assert resolved["!foo.b.y.z"] == 42
+
+    def test_resolves_chain_map(self, simple_nestchainmap):
+        resolved = simple_nestchainmap.resolve_all()
+        assert resolved.dic == {"foo": {"a": "bogus", "b": "bogus",
+                                        "c": "baz"}}
+
+    def test_chain_map_follows_precedence(self):
+        ncm = NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": "!foo.b", "b": 1}}),
+            RecursiveNestedMapping({"foo": {"b": 2, "c": "!foo.b"}}),
+            {"bar": 3})
+        resolved = ncm.resolve_all()
+        assert resolved.dic == {"bar": 3, "foo": {"b": 1, "c": 1, "a": 1}}
+
+    def test_raises_on_cycle(self):
+        rnm = RecursiveNestedMapping({"a": "!b", "b": "!a"})
+        with pytest.raises(RecursionError):
+            rnm.resolve_all()
+
 
 class TestNestedChainMap:
     @pytest.mark.parametrize(("key", "result"), (("!foo.a", "!foo.b"),
@@ -306,6 +524,21 @@ class TestNestedChainMap:
         with pytest.raises(RecursionError):
             ncm["!foo.a!"]
 
+    def test_cache_is_invalidated_on_change_in_any_map(self,
+                                                       simple_nestchainmap):
+        with simple_nestchainmap.caching():
+            assert simple_nestchainmap["!foo.a!"] == "bogus"
+            assert simple_nestchainmap._resolve_cache
+            simple_nestchainmap.maps[1]["!foo.b"] = "changed"
+            assert simple_nestchainmap["!foo.a!"] == "changed"
+
+    def test_doesnt_cache_with_dict_maps(self):
+        ncm = NestedChainMap(RecursiveNestedMapping({"a": "!b"}), {"!b": 1})
+        with ncm.caching():
+            assert ncm["a!"] == 1
+            ncm.maps[1]["!b"] = 2
+            assert ncm["a!"] == 2
+
     def test_repr_pretty(self, simple_nestchainmap):
         printer = Mock()
         simple_nestchainmap._repr_pretty_(printer, True)
@@ -318,6 +551,340 @@ class TestNestedChainMap:
         assert "<details>" in html
 
 
+class TestNestedChainMapKeyIndex:
+    @pytest.fixture
+    def layered_ncm(self):
+        return NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": 1}}),
+            RecursiveNestedMapping({"bar": {"b": 2}}),
+            {"baz": 3},
+            RecursiveNestedMapping({"foo": {"c": 4}, 5: {"x": 6}}),
+        )
+
+    @pytest.mark.parametrize("caching", [False, True])
+    @pytest.mark.parametrize(("key", "indices"),
+                             [("!foo.a", [0, 2, 3]), ("bar", [1, 2]),
+                              ("baz", [2]), ("!5.x", [2, 3]), ("5", [2]),
+                              ("!foo.a!", [0, 2, 3]), ("bogus", [2])])
+    def test_only_probes_maps_with_key(self, layered_ncm, key, indices,
+                                       caching):
+        with layered_ncm.caching() if caching else nullcontext():
+            assert [i for i, _ in layered_ncm._candidate_maps(key)] == indices
+
+    def test_lookups_work(self, layered_ncm):
+        assert layered_ncm["!foo.c"] == 4
+        assert layered_ncm["baz"] == 3
+        assert layered_ncm["!5.x"] == 6
+        assert "!bar.b" in layered_ncm
+        assert "!bar.c" not in layered_ncm
+        with pytest.raises(KeyError):
+            layered_ncm["bogus"]
+
+    def test_collects_submaps_only_from_maps_with_key(self, layered_ncm):
+        foo = layered_ncm["foo"]
+        assert [mapping.title for mapping in foo.maps] == ["[0] mapping",
+                                                           "[3] mapping"]
+
+    def test_index_updates_on_change(self, layered_ncm):
+        with layered_ncm.caching():
+            assert "!bar.x" not in layered_ncm
+            layered_ncm.maps[3]["!bar.x"] = 7
+            assert layered_ncm["!bar.x"] == 7
+
+    def test_sees_changes_to_dic_of_maps(self):
+        ncm = NestedChainMap(NestedMapping({"a": 1}), NestedMapping({"b": 2}))
+        assert ncm["a"] == 1
+        ncm.maps[1].dic["c"] = 3
+        assert ncm["c"] == 3
+        ncm.maps[0].dic.update({"b": 20})
+        assert ncm["b"] == 20
+        assert ncm.which_layer("b") == 0
+
+    @pytest.mark.parametrize("caching", [False, True])
+    def test_int_fallback_follows_precedence(self, caching):
+        ncm = NestedChainMap(NestedMapping({1: {"x": 1}}),
+                             NestedMapping({"1": {"x": 2}}))
+        with ncm.caching() if caching else nullcontext():
+            assert ncm["!1.x"] == 1
+            assert ncm.resolve_many(["!1.x"]) == {"!1.x": 1}
+            assert ncm.which_layer("!1.x") == 0
+
+    def test_index_works_with_new_child_and_parents(self, layered_ncm):
+        child = layered_ncm.new_child(RecursiveNestedMapping({"foo": 0}))
+        assert child["foo"] == 0
+        assert child.parents["!foo.a"] == 1
+        assert child.parents.parents["!foo.c"] == 4
+
+
+class TestNestedChainMapFlatten:
+    @pytest.fixture
+    def layered_ncm(self):
+        return NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": 1, "b": {"x": 1}}}),
+            RecursiveNestedMapping({"foo": {"a": 2, "c": "!foo.a"},
+                                    "bar": {"y": 2}}),
+            RecursiveNestedMapping({"foo": {"b": {"z": 3}}, "baz": 5}),
+        )
+
+    def test_merges_with_chain_map_precedence(self, layered_ncm):
+        flat = layered_ncm.flatten()
+        assert isinstance(flat, NestedMapping)
+        assert flat.dic == {"foo": {"b": {"z": 3, "x": 1}, "a": 1,
+                                    "c": "!foo.a"},
+                            "baz": 5, "bar": {"y": 2}}
+        assert all(flat[key] == layered_ncm[key] for key in flat)
+
+    def test_doesnt_modify_maps(self, layered_ncm):
+        layered_ncm.flatten()["!foo.b.x"] = 42
+        assert layered_ncm.maps[0]["!foo.b.x"] == 1
+        assert "!foo.b.x" not in layered_ncm.maps[2]
+
+    def test_returns_cached_if_unchanged(self, layered_ncm):
+        with layered_ncm.caching():
+            assert layered_ncm.flatten() is layered_ncm.flatten()
+
+    def test_only_remerges_changed_subtrees(self, layered_ncm):
+        with layered_ncm.caching():
+            old_bar = layered_ncm.flatten().dic["bar"]
+            layered_ncm.maps[0]["!foo.a"] = 0
+            flat = layered_ncm.flatten()
+            assert flat["!foo.a"] == 0
+            assert flat.dic["bar"] is old_bar
+
+    def test_leaf_in_first_map_hides_later_submapping(self):
+        ncm = NestedChainMap(NestedMapping({"x": 1}),
+                             NestedMapping({"x": {"q": 1}}))
+        assert ncm["!x.q"] == 1
+        assert "!x.q" in ncm
+        flat = ncm.flatten()
+        assert flat.dic == {"x": 1}
+        assert "!x.q" not in flat
+        assert len(ncm) == 2
+
+    def test_submapping_in_first_map_hides_later_leaf(self):
+        ncm = NestedChainMap(NestedMapping({"x": {"q": 1}}),
+                             NestedMapping({"x": 1}))
+        assert ncm.flatten().dic == {"x": {"q": 1}}
+        assert len(ncm) == 2
+
+    def test_works_with_dict_maps(self):
+        ncm = NestedChainMap(RecursiveNestedMapping({"foo": {"a": 1}}),
+                             {"foo": {"b": 2}, "bar": 3})
+        assert ncm.flatten().dic == {"foo": {"b": 2, "a": 1}, "bar": 3}
+        ncm.maps[1]["bar"] = 4
+        assert ncm.flatten()["bar"] == 4
+
+
+class TestNestedChainMapIterLen:
+    @pytest.fixture
+    def layered_ncm(self):
+        return NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": 1, "b": {"x": 1}}, "c": 0}),
+            RecursiveNestedMapping({"foo": {"a": 2, "c": "!foo.a"},
+                                    "bar": {"y": 2}}),
+            RecursiveNestedMapping({"foo": {"b": {"z": 3}}, "baz": 5}),
+        )
+
+    def test_iter_same_as_base_class(self, layered_ncm):
+        assert list(layered_ncm) == list(ChainMap.__iter__(layered_ncm))
+
+    def test_iter_same_as_base_class_with_dict(self, layered_ncm):
+        layered_ncm.maps.append({"baz": 1, "bogus": 2})
+        assert list(layered_ncm) == list(ChainMap.__iter__(layered_ncm))
+
+    def test_iter_is_lazy(self, layered_ncm):
+        assert next(iter(layered_ncm)) == "!foo.b.z"
+
+    def test_len_same_as_base_class(self, layered_ncm):
+        assert len(layered_ncm) == ChainMap.__len__(layered_ncm) == 7
+
+    @pytest.mark.parametrize("caching", [False, True])
+    def test_len_updates_on_change(self, layered_ncm, caching):
+        with layered_ncm.caching() if caching else nullcontext():
+            assert len(layered_ncm) == 7
+            layered_ncm.maps[0]["!foo.b.z"] = 4
+            assert len(layered_ncm) == 7
+            layered_ncm.maps[2]["!foo.new"] = 4
+            assert len(layered_ncm) == 8
+            del layered_ncm.maps[1]["bar"]
+            assert len(layered_ncm) == 7
+
+    def test_len_is_cached_only_in_caching_block(self, layered_ncm):
+        assert len(layered_ncm) == 7
+        assert "_len" not in vars(layered_ncm)
+        with layered_ncm.caching():
+            assert len(layered_ncm) == 7
+            assert "_len" in vars(layered_ncm)
+        assert "_len" not in vars(layered_ncm)
+
+    def test_len_with_dict(self, layered_ncm):
+        layered_ncm.maps.append({"baz": 1, "bogus": 2})
+        assert len(layered_ncm) == 8
+
+    def test_len_with_same_map_twice(self):
+        nestmap = RecursiveNestedMapping({"foo": {"a": 1}, "bar": 2})
+        ncm = NestedChainMap(nestmap, nestmap)
+        assert len(ncm) == ChainMap.__len__(ncm) == 2
+
+
+class TestNestedChainMapChangesViaSubmappings:
+    @pytest.fixture
+    def layered_ncm(self):
+        return NestedChainMap(
+            RecursiveNestedMapping({"inst": {"a": {"b": 1}},
+                                    "ref": "!inst.a.b"}),
+            RecursiveNestedMapping({"inst": {"x": {"y": 2}}}),
+        )
+
+    @staticmethod
+    def _check_caches(ncm, **expected):
+        assert len(ncm) == len(list(ncm)) == ChainMap.__len__(ncm)
+        assert ncm.flatten().dic == expected["flat"]
+        assert ncm["ref!"] == expected["ref"]
+        assert ncm.which_layer(expected["new_key"]) == expected["layer"]
+
+    @pytest.mark.parametrize("caching", [False, True])
+    def test_changes_via_returned_submapping(self, layered_ncm, caching):
+        with layered_ncm.caching() if caching else nullcontext():
+            assert len(layered_ncm) == 3
+            layered_ncm.flatten()
+            assert layered_ncm["ref!"] == 1
+            submap = layered_ncm["!inst"]
+            submap["!a.b"] = 99
+            submap["!a.c"] = 5
+            self._check_caches(
+                layered_ncm, ref=99, new_key="!inst.a.c", layer=0,
+                flat={"inst": {"x": {"y": 2}, "a": {"b": 99, "c": 5}},
+                      "ref": "!inst.a.b"})
+
+    def test_changes_via_dic_of_maps(self, layered_ncm):
+        assert len(layered_ncm) == 3
+        layered_ncm.flatten()
+        assert layered_ncm.which_layer("!inst.a.b") == 0
+        layered_ncm.maps[1].dic["c"] = 3
+        layered_ncm.maps[1].dic["inst"]["a"] = {"b": 7}
+        del layered_ncm.maps[0].dic["inst"]["a"]
+        assert layered_ncm["ref!"] == 7
+        self._check_caches(
+            layered_ncm, ref=7, new_key="!inst.a.b", layer=1,
+            flat={"inst": {"x": {"y": 2}, "a": {"b": 7}},
+                  "ref": "!inst.a.b", "c": 3})
+
+    def test_changes_via_plain_subdict_of_map(self, layered_ncm):
+        assert len(layered_ncm) == 3
+        layered_ncm.flatten()
+        assert layered_ncm["ref!"] == 1
+        layered_ncm.maps[0]["!inst.a"]["b"] = 99
+        layered_ncm.maps[1]["!inst.x"]["z"] = 3
+        self._check_caches(
+            layered_ncm, ref=99, new_key="!inst.x.z", layer=1,
+            flat={"inst": {"x": {"y": 2, "z": 3}, "a": {"b": 99}},
+                  "ref": "!inst.a.b"})
+
+    def test_changes_via_nested_chain_map(self, layered_ncm):
+        layered_ncm.maps[1]["!inst.a.q"] = 0
+        assert len(layered_ncm) == 4
+        submap = layered_ncm["!inst"]
+        assert isinstance(submap, NestedChainMap)
+        submap["!a.c"] = 5
+        assert len(layered_ncm) == len(list(layered_ncm)) == 5
+        assert layered_ncm.flatten()["!inst.a.c"] == 5
+
+
+class TestNestedChainMapResolveMany:
+    @pytest.fixture
+    def layered_ncm(self):
+        return NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": "!bar.x", "c": "!bar.y"}}),
+            RecursiveNestedMapping({"foo": {"a": 2, "b": 3}}),
+            {"baz": "!foo.b"},
+            RecursiveNestedMapping({"bar": {"x": "!bar.y", "y": 42,
+                                            "z": {"q": 1}, 1: "one"}}),
+        )
+
+    def test_same_as_getitem(self, layered_ncm):
+        keys = ["!foo.a", "!foo.a!", "!foo.b", "!foo.c!", "baz!", "!bar.1",
+                "!bar.x!", "!bar.z", "foo"]
+        result = layered_ncm.resolve_many(keys)
+        assert list(result) == keys
+        for key in keys:
+            if key == "foo":
+                assert result[key].maps == layered_ncm[key].maps
+            else:
+                assert result[key] == layered_ncm[key]
+
+    def test_raises_if_missing(self, layered_ncm):
+        with pytest.raises(KeyError):
+            layered_ncm.resolve_many(["!foo.a", "!foo.bogus"])
+
+    def test_raises_on_cycle(self):
+        ncm = NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": "!foo.b"}}),
+            RecursiveNestedMapping({"foo": {"b": "!foo.a"}})
+        )
+        with pytest.raises(RecursionError):
+            ncm.resolve_many(["!foo.a!"])
+
+
+class TestNestedChainMapProvenance:
+    @pytest.fixture
+    def layered_ncm(self):
+        return NestedChainMap(
+            RecursiveNestedMapping({"foo": {"a": "!bar.x"}}),
+            RecursiveNestedMapping({"foo": {"a": 2, "b": 3}}),
+            RecursiveNestedMapping({"bar": {"x": 42, 1: "one"}}),
+        )
+
+    @pytest.mark.parametrize(("key", "layer"),
+                             [("!foo.a", 0), ("!foo.b", 1), ("!bar.x", 2),
+                              ("foo", 0), ("!bar.1", 2), ("!foo.a!", 2),
+                              ("!foo.b!", 1)])
+    def test_which_layer(self, layered_ncm, key, layer):
+        assert layered_ncm.which_layer(key) == layer
+
+    def test_which_layer_raises_if_missing(self, layered_ncm):
+        with pytest.raises(KeyError):
+            layered_ncm.which_layer("!foo.c")
+
+    def test_provenance(self, layered_ncm):
+        keys = ["!foo.a!", "!foo.b", "!foo.c"]
+        assert layered_ncm.provenance(keys) == {"!foo.a!": 2, "!foo.b": 1,
+                                                "!foo.c": None}
+
+    @pytest.mark.parametrize("caching", [False, True])
+    def test_cache_is_invalidated(self, layered_ncm, caching):
+        with layered_ncm.caching() if caching else nullcontext():
+            assert layered_ncm.which_layer("!foo.a!") == 2
+            layered_ncm.maps[1]["!bar.x"] = 0
+            assert layered_ncm.which_layer("!foo.a!") == 1
+
+    def test_sees_changes_to_dic_of_maps(self, layered_ncm):
+        assert layered_ncm.which_layer("!foo.b") == 1
+        layered_ncm.maps[0].dic["foo"]["b"] = 0
+        assert layered_ncm.which_layer("!foo.b") == 0
+
+
+class TestNestedChainMapCopy:
+    def test_copy_copies_only_first_map(self, simple_nestchainmap):
+        copied = simple_nestchainmap.copy()
+        assert copied.maps[0] is not simple_nestchainmap.maps[0]
+        assert copied.maps[1] is simple_nestchainmap.maps[1]
+        copied.maps[0]["!foo.a"] = "changed"
+        assert simple_nestchainmap["!foo.a"] == "!foo.b"
+
+    def test_copy_of_dict_map_is_independent(self):
+        ncm = NestedChainMap({"foo": {"a": 1}}, {"bar": 2})
+        copied = ncm.copy()
+        copied.maps[0]["foo"]["a"] = 5
+        assert ncm["foo"]["a"] == 1
+
+    def test_deepcopy_copies_all_maps(self, simple_nestchainmap):
+        copied = deepcopy(simple_nestchainmap)
+        assert all(new is not old for new, old
+                   in zip(copied.maps, simple_nestchainmap.maps))
+        assert copied["!foo.a!"] == "bogus"
+
+
 class TestNestedChainMapSubdictKeyInMultipleLevels:
     def test_returns_chainmap_if_found_in_multiple(self, simple_nestchainmap):
         assert isinstance(simple_nestchainmap["foo"], NestedChainMap)
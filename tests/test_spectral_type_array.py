@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for spectral_type_array.py."""
+
+import operator
+
+import pytest
+
+from astar_utils import SpectralType
+
+np = pytest.importorskip("numpy")
+from astar_utils.spectral_type_array import (  # noqa: E402
+    SpectralTypeArray, SpectralTypeIndex, SpectralTypeTable)
+
+
+SPECTYPES = ["G2V", "A0", "A", "A5V", "M4III", "K7.5", "B9IV", "A0V", "F",
+             "O8I", "G2III", "K", "a0v", "M4"]
+
+
+@pytest.fixture(name="spts")
+def fixture_spts():
+    return SpectralTypeArray(SPECTYPES)
+
+
+class TestSpectralTypeArray:
+    def test_len_and_shape(self, spts):
+        assert len(spts) == len(SPECTYPES)
+        assert spts.shape == (len(SPECTYPES),)
+
+    def test_ten_bytes_per_element(self, spts):
+        assert spts.nbytes == 10 * len(SPECTYPES)
+
+    def test_tolist_and_getitem(self, spts):
+        expected = [str(SpectralType(spt)) for spt in SPECTYPES]
+        assert spts.tolist() == expected
+        assert spts[4] == SpectralType("M4III")
+        assert isinstance(spts[-1], SpectralType)
+        assert list(spts) == [SpectralType(spt) for spt in SPECTYPES]
+
+    def test_slicing_and_boolean_mask(self, spts):
+        assert spts[2:4].tolist() == ["A", "A5V"]
+        later = spts[spts > "K0"]
+        assert isinstance(later, SpectralTypeArray)
+        assert later.tolist() == ["M4III", "K7.5", "K", "M4"]
+
+    def test_argsort_matches_sorted(self, spts):
+        expected = sorted(SpectralType(spt) for spt in SPECTYPES)
+        assert list(spts[spts.argsort()]) == expected
+
+    @pytest.mark.parametrize("oper", [operator.lt, operator.le, operator.gt,
+                                      operator.ge, operator.eq, operator.ne])
+    @pytest.mark.parametrize("other", ["A0", "A", "A0III", "G2V", "M4"])
+    def test_compares_like_instances(self, spts, oper, other):
+        expected = [oper(SpectralType(spt), SpectralType(other))
+                    for spt in SPECTYPES]
+        assert oper(spts, other).tolist() == expected
+        assert oper(spts, SpectralType(other)).tolist() == expected
+
+    @pytest.mark.parametrize("oper", [operator.lt, operator.le, operator.gt,
+                                      operator.ge, operator.eq, operator.ne])
+    @pytest.mark.parametrize("other", ["A0", "A", "A0III", "G2V", "M4"])
+    def test_compares_with_scalar_on_left(self, spts, oper, other):
+        expected = [oper(SpectralType(other), SpectralType(spt))
+                    for spt in SPECTYPES]
+        assert oper(SpectralType(other), spts).tolist() == expected
+        assert oper(other, spts).tolist() == expected
+
+    @pytest.mark.parametrize("oper", [operator.lt, operator.eq, operator.ne])
+    def test_compares_element_wise(self, spts, oper):
+        others = SPECTYPES[::-1]
+        expected = [oper(SpectralType(spt), SpectralType(other))
+                    for spt, other in zip(SPECTYPES, others)]
+        assert oper(spts, SpectralTypeArray(others)).tolist() == expected
+        assert oper(spts, others).tolist() == expected
+
+    def test_numerical_classes(self, spts):
+        instances = [SpectralType(spt) for spt in SPECTYPES]
+        assert spts.numerical_spectral_class.tolist() == [
+            spt.numerical_spectral_class for spt in instances]
+        assert spts.numerical_luminosity_class.tolist() == [
+            spt.numerical_luminosity_class for spt in instances]
+
+    def test_fails_on_invalid_comparison(self, spts):
+        with pytest.raises(TypeError):
+            spts < ["X"] * len(SPECTYPES)
+
+    def test_as_numpy_array(self, spts):
+        arr = np.asarray(spts)
+        assert arr.dtype.names == ("spectral_class", "spectral_subclass",
+                                   "luminosity_class")
+        assert SpectralTypeArray(arr).tolist() == spts.tolist()
+
+
+class TestMaskedSpectralTypeArray:
+    @pytest.fixture(name="masked")
+    def fixture_masked(self):
+        return SpectralTypeArray(
+            np.ma.array(["G2V", "", "A0", "M4"], mask=[0, 1, 0, 0]))
+
+    def test_mask(self, masked):
+        assert masked.mask.tolist() == [False, True, False, False]
+        assert masked.tolist() == ["G2V", None, "A0", "M4"]
+        assert masked[1] is np.ma.masked
+
+    def test_derived_values_are_masked(self, masked):
+        assert (masked < "K0").tolist() == [True, None, True, False]
+        assert masked.numerical_spectral_class.mask.tolist() == [
+            False, True, False, False]
+
+    def test_argsort_puts_masked_last(self, masked):
+        assert masked.argsort().tolist() == [2, 0, 3, 1]
+
+    def test_additional_mask(self):
+        spts = SpectralTypeArray(["A0", "G2"], mask=[False, True])
+        assert spts.tolist() == ["A0", None]
+        assert spts[:1].mask.tolist() == [False]
+
+
+class TestSpectralTypeIndex:
+    @pytest.fixture(name="index")
+    def fixture_index(self):
+        return SpectralTypeIndex(SPECTYPES)
+
+    def _linear_range(self, minimum, maximum, lum_classes=None):
+        return [i_spt for _, i_spt in sorted(
+            (SpectralType(spt).sort_key, i_spt)
+            for i_spt, spt in enumerate(SPECTYPES)
+            if minimum <= SpectralType(spt) <= maximum and (
+                lum_classes is None
+                or SpectralType(spt).luminosity_class in lum_classes))]
+
+    @pytest.mark.parametrize(("minimum", "maximum"),
+                             [("F0", "K5"), ("A", "A"), ("O", "M9.9"),
+                              ("G5", "G9"), ("A0", "A5")])
+    def test_range_matches_linear_scan(self, index, minimum, maximum):
+        expected = self._linear_range(minimum, maximum)
+        assert index.range(minimum, maximum).tolist() == expected
+        assert index.count(minimum, maximum) == len(expected)
+
+    @pytest.mark.parametrize("lum_classes", ["V", ("III", "V"), ("i",)])
+    def test_range_by_luminosity_class(self, index, lum_classes):
+        expected = self._linear_range(
+            "O", "M9.9", [lum.upper() for lum in lum_classes])
+        result = index.range("O", "M9.9", luminosity_class=lum_classes)
+        assert result.tolist() == expected
+
+    def test_open_and_exclusive_range(self, index):
+        assert index.range(maximum="A").tolist() == [9, 6, 1, 7, 12, 2, 3]
+        assert index.range("A0", "A9", inclusive=(False, False)).tolist() \
+            == [2, 3]
+        assert len(index.range()) == len(SPECTYPES)
+
+    def test_numerical_boundaries(self, index):
+        assert index.range(20, 25).tolist() == index.range("A0", "A").tolist()
+
+    @pytest.mark.parametrize(("spectype", "expected"),
+                             [("K7", "K7.5"), ("O", "O8I"), ("F2", "F"),
+                              ("M9", "M4III")])
+    def test_nearest(self, index, spectype, expected):
+        assert SPECTYPES[index.nearest(spectype)] == expected
+
+    def test_nearest_with_luminosity_class(self, index):
+        assert SPECTYPES[index.nearest("B0", luminosity_class="V")] == "A0V"
+
+    def test_nearest_fails_on_empty(self):
+        with pytest.raises(ValueError):
+            SpectralTypeIndex([]).nearest("A0")
+
+    def test_histogram(self, index):
+        expected = [sum(SpectralType(spt).spectral_class == spec_cls
+                        for spt in SPECTYPES)
+                    for spec_cls in SpectralType.spectral_classes]
+        assert index.histogram().tolist() == expected
+
+    def test_histogram_with_edges(self, index):
+        counts = index.histogram(["A0", "A5", "G0", "M9.9"],
+                                 luminosity_class="V")
+        assert counts.tolist() == [2, 1, 1]
+
+    def test_ignores_masked(self):
+        spts = SpectralTypeArray(["A0", "G2", "K1"], mask=[False, True, False])
+        index = SpectralTypeIndex(spts)
+        assert len(index) == 2
+        assert index.range().tolist() == [0, 2]
+
+    def test_fails_on_invalid_luminosity_class(self, index):
+        with pytest.raises(ValueError):
+            index.range(luminosity_class="VII")
+
+
+class TestNumericalRoundTrip:
+    def test_from_numerical_inverts_numerical_classes(self, spts):
+        new = SpectralTypeArray.from_numerical(
+            spts.numerical_spectral_class, spts.numerical_luminosity_class)
+        assert (new == spts).all()
+        assert new.numerical_spectral_class.tolist() == \
+            spts.numerical_spectral_class.tolist()
+
+    def test_from_numerical_rounds_and_clips(self):
+        new = SpectralTypeArray.from_numerical([42.04, 42.06, -1., 1000.])
+        assert new.tolist() == ["G2", "G2.1", "O0", "Y9.9"]
+
+    def test_from_numerical_masks_nan(self):
+        new = SpectralTypeArray.from_numerical([42., np.nan], [np.nan, 3])
+        assert new.tolist() == ["G2", None]
+
+    def test_to_strings(self, spts):
+        assert spts.to_strings().tolist() == spts.tolist()
+
+    def test_to_strings_masked(self):
+        spts = SpectralTypeArray(["A0", "G2.5"], mask=[True, False])
+        assert spts.to_strings().tolist() == ["", "G2.5"]
+
+
+class TestSpectralTypeTable:
+    @pytest.fixture(name="table")
+    def fixture_table(self):
+        return SpectralTypeTable(
+            ["A0V", "G0V", "M0V", "G0III", "K0III", "B0I"],
+            teff=[9600, 5900, 3800, 5200, 4700, 26000],
+            template=["a0v", "g0v", "m0v", "g0iii", "k0iii", "b0i"])
+
+    def test_len(self, table):
+        assert len(table) == 6
+
+    def test_interpolates_per_luminosity_class(self, table):
+        result = table("teff", ["A0V", "F0V", "G0", "G5III", "K0III"])
+        assert result.tolist() == [9600, 7750, 5900, 4950, 4700]
+
+    def test_clips_outside_range(self, table):
+        assert table("teff", ["O5V", "M9V"]).tolist() == [9600, 3800]
+
+    def test_nearest_for_strings(self, table):
+        result = table("template", ["A8V", "F6V", "K5III", "M0"])
+        assert result.tolist() == ["a0v", "g0v", "k0iii", "m0v"]
+
+    def test_nearest_luminosity_class(self, table):
+        # No rows for IV or II, ties go to the higher luminosity class
+        assert table("teff", ["G0IV"]).tolist() == [5900]
+        assert table("template", ["A0II"]).tolist() == ["g0iii"]
+        assert table("template", ["A0I"]).tolist() == ["b0i"]
+
+    def test_masked_query(self, table):
+        spts = SpectralTypeArray(["A0V", "G0V"], mask=[False, True])
+        assert table("teff", spts).tolist() == [9600, None]
+
+    def test_invert(self, table):
+        result = table.invert("teff", [9600, 7750, 3000])
+        assert result.tolist() == ["A0V", "F0V", "M0V"]
+        result = table.invert("teff", [4950], luminosity_class="III")
+        assert result.tolist() == ["G5III"]
+
+    def test_fails_on_wrong_length(self):
+        with pytest.raises(ValueError):
+            SpectralTypeTable(["A0V", "G2V"], teff=[9600])
+
+    def test_fails_on_masked_reference(self):
+        with pytest.raises(ValueError):
+            SpectralTypeTable(SpectralTypeArray(["A0", "G2"], mask=[0, 1]),
+                              teff=[1, 2])
+
+
+class TestCodes:
+    def test_codes_match_instances(self, spts):
+        assert spts.codes.dtype == np.uint16
+        assert spts.codes.tolist() == [SpectralType(spt).code
+                                       for spt in SPECTYPES]
+
+    def test_from_codes_round_trip(self, spts):
+        assert SpectralTypeArray.from_codes(spts.codes).tolist() == \
+            spts.tolist()
+
+    def test_masked_codes(self):
+        codes = np.ma.array([SpectralType("G2V").code, 60000], mask=[0, 1])
+        spts = SpectralTypeArray.from_codes(codes)
+        assert spts.tolist() == ["G2V", None]
+        assert spts.codes.mask.tolist() == [False, True]
+
+    def test_fails_on_invalid_codes(self):
+        with pytest.raises(ValueError):
+            SpectralTypeArray.from_codes([0, 60000])
@@ -3,6 +3,7 @@
 
 import pytest
 import operator
+from itertools import product
 
 from astar_utils import SpectralType
 
@@ -107,6 +108,12 @@ class TestComparesTypes:
         with pytest.raises(TypeError):
             operation(SpectralType("A0V"), 42)
 
+    @pytest.mark.parametrize("other", [42, None, ["A0V"]])
+    def test_not_equal_to_invalid_type(self, other):
+        assert not SpectralType("A0V") == other
+        assert SpectralType("A0V") != other
+        assert not other == SpectralType("A0V")
+
 
 class TestComparesStr:
     def test_lt(self):
@@ -186,3 +193,203 @@ class TestUpperLowerCase:
         spt_a = SpectralType("M2.5III")
         spt_b = SpectralType(mixcase)
         assert spt_a == spt_b
+
+
+class TestInterned:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        SpectralType.interned_cache_clear()
+
+    def test_returns_identical_instance(self):
+        spt = SpectralType.interned("G2V")
+        assert spt == SpectralType("G2V")
+        assert SpectralType.interned("G2V") is spt
+
+    @pytest.mark.parametrize("mixcase", ["m2.5III", "M2.5iii", "m2.5iii"])
+    def test_ignores_case(self, mixcase):
+        spt = SpectralType.interned("M2.5III")
+        assert SpectralType.interned(mixcase) is spt
+        assert str(spt) == "M2.5III"
+
+    def test_accepts_instance(self):
+        spt = SpectralType.interned("K7")
+        assert SpectralType.interned(SpectralType("k7")) is spt
+
+    def test_fails_on_invalid(self):
+        with pytest.raises(ValueError):
+            SpectralType.interned("X2")
+
+    def test_reports_hits(self):
+        for spectype in ["A0V", "a0v", "G2", "A0V"]:
+            SpectralType.interned(spectype)
+        info = SpectralType.interned_cache_info()
+        assert info.hits == 2
+        assert info.misses == 2
+        assert info.currsize == 2
+
+
+class TestParseArray:
+    @pytest.fixture(autouse=True)
+    def np(self):
+        return pytest.importorskip("numpy")
+
+    @pytest.mark.parametrize("spectype", ["A0V", "G2", "K7.5III", "M", "b3ii"])
+    def test_matches_instances(self, spectype):
+        parsed = SpectralType.parse_array([spectype])[0]
+        spt = SpectralType(spectype)
+        assert parsed["spectral_class"] == spt._spec_cls_idx
+        if spt.spectral_subclass is None:
+            assert parsed["spectral_subclass"] != parsed["spectral_subclass"]
+        else:
+            assert parsed["spectral_subclass"] == spt.spectral_subclass
+        if spt.luminosity_class is None:
+            assert parsed["luminosity_class"] == -1
+        else:
+            assert parsed["luminosity_class"] == spt._lum_cls_idx
+
+    def test_keeps_shape(self, np):
+        spectypes = np.array(["A0V", "G2", "A0V", "M4III"] * 3).reshape(3, 4)
+        parsed = SpectralType.parse_array(spectypes)
+        assert parsed.shape == (3, 4)
+        assert (parsed[:, 0] == parsed[0, 2]).all()
+
+    def test_parses_bytes(self, np):
+        parsed = SpectralType.parse_array(np.array([b"F5IV", b"F5IV"]))
+        assert parsed["spectral_class"].tolist() == [3, 3]
+        assert parsed["luminosity_class"].tolist() == [3, 3]
+
+    def test_skips_masked(self, np):
+        spectypes = np.ma.array(["A0V", "bogus", "G2"], mask=[0, 1, 0])
+        parsed = SpectralType.parse_array(spectypes)
+        assert parsed.mask.tolist() == [(False,) * 3, (True,) * 3,
+                                        (False,) * 3]
+        assert parsed["spectral_class"][2] == 4
+
+    def test_fails_on_invalid(self):
+        with pytest.raises(ValueError, match="X2"):
+            SpectralType.parse_array(["A0V", "X2"])
+
+
+class TestSortKey:
+    @pytest.mark.parametrize("spectype", ["A0V", "G2", "K7.5III", "M", "O"])
+    def test_sort_key_is_numerical_class(self, spectype):
+        spt = SpectralType(spectype)
+        assert spt.sort_key == spt.numerical_spectral_class
+        assert spt.sort_key == spt._comp_tuple[0] * 10 + spt._comp_tuple[1]
+
+    def test_sort_key_not_in_repr_or_equality(self):
+        spt = SpectralType("G2V")
+        assert repr(spt) == "SpectralType('G2V')"
+        assert hash(spt) == hash(SpectralType("g2v"))
+
+    def test_sort_key_is_frozen(self):
+        spt = SpectralType("G2V")
+        with pytest.raises(AttributeError):
+            spt.sort_key = 0.
+
+    def test_pickle_round_trip(self):
+        import pickle
+        spt = SpectralType("K7.5III")
+        new = pickle.loads(pickle.dumps(spt))
+        assert new == spt
+        assert new.sort_key == spt.sort_key
+
+    def test_string_operands_are_cached(self):
+        SpectralType.interned_cache_clear()
+        spts = [SpectralType(spt) for spt in ["A0", "G2", "M4", "K1"]]
+        assert sum(spt < "G0" for spt in spts) == 1
+        assert SpectralType.interned_cache_info().misses == 1
+
+
+class TestTokenizer:
+    @staticmethod
+    def _regex_parse(spectype):
+        match = SpectralType._regex.fullmatch(spectype)
+        if match is None:
+            return None
+        classes = match.groupdict()
+        return (classes["spec_cls"].upper(),
+                None if classes["sub_cls"] is None
+                else float(classes["sub_cls"]),
+                None if classes["lum_cls"] is None
+                else classes["lum_cls"].upper())
+
+    def test_same_grammar_as_regex(self):
+        spec_classes = ["A", "m", "y", "X", "d", "", " "]
+        sub_classes = ["", "0", "9", "2.5", "9.9", "2.", ".5", "25", "2.55",
+                       "\u0663", "-1"]
+        lum_classes = ["", "I", "ii", "iIi", "IV", "v", "VI", "IIII", "Ia",
+                       "\u0131", " ", "\n"]
+        for parts in product(spec_classes, sub_classes, lum_classes):
+            spectype = "".join(parts)
+            expected = self._regex_parse(spectype)
+            if expected is None:
+                with pytest.raises(ValueError):
+                    SpectralType(spectype)
+                continue
+            spt = SpectralType(spectype)
+            assert (spt.spectral_class, spt.spectral_subclass,
+                    spt.luminosity_class) == expected
+
+
+class TestLenient:
+    @pytest.mark.parametrize(("spectype", "expected"),
+                             [("A0V", "A0V"), (" a0v\n", "A0V"),
+                              ("B2 IVe", "B2IV"), ("K0IIIbCN-1", "K0III"),
+                              ("G8-K0III", "G8"), ("M4.5e", "M4.5"),
+                              ("O9.7Iab", "O9.7I"), ("F5V:", "F5V"),
+                              ("A2.", "A2"), ("Kp", "K")])
+    def test_ignores_noise(self, spectype, expected):
+        assert SpectralType.lenient(spectype) == SpectralType(expected)
+        assert str(SpectralType.lenient(spectype)) == expected
+
+    @pytest.mark.parametrize("spectype", ["", "DA2", "  ", "WN7", "?"])
+    def test_returns_none_for_invalid(self, spectype):
+        assert SpectralType.lenient(spectype) is None
+
+    def test_returns_interned_instance(self):
+        assert SpectralType.lenient("G2Ve") is SpectralType.interned("G2V")
+
+
+class TestCode:
+    @pytest.mark.parametrize("spectype", ["A0V", "G2.5", "K", "M9.9III", "OI",
+                                          "Y0", "B0.1IV"])
+    def test_round_trip(self, spectype):
+        spt = SpectralType(spectype)
+        new = SpectralType.from_code(spt.code)
+        assert str(new) == str(spt)
+        assert new.code == spt.code
+
+    def test_fits_uint16(self):
+        spt = SpectralType("Y9.9")
+        assert 0 <= spt.code < 2**16
+
+    def test_distinct_codes(self):
+        spectypes = [f"{spec}{sub}{lum}" for spec in "OBAFGKMLTY"
+                     for sub in ["", "0", "0.5", "9.9"]
+                     for lum in ["", "I", "II", "III", "IV", "V"]]
+        codes = {SpectralType(spectype).code for spectype in spectypes}
+        assert len(codes) == len(spectypes)
+
+    def test_codes_of_equal_instances_may_differ(self):
+        assert SpectralType("K7.5III") == SpectralType("K7.5")
+        assert SpectralType("K7.5III").code != SpectralType("K7.5").code
+
+    @pytest.mark.parametrize(("spectype_a", "spectype_b"),
+                             [("K7.5III", "k7.5iii"),
+                              ("A0", "A0V"),
+                              ("A", "A5III"),
+                              ("M4.0", "M4")])
+    def test_hash_consistent_with_eq(self, spectype_a, spectype_b):
+        spt_a = SpectralType(spectype_a)
+        spt_b = SpectralType(spectype_b)
+        assert spt_a == spt_b
+        assert hash(spt_a) == hash(spt_b)
+        assert len({spt_a, spt_b}) == 1
+
+    @pytest.mark.parametrize("code", [-1, 10 << 10, 1 << 15,
+                                      (2 << 10) | (100 << 3),
+                                      (2 << 10) | (5 << 3) | 5])
+    def test_fails_on_invalid_code(self, code):
+        with pytest.raises(ValueError):
+            SpectralType.from_code(code)
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for sqlite_mapping.py."""
+
+import pytest
+
+from astar_utils.nested_mapping import (NestedMapping, NestedChainMap,
+                                        RecursiveNestedMapping)
+from astar_utils.sqlite_mapping import SQLiteNestedMapping
+
+
+@pytest.fixture
+def nested_dict():
+    return {"foo": 5, "bar": {"bogus": {"a": 42, "b": 69},
+                              "baz": "meh"},
+            "moo": "yolo",
+            "yeet": {"x": 0, "y": 420}}
+
+
+@pytest.fixture
+def sqlite_nestmap(nested_dict, tmp_path):
+    with SQLiteNestedMapping(tmp_path / "test.db", nested_dict) as snm:
+        yield snm
+
+
+class TestActsLikeNestedMapping:
+    @pytest.mark.parametrize("key", ["foo", "moo", "!bar.baz",
+                                     "!bar.bogus.a", "!yeet.y"])
+    def test_retrieves_same_values(self, sqlite_nestmap, nested_dict, key):
+        assert sqlite_nestmap[key] == NestedMapping(nested_dict)[key]
+
+    def test_returns_plain_dict_for_simple_key(self, sqlite_nestmap,
+                                               nested_dict):
+        assert sqlite_nestmap["bar"] == nested_dict["bar"]
+
+    def test_returns_nestmap_for_nested_bangkey(self, sqlite_nestmap):
+        assert isinstance(sqlite_nestmap["!bar"], NestedMapping)
+        assert sqlite_nestmap["!bar"]["!bogus.b"] == 69
+
+    def test_contains(self, sqlite_nestmap):
+        assert "!bar.bogus" in sqlite_nestmap
+        assert "!bar.bogus.c" not in sqlite_nestmap
+        assert "!foo.bogus" not in sqlite_nestmap
+
+    def test_len_counts_leaves(self, sqlite_nestmap, nested_dict):
+        assert len(sqlite_nestmap) == len(NestedMapping(nested_dict))
+
+    def test_iter_yields_same_keys(self, sqlite_nestmap, nested_dict):
+        assert set(sqlite_nestmap) == set(NestedMapping(nested_dict))
+
+    def test_dic_rebuilds_contents(self, sqlite_nestmap, nested_dict):
+        assert sqlite_nestmap.dic == nested_dict
+
+    def test_can_resolve_int_subkey(self, sqlite_nestmap):
+        sqlite_nestmap["newkey"] = {1: "one", 2: "two"}
+        assert sqlite_nestmap["!newkey.2"] == "two"
+        assert sqlite_nestmap["newkey"] == {1: "one", 2: "two"}
+
+    def test_throws_when_setting_value_to_subdict(self, sqlite_nestmap):
+        with pytest.raises(KeyError) as excinfo:
+            sqlite_nestmap["!foo.bogus"] = 3
+        assert "overwritten with" in str(excinfo.value)
+
+    def test_throws_when_getting_from_value(self, sqlite_nestmap):
+        with pytest.raises(KeyError) as excinfo:
+            sqlite_nestmap["!yeet.x.l"]
+        assert "retrieved from" in str(excinfo.value)
+
+    @pytest.mark.parametrize(["key", "full_err"],
+                             [("bogus", False),
+                              ("!foo.bogus", True),
+                              ("!yeet.x.l.m", True),
+                              ("!yeet.z.l.m", False)])
+    def test_throws_when_deleting_nonexisting_key(self, key, full_err,
+                                                  sqlite_nestmap):
+        with pytest.raises(KeyError) as excinfo:
+            del sqlite_nestmap[key]
+        if full_err:
+            assert "deleted from" in str(excinfo.value)
+        else:
+            assert key in str(excinfo.value)
+
+    def test_can_delete_subtree(self, sqlite_nestmap):
+        del sqlite_nestmap["!bar.bogus"]
+        assert "!bar.bogus.a" not in sqlite_nestmap
+        assert sqlite_nestmap["!bar.baz"] == "meh"
+
+    def test_set_mapping_replaces_subtree(self, sqlite_nestmap):
+        sqlite_nestmap["!bar.bogus"] = {"c": 1}
+        assert sqlite_nestmap["!bar.bogus"] == {"c": 1}
+
+    def test_top_level_items(self):
+        snm = SQLiteNestedMapping(new_dict={"b": {"x": 1}, "a": 2,
+                                            3: {"y": {"z": 4}}})
+        snm["!b.q"] = 5
+        assert list(snm.top_level_items()) == [
+            ("b", {"x": 1, "q": 5}), ("a", 2), (3, {"y": {"z": 4}})]
+
+
+class TestSameAsNestedMapping:
+    """Run the same operations on the in-memory and the SQLite class."""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def make_mapping(self, request):
+        def make(new_dict):
+            if request.param == "memory":
+                return NestedMapping(new_dict)
+            return SQLiteNestedMapping(new_dict=new_dict)
+        return make
+
+    @pytest.fixture
+    def warnings(self, monkeypatch):
+        # Not caplog, because test_loggers.py reloads the logging module
+        messages = []
+
+        def warning(msg, *args):
+            messages.append(msg % args)
+
+        for module in ("nested_mapping", "sqlite_mapping"):
+            monkeypatch.setattr(f"astar_utils.{module}.logger.warning",
+                                warning)
+        return messages
+
+    def test_no_int_fallback_for_simple_key(self, make_mapping):
+        mapping = make_mapping({1: "one", "a": {1: "sub"}})
+        assert mapping[1] == "one"
+        assert mapping["!a.1"] == "sub"
+        assert "1" not in mapping
+        with pytest.raises(KeyError):
+            mapping["1"]
+
+    def test_empty_submapping_not_counted(self, make_mapping):
+        mapping = make_mapping({"x": {}, "y": 1, "z": {"a": {}}})
+        assert len(mapping) == 1
+        assert list(mapping) == ["y"]
+        assert mapping["x"] == {}
+        assert mapping.dic == {"x": {}, "y": 1, "z": {"a": {}}}
+
+    def test_delete_last_leaf_keeps_empty_parent(self, make_mapping):
+        mapping = make_mapping({"a": {"b": {"c": 1}, "d": 2}})
+        del mapping["!a.b.c"]
+        assert "!a.b" in mapping
+        assert mapping["!a.b"] == {}
+        assert mapping.dic == {"a": {"b": {}, "d": 2}}
+        assert list(mapping) == ["!a.d"]
+        mapping["!a.b.e"] = 3
+        assert mapping.dic == {"a": {"b": {"e": 3}, "d": 2}}
+
+    def test_update_with_empty_mapping_keeps_subtree(self, make_mapping,
+                                                     warnings):
+        mapping = make_mapping({"x": {"a": 1}})
+        mapping.update({"x": {}})
+        assert mapping.dic == {"x": {"a": 1}}
+        mapping.update({"alias": "x"})
+        assert mapping.dic == {"x": {"a": 1}}
+        mapping.update({"alias": "y"})
+        assert mapping.dic == {"x": {"a": 1}, "y": {}}
+        assert not warnings
+
+    def test_update_fills_empty_mapping(self, make_mapping):
+        mapping = make_mapping({"x": {}})
+        mapping.update({"x": {"a": 1}})
+        assert mapping.dic == {"x": {"a": 1}}
+        assert len(mapping) == 1
+
+    @pytest.mark.parametrize("value", [5, 0, "", None])
+    def test_warns_overwriting_dict_with_value(self, make_mapping, warnings,
+                                               value):
+        mapping = make_mapping({"x": {"a": 1}})
+        mapping.update({"x": value})
+        assert mapping.dic == {"x": value}
+        assert len(warnings) == 1
+        assert warnings[0].startswith("Overwriting dict")
+
+    def test_warns_overwriting_value_with_dict(self, make_mapping, warnings):
+        mapping = make_mapping({"x": 5})
+        mapping.update({"x": {"a": 1}})
+        assert mapping.dic == {"x": {"a": 1}}
+        assert len(warnings) == 1
+        assert warnings[0].startswith("Overwriting non-dict")
+
+
+class TestUpdate:
+    def test_updates_normal_recursive_dicts(self):
+        snm = SQLiteNestedMapping()
+        snm["name"] = {"value": "ELT"}
+        snm.update({"name": {"type": "str"}})
+        assert snm["name"] == {"value": "ELT", "type": "str"}
+
+    def test_updates_yaml_alias_recursive_dicts(self):
+        snm = SQLiteNestedMapping(
+            new_dict={"alias": "OBS", "properties": {"temperature": 100}})
+        snm.update({"alias": "OBS",
+                    "properties": {"temperature": 42, "humidity": 0.75}})
+        assert snm["!OBS.temperature"] == 42
+        assert snm["OBS"]["humidity"] == 0.75
+
+    def test_updates_bang_properties(self):
+        snm = SQLiteNestedMapping()
+        snm.update({"!SIM.someglobal": True})
+        assert snm["!SIM.someglobal"]
+
+    def test_overwrites_value_with_dict(self):
+        snm = SQLiteNestedMapping(new_dict={"a": {"b": 5}})
+        snm.update({"a": {"b": {"c": 1}}})
+        assert snm["a"] == {"b": {"c": 1}}
+
+    def test_overwrites_dict_with_value(self):
+        snm = SQLiteNestedMapping(new_dict={"a": {"b": {"c": 1}}})
+        snm.update({"a": {"b": 4}})
+        assert snm["a"] == {"b": 4}
+
+
+class TestPersistence:
+    def test_reopened_file_keeps_contents(self, tmp_path, nested_dict):
+        with SQLiteNestedMapping(tmp_path / "test.db", nested_dict):
+            pass
+        with SQLiteNestedMapping(tmp_path / "test.db") as snm:
+            assert snm.dic == nested_dict
+
+    def test_failed_batch_is_rolled_back(self):
+        snm = SQLiteNestedMapping(new_dict={"a": 1})
+        with pytest.raises(RuntimeError):
+            with snm.batch():
+                snm["b"] = 2
+                raise RuntimeError
+        assert "b" not in snm
+        assert snm["a"] == 1
+
+    def test_copy_is_independent_in_memory_database(self, tmp_path):
+        with SQLiteNestedMapping(tmp_path / "test.db", {"a": {"b": 1}}) as snm:
+            with snm.batch():
+                snm["!a.c"] = 2
+                copied = snm.copy()
+            copied["!a.b"] = 5
+            assert snm["!a.b"] == 1
+        assert copied.filename == ":memory:"
+        assert copied.dic == {"a": {"b": 5, "c": 2}}
+        copied.close()
+
+
+class TestInNestedChainMap:
+    @pytest.fixture
+    def layered_ncm(self, monkeypatch):
+        sqlite = SQLiteNestedMapping(
+            new_dict={"foo": {"a": 1, "b": "!bar.x"}, "bar": {"x": 2}, 5: 6})
+        monkeypatch.setattr(SQLiteNestedMapping, "dic", property(
+            lambda self: pytest.fail("Full database loaded")))
+        yield NestedChainMap(RecursiveNestedMapping({"foo": {"a": 0}}),
+                             sqlite)
+        sqlite.close()
+
+    def test_lookups_dont_load_full_database(self, layered_ncm):
+        assert layered_ncm["!foo.a"] == 0
+        assert layered_ncm["!foo.b!"] == 2
+        assert layered_ncm["!5"] == 6
+        assert layered_ncm.which_layer("!bar.x") == 1
+        assert layered_ncm.resolve_many(["!foo.a", "!foo.b!", "!bar.x"]) == {
+            "!foo.a": 0, "!foo.b!": 2, "!bar.x": 2}
+        with layered_ncm.caching():
+            assert layered_ncm["!foo.b!"] == 2
+
+    def test_iteration_doesnt_load_full_database(self, layered_ncm):
+        assert len(layered_ncm) == len(list(layered_ncm)) == 4
+        assert layered_ncm.flatten()["!foo.b"] == "!bar.x"
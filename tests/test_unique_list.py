@@ -3,7 +3,8 @@
 
 import pytest
 
-from astar_utils.unique_list import UniqueList
+from astar_utils.unique_list import (UniqueList, SortedUniqueList,
+                                     UniqueListView)
 
 
 @pytest.fixture
@@ -86,6 +87,78 @@ class TestUniqueness:
         assert list(simple_unilst) == ["bar", "foo", "baz"]
 
 
+class TestManyOperations:
+    def test_append_first_many_times(self):
+        unilst = UniqueList(range(100))
+        for item in range(99, -1, -2):
+            unilst.append_first(item)
+        expected = list(range(1, 100, 2)) + list(range(0, 100, 2))
+        assert list(unilst) == expected
+        assert all(unilst[i] == item for i, item in enumerate(expected))
+        assert all(unilst.index(item) == i for i, item in enumerate(expected))
+
+    def test_remove_and_insert_in_between(self):
+        unilst = UniqueList(range(100))
+        for item in range(0, 100, 3):
+            unilst.remove(item)
+        unilst.insert(1, "gap")
+        unilst.insert(3, "nogap")
+        expected = [item for item in range(100) if item % 3]
+        expected.insert(1, "gap")
+        expected.insert(3, "nogap")
+        assert list(unilst) == expected
+        assert unilst[-1] == 98
+
+    def test_pop_all(self):
+        unilst = UniqueList(range(50))
+        popped = [unilst.pop(0 if i % 2 else -1) for i in range(50)]
+        assert not unilst
+        assert sorted(popped) == list(range(50))
+
+
+class TestSmallBlocks:
+    @pytest.fixture(autouse=True)
+    def small_blocks(self, monkeypatch):
+        monkeypatch.setattr(UniqueList, "_block_size", 4)
+
+    def test_insert_in_middle_splits_blocks(self):
+        unilst = UniqueList(range(10))
+        expected = list(range(10))
+        for item in range(100, 130):
+            unilst.insert(len(unilst) // 2, item)
+            expected.insert(len(expected) // 2, item)
+        assert len(unilst._blocks) > 3
+        assert list(unilst) == expected
+        assert list(reversed(unilst)) == expected[::-1]
+        assert [unilst[i] for i in range(len(expected))] == expected
+        assert all(unilst.index(item) == i for i, item in enumerate(expected))
+
+    def test_append_first_with_key(self):
+        unilst = UniqueList(["a", "B", "c"], key=str.casefold)
+        for item in "DEFGHIJKLMb":
+            unilst.append_first(item)
+        assert list(unilst) == list("bMLKJIHGFEDac")
+        assert unilst[1] == "M"
+        assert unilst.get("m") == "M"
+        assert list(unilst[8:1:-3]) == ["F", "I", "L"]
+
+    def test_removals_drop_empty_and_sparse_blocks(self):
+        unilst = UniqueList(range(100))
+        for item in range(0, 100, 2):
+            unilst.remove(item)
+        del unilst[10:20]
+        expected = list(range(1, 100, 2))
+        del expected[10:20]
+        assert list(unilst) == expected
+        assert all(unilst[i] == item for i, item in enumerate(expected))
+        assert len(unilst._blocks) <= len(expected) // 4 + 2
+        while unilst:
+            del unilst[len(unilst) // 2]
+        assert not unilst._blocks
+        unilst.insert(5, "foo")
+        assert list(unilst) == ["foo"]
+
+
 class TestOtherListMethods:
     def test_pop(self, simple_unilst):
         popped = simple_unilst.pop(-1)
@@ -100,7 +173,314 @@ class TestOtherListMethods:
         simple_unilst += ["bar", "bogus", "foo", "bogus"]
         assert list(simple_unilst) == ["foo", "bar", "baz", "bogus"]
 
+    def test_index(self, simple_unilst):
+        assert simple_unilst.index("baz") == 2
+        simple_unilst.append_first("bogus")
+        assert simple_unilst.index("baz") == 3
+
+    def test_index_raises_for_missing(self, simple_unilst):
+        with pytest.raises(ValueError):
+            simple_unilst.index("bogus")
+
+    def test_index_respects_start_stop(self, simple_unilst):
+        assert simple_unilst.index("bar", 1, 2) == 1
+        with pytest.raises(ValueError):
+            simple_unilst.index("bar", 2)
+        with pytest.raises(ValueError):
+            simple_unilst.index("baz", 0, -1)
+
+    def test_remove_raises_for_missing(self, simple_unilst):
+        with pytest.raises(ValueError):
+            simple_unilst.remove("bogus")
+
+    def test_negative_index(self, simple_unilst):
+        assert simple_unilst[-1] == "baz"
+        assert simple_unilst[-3] == "foo"
+
+    @pytest.mark.parametrize("index", [3, -4])
+    def test_index_out_of_range(self, simple_unilst, index):
+        with pytest.raises(IndexError):
+            simple_unilst[index]
+
+    def test_reversed(self, simple_unilst):
+        assert list(reversed(simple_unilst)) == ["baz", "bar", "foo"]
+
+    def test_clear(self, simple_unilst):
+        simple_unilst.clear()
+        assert not simple_unilst
+        simple_unilst.append("foo")
+        assert list(simple_unilst) == ["foo"]
+
     def test_reverse_throws(self, simple_unilst):
         # TODO: should it though?
         with pytest.raises(TypeError):
             simple_unilst.reverse()
+
+
+class TestBulkOperations:
+    @pytest.mark.parametrize("initial", [[], ["foo"], list(range(100))])
+    def test_extend(self, initial):
+        unilst = UniqueList(initial)
+        unilst.extend(["foo", 3, "bar", 3, 200])
+        expected = list(dict.fromkeys(initial + ["foo", 3, "bar", 200]))
+        assert list(unilst) == expected
+        assert [unilst[i] for i in range(len(expected))] == expected
+
+    def test_extend_with_self(self, simple_unilst):
+        simple_unilst.extend(simple_unilst)
+        assert list(simple_unilst) == ["foo", "bar", "baz"]
+
+    @pytest.mark.parametrize("initial", [["foo", "bar", "baz"],
+                                         list(range(100))])
+    def test_update_first(self, initial):
+        unilst = UniqueList(initial)
+        unilst.update_first(["baz", "bogus", 42, "baz"])
+        front = ["baz", "bogus", 42]
+        assert list(unilst) == front + [item for item in initial
+                                        if item not in front]
+
+    @pytest.mark.parametrize("initial", [["foo", "bar", "baz"],
+                                         list(range(100))])
+    def test_remove_many(self, initial):
+        unilst = UniqueList(initial)
+        unilst.remove_many(["bar", "bogus", 42])
+        assert list(unilst) == [item for item in initial
+                                if item not in ("bar", 42)]
+
+    def test_union(self, simple_unilst):
+        new = simple_unilst.union(["bogus", "foo"], ("meh",))
+        assert list(new) == ["foo", "bar", "baz", "bogus", "meh"]
+        assert list(simple_unilst) == ["foo", "bar", "baz"]
+
+    def test_intersection(self, simple_unilst):
+        new = simple_unilst.intersection(["baz", "foo", "meh"], {"foo", "baz"})
+        assert list(new) == ["foo", "baz"]
+
+    def test_difference(self, simple_unilst):
+        new = simple_unilst.difference(["baz"], UniqueList(["foo"]))
+        assert list(new) == ["bar"]
+        assert isinstance(new, UniqueList)
+
+
+class TestKeyFunction:
+    def test_uniqueness_by_key(self):
+        unilst = UniqueList(["Foo", "bar", "FOO", "Bar", "baz"],
+                            key=str.casefold)
+        assert list(unilst) == ["Foo", "bar", "baz"]
+        assert "BAZ" in unilst
+        assert unilst.index("foo") == 0
+
+    def test_append_existing_key_is_ignored(self):
+        unilst = UniqueList(["Foo"], key=str.casefold)
+        unilst.append("foo")
+        assert list(unilst) == ["Foo"]
+
+    def test_get(self):
+        unilst = UniqueList(["Foo", "bar"], key=str.casefold)
+        assert unilst.get("foo") == "Foo"
+        assert unilst.get("bogus") is None
+        assert unilst.get("bogus", 42) == 42
+
+    def test_remove_by_key(self):
+        unilst = UniqueList(["Foo", "bar"], key=str.casefold)
+        unilst.remove("FOO")
+        assert list(unilst) == ["bar"]
+
+    def test_set_operations_keep_key(self):
+        unilst = UniqueList(["Foo", "bar"], key=str.casefold)
+        new = unilst.union(["BAR", "baz"])
+        assert list(new) == ["Foo", "bar", "baz"]
+        assert list(new.difference(["FOO"])) == ["bar", "baz"]
+        assert list(new.intersection(["BAZ"])) == ["baz"]
+
+
+class TestSortedUniqueList:
+    def test_init_sorts_and_deduplicates(self):
+        sul = SortedUniqueList([3, 1, 2, 3, 1])
+        assert list(sul) == [1, 2, 3]
+        assert list(reversed(sul)) == [3, 2, 1]
+        assert len(sul) == 3
+
+    def test_append_inserts_sorted(self):
+        sul = SortedUniqueList([1, 5])
+        sul.append(3)
+        sul.insert(0, 7)
+        sul.append(3)
+        assert list(sul) == [1, 3, 5, 7]
+        assert sul[1] == 3
+        assert sul[-1] == 7
+
+    def test_extend(self):
+        sul = SortedUniqueList(range(0, 100, 2))
+        sul.extend([5, 3, 4])
+        sul.extend(range(100))
+        assert list(sul) == list(range(100))
+
+    def test_index_and_remove(self):
+        sul = SortedUniqueList(["c", "a", "b"])
+        assert sul.index("b") == 1
+        with pytest.raises(ValueError):
+            sul.index("b", 2)
+        sul.remove("a")
+        assert list(sul) == ["b", "c"]
+        with pytest.raises(ValueError):
+            sul.remove("a")
+
+    def test_delitem(self):
+        sul = SortedUniqueList(range(10))
+        del sul[0]
+        del sul[::2]
+        assert list(sul) == [2, 4, 6, 8]
+        assert 3 not in sul
+        sul.append(3)
+        assert list(sul) == [2, 3, 4, 6, 8]
+
+    def test_remove_many(self):
+        sul = SortedUniqueList(range(100))
+        sul.remove_many([5, 500, 50])
+        assert list(sul) == [i for i in range(100) if i not in (5, 50)]
+        sul.remove_many(range(90))
+        assert list(sul) == list(range(90, 100))
+
+    def test_with_key(self):
+        sul = SortedUniqueList(["b", "C", "a", "c"], key=str.casefold)
+        assert list(sul) == ["a", "b", "C"]
+        assert sul.get("c") == "C"
+        assert "A" in sul
+
+    def test_cannot_move_to_front(self):
+        sul = SortedUniqueList([1, 2])
+        with pytest.raises(TypeError):
+            sul.append_first(3)
+        with pytest.raises(TypeError):
+            sul.update_first([3])
+
+    def test_bisect(self):
+        sul = SortedUniqueList([10, 20, 30])
+        assert sul.bisect_left(20) == 1
+        assert sul.bisect_right(20) == 2
+        assert sul.bisect_left(25) == 2
+
+    @pytest.mark.parametrize(("args", "expected"), [
+        ((), [10, 20, 30, 40]),
+        ((20, 30), [20, 30]),
+        ((20, 30, (False, False)), []),
+        ((15, None), [20, 30, 40]),
+        ((None, 30, (True, False)), [10, 20]),
+    ])
+    def test_irange(self, args, expected):
+        sul = SortedUniqueList([40, 10, 30, 20])
+        assert list(sul.irange(*args)) == expected
+
+    def test_set_operations_stay_sorted(self):
+        sul = SortedUniqueList([3, 1])
+        new = sul.union([2, 0])
+        assert isinstance(new, SortedUniqueList)
+        assert list(new) == [0, 1, 2, 3]
+        assert list(new.difference([1])) == [0, 2, 3]
+        assert list(sul.copy()) == [1, 3]
+
+
+class TestSlicing:
+    @pytest.mark.parametrize("index", [slice(2, 7), slice(None, None, 3),
+                                       slice(8, 1, -2), slice(-3, None),
+                                       slice(5, 2), slice(None, None, -1)])
+    def test_slice_view_matches_list(self, index):
+        unilst = UniqueList(range(10))
+        view = unilst[index]
+        expected = list(range(10))[index]
+        assert isinstance(view, UniqueListView)
+        assert list(view) == expected
+        assert list(reversed(view)) == expected[::-1]
+        assert len(view) == len(expected)
+        assert [view[i] for i in range(len(expected))] == expected
+
+    def test_slice_view_with_gaps(self):
+        unilst = UniqueList(range(10))
+        unilst.remove(3)
+        unilst.remove(0)
+        unilst.append_first("foo")
+        assert list(unilst[1:6]) == [1, 2, 4, 5, 6]
+        assert list(unilst[::-4]) == [9, 5, "foo"]
+
+    def test_nested_view(self):
+        unilst = UniqueList(range(20))
+        assert list(unilst[2:18][::3][1:]) == list(range(20))[2:18][::3][1:]
+        assert unilst[2:18][::-3][1] == 14
+
+    def test_view_is_live(self):
+        unilst = UniqueList(["foo", "bar", "baz"])
+        view = unilst[1:]
+        unilst.append_first("meh")
+        assert list(view) == ["foo", "bar", "baz"]
+
+    def test_view_equals_sequence(self):
+        unilst = UniqueList([1, 2, 3])
+        assert unilst[0:2] == [1, 2]
+        assert [1, 2] == unilst[0:2]
+        assert unilst[::-1] == (3, 2, 1)
+        assert unilst[1:] == UniqueList([2, 3])[:]
+        assert unilst[0:2] != [1, 2, 3]
+        assert unilst[0:2] != [2, 1]
+        assert unilst[:0] == []
+        assert unilst[:] != "123"
+
+    def test_view_contains_and_index(self):
+        unilst = UniqueList(range(10))
+        view = unilst[2:8:2]
+        assert 4 in view
+        assert 5 not in view
+        assert 9 not in view
+        assert view.index(6) == 2
+        assert view.count(6) == 1
+        with pytest.raises(ValueError):
+            view.index(3)
+        with pytest.raises(ValueError):
+            view.index(2, 1)
+
+    def test_view_copy(self):
+        unilst = UniqueList(["Foo", "bar", "baz"], key=str.casefold)
+        new = unilst[:2].copy()
+        assert isinstance(new, UniqueList)
+        assert list(new) == ["Foo", "bar"]
+        assert "FOO" in new
+        new.append("meh")
+        assert list(unilst) == ["Foo", "bar", "baz"]
+
+    def test_sorted_view(self):
+        sul = SortedUniqueList([5, 3, 1, 4, 2])
+        view = sul[1:4]
+        assert list(view) == [2, 3, 4]
+        assert isinstance(view.copy(), SortedUniqueList)
+
+    @pytest.mark.parametrize("index", [slice(2, 7), slice(None, None, 3),
+                                       slice(8, 1, -2), slice(None, None)])
+    @pytest.mark.parametrize("n_items", [10, 100])
+    def test_delete_slice(self, index, n_items):
+        unilst = UniqueList(range(n_items))
+        expected = list(range(n_items))
+        del unilst[index]
+        del expected[index]
+        assert list(unilst) == expected
+        assert all(item in unilst for item in expected)
+        assert len(unilst) == len(expected)
+
+    @pytest.mark.parametrize("n_items", [10, 100])
+    def test_delete_index_list(self, n_items):
+        unilst = UniqueList(range(n_items))
+        del unilst[[0, 3, -1, 3]]
+        expected = [item for item in range(n_items)
+                    if item not in (0, 3, n_items - 1)]
+        assert list(unilst) == expected
+        assert unilst.index(expected[-1]) == len(expected) - 1
+
+    def test_delete_index_list_out_of_range(self, simple_unilst):
+        with pytest.raises(IndexError):
+            del simple_unilst[[0, 5]]
+        assert list(simple_unilst) == ["foo", "bar", "baz"]
+
+    def test_sorted_delete_index_list(self):
+        sul = SortedUniqueList(["c", "a", "b", "d"])
+        del sul[(0, 2)]
+        assert list(sul) == ["b", "d"]
+        assert "a" not in sul